@@ -0,0 +1,66 @@
+"""Benchmark of the negotiated response compression (Accept-Encoding) of GET /
+
+For 1k, 10k and 50k synthetic processes: publishes the check results (publish_check_data()) and reports the payload size,
+the compression ratio and the cpu time of the compression per supported encoding (zstd and br only if the modules are installed).
+Then lets concurrent pollers request every encoding of a new snapshot and counts the compressions (each encoding once per snapshot).
+
+    python benchmarks/bench_compression.py --processes 1000 10000 50000 --pollers 8
+"""
+import argparse
+import threading
+import time
+
+from common import import_agent, synthetic_check_data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--processes', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--pollers', type=int, default=8, help='concurrent pollers per encoding')
+    parser.add_argument('--repeat', type=int, default=3, help='compressions per encoding (the minimum is reported)')
+    options = parser.parse_args()
+
+    agent = import_agent()
+    encodings = agent.get_supported_content_encodings()
+    compressions = []
+    compress_data = agent.compress_data
+
+    def counting_compress_data(data, encoding):
+        compressions.append(encoding)
+        return compress_data(data, encoding)
+    agent.compress_data = counting_compress_data
+
+    print('encodings: %s' % ', '.join(encodings))
+    for processes in options.processes:
+        agent.cached_check_data = synthetic_check_data(processes)
+        started = time.process_time()
+        snapshot = agent.publish_check_data()
+        publish_ms = (time.process_time() - started) * 1000
+        size = len(snapshot['body'])
+        print('%6d processes: identity %9d bytes (publish / json.dumps %.1f ms cpu)' % (processes, size, publish_ms))
+
+        for encoding in encodings:
+            cpu_times = []
+            for i in range(options.repeat):
+                snapshot['encoded'].pop(encoding, None)
+                started = time.process_time()
+                body = agent.get_encoded_check_data(snapshot, encoding)
+                cpu_times.append(time.process_time() - started)
+            started = time.perf_counter()
+            agent.get_encoded_check_data(snapshot, encoding)
+            cached_us = (time.perf_counter() - started) * 1000000
+            print('    %-4s %9d bytes  ratio %5.1fx  %7.1f ms cpu  (%4.1f MB/s), cached %.1f us' % (
+                encoding, len(body), float(size) / len(body), min(cpu_times) * 1000, size / min(cpu_times) / 1e6, cached_us))
+
+        snapshot = agent.publish_check_data()
+        del compressions[:]
+        pollers = [threading.Thread(target=agent.get_encoded_check_data, args=(snapshot, encoding)) for encoding in encodings for i in range(options.pollers)]
+        for thread in pollers:
+            thread.start()
+        for thread in pollers:
+            thread.join()
+        print('    %d concurrent pollers on a new snapshot: %d compressions (%s)' % (len(pollers), len(compressions), ', '.join(sorted(compressions))))
+
+
+if __name__ == '__main__':
+    main()
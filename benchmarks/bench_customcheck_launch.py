@@ -0,0 +1,61 @@
+"""Benchmark of custom check launches: shell = true (/bin/sh -c command) versus shell = false (direct exec)
+
+Runs each command --launches times through run_customcheck_command() (the thread executor) and reports the launches per second,
+the cpu time per launch of the agent and of the started processes (including /bin/sh) and the launches that used os.posix_spawn.
+"true" is a builtin of /bin/sh, so with shell = true it starts one process only; "/bin/true" starts two.
+
+    python benchmarks/bench_customcheck_launch.py --launches 1000 --command "uname -a" --command /bin/true --command true
+"""
+import argparse
+import os
+import resource
+import time
+
+from common import import_agent
+
+
+def cpu_seconds(who):
+    usage = resource.getrusage(who)
+    return usage.ru_utime + usage.ru_stime
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--launches', type=int, default=1000)
+    parser.add_argument('--command', action='append', help='custom check command (default: "uname -a", /bin/true and true)')
+    options = parser.parse_args()
+    commands = options.command or ['uname -a', '/bin/true', 'true']
+
+    agent = import_agent()
+    posix_spawn_calls = [0]
+    if hasattr(os, 'posix_spawn'):
+        posix_spawn = os.posix_spawn
+
+        def counting_posix_spawn(*args, **kwargs):
+            posix_spawn_calls[0] += 1
+            return posix_spawn(*args, **kwargs)
+        os.posix_spawn = counting_posix_spawn
+
+    for command in commands:
+        for shell in (True, False):
+            check = {'name': 'benchmark', 'command': command, 'timeout': 10, 'shell': shell}
+            if not shell:
+                check['args'], check['executable'] = agent.split_customcheck_command(command)
+            posix_spawn_calls[0] = 0
+            agent_cpu = cpu_seconds(resource.RUSAGE_SELF)
+            children_cpu = cpu_seconds(resource.RUSAGE_CHILDREN)
+            started = time.perf_counter()
+            for i in range(options.launches):
+                result = agent.run_customcheck_command(check, agent.monotonic_time())
+                if result.get('returncode') != 0:
+                    raise RuntimeError('"%s" failed: %s' % (command, result))
+            elapsed = time.perf_counter() - started
+            agent_cpu = cpu_seconds(resource.RUSAGE_SELF) - agent_cpu
+            children_cpu = cpu_seconds(resource.RUSAGE_CHILDREN) - children_cpu
+            print('%-12s %-13s %6.0f launches/s  cpu per launch: agent %.3f ms, child processes %.3f ms  (posix_spawn: %d of %d)' % (
+                command, 'shell = true' if shell else 'shell = false', options.launches / elapsed,
+                agent_cpu / options.launches * 1000, children_cpu / options.launches * 1000, posix_spawn_calls[0], options.launches))
+
+
+if __name__ == '__main__':
+    main()
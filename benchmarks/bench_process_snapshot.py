@@ -0,0 +1,109 @@
+"""Benchmark of the process check: one psutil oneshot per process versus the previous path (one read per attribute)
+
+The previous path is replayed with the same psutil calls as before the oneshot change: p.parent() for the ppid
+(a second Process object), nice, name, username, exe, cmdline, cpu_percent, memory_info, memory_percent()
+(re-reads /proc/meminfo), num_fds and open_files, each outside of oneshot().
+The current path is collect_processes(), with and without the stable attributes cache.
+
+Linux only. By default the processes are a synthetic /proc tree (see common.FakeProcfs), so 50k processes
+can be benchmarked on a small machine; --real uses the processes of the host.
+
+    python benchmarks/bench_process_snapshot.py --processes 1000 10000 50000
+"""
+import argparse
+import time
+
+import psutil
+
+from common import FakeProcfs, import_agent
+
+
+def previous_process_data(p):
+    """Process information like the process check before the oneshot change (without its error logging)"""
+    pid = p.pid
+    ppid = None
+    if pid not in (1, 2):
+        ppid = p.parent().pid if p.parent() is not None else None
+    data = {'pid': pid, 'ppid': ppid, 'nice_level': p.nice(), 'name': p.name(), 'username': p.username()}
+    for field, read in (('exec', p.exe), ('cmdline', p.cmdline)):
+        try:
+            data[field] = read()
+        except psutil.AccessDenied:
+            data[field] = ''
+    data['cpu_percent'] = p.cpu_percent(interval=None)
+    data['memory'] = p.memory_info()._asdict()
+    data['memory_percent'] = p.memory_percent()
+    data['status'] = p.status()
+    try:
+        data['num_fds'] = p.num_fds()
+        data['open_files'] = p.open_files()
+    except psutil.AccessDenied:
+        pass
+    return data
+
+
+def previous_collect_processes(agent, pids):
+    processes = []
+    for p in agent.update_process_table(pids):
+        try:
+            processes.append(previous_process_data(p))
+        except psutil.NoSuchProcess:
+            continue
+    return processes
+
+
+def measure(function, repeat):
+    """Run function repeat times after one warm-up run (cpu_percent, process table), return the best wall and cpu time"""
+    function()
+    best = None
+    for i in range(repeat):
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        result = function()
+        run = (time.perf_counter() - wall, time.process_time() - cpu)
+        if best is None or run[0] < best[0]:
+            best = run
+    return best, len(result)
+
+
+def benchmark(agent, pids, repeat):
+    memory_total = psutil.virtual_memory().total
+    modes = (
+        ('previous (per attribute)', lambda: previous_collect_processes(agent, pids)),
+        ('oneshot', lambda: agent.collect_processes(pids, memory_total, time.time(), 0)),
+        ('oneshot + attribute cache', lambda: agent.collect_processes(pids, memory_total, time.time(), 300))
+    )
+    results = []
+    for name, function in modes:
+        agent.process_table = {}
+        agent.process_attribute_cache = {}
+        (wall, cpu), collected = measure(function, repeat)
+        results.append((name, wall, cpu, collected))
+    baseline = results[0][1]
+    for name, wall, cpu, collected in results:
+        print('    %-26s %8.3f s wall %8.3f s cpu  %6.1f us/process  %5.2fx  (%d processes)' % (
+            name, wall, cpu, wall / max(1, collected) * 1000000, baseline / wall, collected))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--processes', type=int, nargs='+', default=[1000, 10000, 50000], help='number of synthetic processes')
+    parser.add_argument('--real', action='store_true', help='use the processes of the host instead of a synthetic /proc')
+    parser.add_argument('--repeat', type=int, default=3)
+    options = parser.parse_args()
+
+    agent = import_agent()
+    if options.real:
+        pids = psutil.pids()
+        print('%d processes of the host' % len(pids))
+        benchmark(agent, pids, options.repeat)
+        return
+
+    for count in options.processes:
+        with FakeProcfs(count) as procfs:
+            print('%d synthetic processes (built in %.1f s)' % (count, procfs.build_seconds))
+            benchmark(agent, psutil.pids(), options.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""Scaling benchmark of the process check across worker processes (processstats-workers)
+
+Collects the processes in the agent process (collect_processes()) and with 1, 2, 4 and 8 forked workers
+(start_process_workers(), collect_processes_in_workers()) and reports the wall time of a check, the speedup
+and the cpu time of the agent process itself (the work that is left in the agent, e.g. merging the chunks).
+The speedup is bounded by the number of cpus; the workers only pay off on hosts with several cores.
+
+Linux only. By default the processes are a synthetic /proc tree (see common.FakeProcfs), --real uses the processes of the host.
+
+    python benchmarks/bench_process_workers.py --processes 10000 50000 --workers 1 2 4 8
+"""
+import argparse
+import os
+import time
+
+import psutil
+
+from common import FakeProcfs, import_agent
+
+
+def measure(function, repeat):
+    """Run function repeat times after one warm-up run (cpu_percent, process tables of the workers), return the best wall and agent cpu time"""
+    function()
+    best = None
+    for i in range(repeat):
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        result = function()
+        run = (time.perf_counter() - wall, time.process_time() - cpu)
+        if best is None or run[0] < best[0]:
+            best = run
+    return best, len(result)
+
+
+def benchmark(agent, pids, worker_counts, repeat):
+    memory_total = psutil.virtual_memory().total
+    agent.process_table = {}
+    (in_process, cpu), collected = measure(lambda: agent.collect_processes(pids, memory_total, time.time(), 0), repeat)
+    print('    %-12s %8.3f s wall  %5.2fx  agent cpu %7.3f s  (%d processes)' % ('in agent', in_process, 1.0, cpu, collected))
+
+    for count in worker_counts:
+        agent.process_table = {}
+        agent.start_process_workers(count)
+        try:
+            (elapsed, cpu), collected = measure(lambda: agent.collect_processes_in_workers(pids, memory_total, time.time(), 0, 600), repeat)
+        finally:
+            agent.stop_process_workers()
+        label = '%d worker%s' % (count, '' if count == 1 else 's')
+        print('    %-12s %8.3f s wall  %5.2fx  agent cpu %7.3f s  (%d processes)' % (label, elapsed, in_process / elapsed, cpu, collected))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--processes', type=int, nargs='+', default=[10000, 50000], help='number of synthetic processes')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--real', action='store_true', help='use the processes of the host instead of a synthetic /proc')
+    parser.add_argument('--repeat', type=int, default=3)
+    options = parser.parse_args()
+
+    agent = import_agent()
+    agent.verbose = False
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()
+    print('%d usable cpus' % cpus)
+    if options.real:
+        pids = psutil.pids()
+        print('%d processes of the host' % len(pids))
+        benchmark(agent, pids, options.workers, options.repeat)
+        return
+
+    for count in options.processes:
+        with FakeProcfs(count) as procfs:
+            print('%d synthetic processes (built in %.1f s)' % (count, procfs.build_seconds))
+            benchmark(agent, psutil.pids(), options.workers, options.repeat)
+
+
+if __name__ == '__main__':
+    main()
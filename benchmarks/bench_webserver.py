@@ -0,0 +1,95 @@
+"""Load test of the agent webserver
+
+Starts the webserver of the agent (process_webserver()) with synthetic check results and lets concurrent clients
+request GET / (one connection per request, like the pollers). Reports the sustained requests per second,
+the p50 / p99 latency and the time the webserver needs to stop after webserver_stop_requested.
+
+    python benchmarks/bench_webserver.py --clients 4 --requests 250
+"""
+import argparse
+import http.client
+import socket
+import threading
+import time
+
+from common import configure_agent, import_agent, percentile, synthetic_check_data
+
+
+def request(port, path, headers):
+    started = time.perf_counter()
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    try:
+        connection.request('GET', path, headers=headers)
+        response = connection.getresponse()
+        response.read()
+        status = response.status
+    finally:
+        connection.close()
+    return time.perf_counter() - started, status
+
+
+def wait_for_port(port, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), 1).close()
+            return
+        except (IOError, OSError):
+            time.sleep(0.05)
+    raise RuntimeError('Webserver did not start on port %d' % port)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=38380)
+    parser.add_argument('--clients', type=int, default=4, help='concurrent clients')
+    parser.add_argument('--requests', type=int, default=250, help='requests per client')
+    parser.add_argument('--processes', type=int, default=100, help='processes in the check results')
+    parser.add_argument('--gzip', action='store_true', help='send Accept-Encoding: gzip')
+    options = parser.parse_args()
+
+    agent = import_agent()
+    configure_agent(agent, '-p', str(options.port), '-a', '127.0.0.1')
+    agent.cached_check_data = synthetic_check_data(options.processes)
+    agent.publish_check_data()
+
+    webserver = threading.Thread(target=agent.process_webserver)
+    webserver.daemon = True
+    webserver.start()
+    wait_for_port(options.port)
+
+    headers = {'Accept-Encoding': 'gzip'} if options.gzip else {}
+    latencies = []
+    errors = []
+
+    def client():
+        for i in range(options.requests):
+            try:
+                latency, status = request(options.port, '/', headers)
+                latencies.append(latency)
+                if status != 200:
+                    errors.append(status)
+            except (IOError, OSError) as e:
+                errors.append(e)
+
+    clients = [threading.Thread(target=client) for i in range(options.clients)]
+    started = time.perf_counter()
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    stop_started = time.perf_counter()
+    agent.webserver_stop_requested = True
+    webserver.join(10)
+    stop_seconds = time.perf_counter() - stop_started
+
+    print('%d clients x %d requests (%d processes, %d bytes per response)' % (options.clients, options.requests, options.processes, len(agent.check_data_snapshot['body'])))
+    print('  %.0f requests/s, p50 %.1f ms, p99 %.1f ms, max %.1f ms, %d errors' % (
+        len(latencies) / elapsed, percentile(latencies, 50) * 1000, percentile(latencies, 99) * 1000, max(latencies) * 1000, len(errors)))
+    print('  webserver stopped %.2f s after the stop request%s' % (stop_seconds, '' if not webserver.is_alive() else ' (still running!)'))
+
+
+if __name__ == '__main__':
+    main()
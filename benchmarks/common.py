@@ -0,0 +1,147 @@
+"""Helpers shared by the benchmarks
+
+The benchmarks are plain scripts (python benchmarks/<name>.py --help), they are not collected by pytest.
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+REPOSITORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_agent():
+    """Import oitc_agent without the command line of the benchmark"""
+    sys.path.insert(0, REPOSITORY)
+    argv = sys.argv
+    sys.argv = ['oitc_agent.py']
+    try:
+        import oitc_agent
+    finally:
+        sys.argv = argv
+    return oitc_agent
+
+
+def configure_agent(agent, *arguments):
+    """Load the agent configuration (load_configuration()) with the given agent command line arguments"""
+    argv = sys.argv
+    sys.argv = ['oitc_agent.py'] + list(arguments)
+    try:
+        agent.load_configuration()
+    finally:
+        sys.argv = argv
+
+
+def percentile(values, percent):
+    """Nearest-rank percentile of a list of numbers"""
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100.0))]
+
+
+def synthetic_check_data(processes):
+    """Check results with the given number of processes (like the output of run_default_checks())"""
+    return {
+        'processes': [{
+            'name': 'proc%d' % (pid % 500),
+            'exec': '/usr/bin/proc%d' % (pid % 50),
+            'cmdline': ['/usr/bin/proc%d' % (pid % 50), '--config', '/etc/proc%d.conf' % (pid % 50), '--instance', str(pid)],
+            'pid': pid,
+            'ppid': 1 + pid // 8,
+            'children': [],
+            'status': 'sleeping',
+            'username': 'root' if pid % 3 else 'www-data',
+            'cpu_percent': round(0.1 * (pid % 7), 1),
+            'memory': {'rss': 1024 * (pid % 4096 + 1), 'vms': 4096 * (pid % 4096 + 1)},
+            'memory_percent': round(0.01 * (pid % 13), 4),
+            'num_fds': pid % 64,
+            'open_files': [],
+            'io_counters': {},
+            'nice_level': 0
+        } for pid in range(1, processes + 1)],
+        'cpu': {'cpu_total_percentage': 12.5, 'cpu_percentage': [10.0, 15.0]},
+        'agent': {'last_updated': 'Thu Jan  1 00:00:00 2026', 'last_updated_timestamp': 1767225600}
+    }
+
+
+class FakeProcfs(object):
+    """Synthetic /proc tree with any number of processes, used by psutil instead of /proc (psutil.PROCFS_PATH)
+
+    The files of each process are copies of the files of the benchmark process itself (with its own pid, name and cmdline),
+    so psutil parses realistic content. Hosts with 50k processes can be benchmarked on a small machine (pid_max, memory).
+    The only psutil call that does not read the procfs, nice() (a syscall on the pid), reads the nice value from the fake stat file.
+    """
+
+    first_pid = 1000
+
+    def __init__(self, count, fds=2):
+        import psutil
+
+        self.count = count
+        self.root = tempfile.mkdtemp(prefix='oitc_agent_fake_proc_')
+        self.pids = list(range(self.first_pid, self.first_pid + count))
+        for name in ('stat', 'meminfo', 'uptime', 'loadavg'):
+            shutil.copy('/proc/' + name, os.path.join(self.root, name))
+
+        with open('/proc/self/stat') as f:
+            stat = f.read()
+        stat_fields = stat[stat.rindex(')') + 2:].split(' ')
+        with open('/proc/self/status') as f:
+            status = [line for line in f.read().splitlines() if not line.startswith(('Name:', 'Pid:', 'PPid:', 'Tgid:'))]
+        with open('/proc/self/statm') as f:
+            statm = f.read()
+        try:
+            with open('/proc/self/io') as f:
+                io = f.read()
+        except (IOError, OSError):
+            io = None
+        fd_targets = [sys.executable, os.path.abspath(__file__)]
+
+        started = time.time()
+        for index, pid in enumerate(self.pids):
+            ppid = self.pids[(index - 1) // 8] if index > 0 else 1
+            name = 'bench_%d' % (index % 50)
+            directory = os.path.join(self.root, str(pid))
+            os.makedirs(os.path.join(directory, 'fd'))
+            os.mkdir(os.path.join(directory, 'fdinfo'))
+            fields = list(stat_fields)
+            fields[1] = str(ppid)
+            self._write(directory, 'stat', '%d (%s) %s' % (pid, name, ' '.join(fields)))
+            self._write(directory, 'status', 'Name:\t%s\n%s\nTgid:\t%d\nPid:\t%d\nPPid:\t%d\n' % (name, '\n'.join(status), pid, pid, ppid))
+            self._write(directory, 'cmdline', '/usr/bin/%s\0--instance\0%d\0' % (name, pid))
+            self._write(directory, 'statm', statm)
+            if io is not None:
+                self._write(directory, 'io', io)
+            os.symlink(sys.executable, os.path.join(directory, 'exe'))
+            for fd in range(fds):
+                os.symlink(fd_targets[fd % len(fd_targets)], os.path.join(directory, 'fd', str(fd + 3)))
+                self._write(os.path.join(directory, 'fdinfo'), str(fd + 3), 'pos:\t0\nflags:\t0100000\nmnt_id:\t1\n')
+        self.build_seconds = time.time() - started
+
+        self._psutil = psutil
+        self._procfs_path = psutil.PROCFS_PATH
+        self._nice_get = psutil._pslinux.Process.nice_get
+        psutil.PROCFS_PATH = self.root
+
+        def nice_get(process):
+            with open('%s/%d/stat' % (self.root, process.pid)) as f:
+                data = f.read()
+            return int(data[data.rindex(')') + 2:].split()[16])
+        psutil._pslinux.Process.nice_get = nice_get
+
+    @staticmethod
+    def _write(directory, name, content):
+        with open(os.path.join(directory, name), 'w') as f:
+            f.write(content)
+
+    def close(self):
+        """Restore psutil and remove the tree"""
+        self._psutil.PROCFS_PATH = self._procfs_path
+        self._psutil._pslinux.Process.nice_get = self._nice_get
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
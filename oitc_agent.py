@@ -21,12 +21,111 @@
 
 import sys
 import os
+
+
+def run_fork_server():
+    """Function that runs in the fork server process (fork-server = true)
+    
+    The fork server is started by the agent (see start_fork_server()) as "oitc_agent.py --fork-server" and runs before the heavy imports,
+    so the check commands are forked from a small process instead of the (large) agent process.
+    Reads one json request per line from stdin and runs each command in an own thread:
+    {"id", "command", "shell", "args", "executable"} starts a command, {"id", "kill"} kills it.
+    Answers with one json line per finished command on stdout: {"id", "returncode", "output" (base64, including stderr), "error"}.
+    Each command runs in an own session, so a kill also stops its child processes (that would keep the output pipe open).
+    Kills the running commands and exits if stdin is closed (the agent stopped or reloaded).
+
+    """
+    import json
+    import base64
+    import signal
+    import subprocess
+    import threading
+    
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    
+    requests_in = getattr(sys.stdin, 'buffer', sys.stdin)
+    answers_out = getattr(sys.stdout, 'buffer', sys.stdout)
+    stdin_devnull = open(os.devnull, 'rb')
+    close_fds = sys.version_info < (3, 4)    # file descriptors are not inheritable since python 3.4
+    if sys.version_info >= (3, 2):
+        new_session = {'start_new_session': True}
+    else:
+        new_session = {'preexec_fn': os.setsid}    # python 2 subprocess has no start_new_session
+    processes = {}
+    starting = set()
+    killed = set()
+    lock = threading.Lock()
+    
+    def kill(p):
+        try:
+            os.killpg(p.pid, signal.SIGKILL)
+        except OSError:
+            pass
+    
+    def answer(data):
+        with lock:
+            answers_out.write((json.dumps(data) + '\n').encode('utf-8'))
+            answers_out.flush()
+    
+    def run(request):
+        try:
+            if request['shell']:
+                p = subprocess.Popen(request['command'], shell=True, close_fds=close_fds, stdin=stdin_devnull, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, **new_session)
+            else:
+                p = subprocess.Popen(request['args'], executable=request['executable'], close_fds=close_fds, stdin=stdin_devnull, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, **new_session)
+        except Exception as e:
+            with lock:
+                starting.discard(request['id'])
+                killed.discard(request['id'])
+            answer({'id': request['id'], 'returncode': None, 'output': '', 'error': str(e)})
+            return
+        
+        with lock:
+            starting.discard(request['id'])
+            processes[request['id']] = p
+            if request['id'] in killed:
+                killed.discard(request['id'])
+                kill(p)
+        output = p.communicate()[0]
+        with lock:
+            del processes[request['id']]
+        answer({'id': request['id'], 'returncode': p.returncode, 'output': base64.b64encode(output).decode('ascii'), 'error': None})
+    
+    for line in iter(requests_in.readline, b''):
+        try:
+            request = json.loads(line.decode('utf-8'))
+        except ValueError:
+            continue
+        
+        if request.get('kill'):
+            with lock:
+                if request['id'] in processes:
+                    kill(processes[request['id']])
+                elif request['id'] in starting:
+                    killed.add(request['id'])
+        else:
+            with lock:
+                starting.add(request['id'])
+            thread = threading.Thread(target=run, args=(request,))
+            thread.daemon = True
+            thread.start()
+    
+    with lock:
+        for p in processes.values():
+            kill(p)
+    os._exit(0)
+
+
+if __name__ == '__main__' and sys.argv[1:] == ['--fork-server']:
+    run_fork_server()
+
 import io
 import getopt
 import platform
 import datetime
 import time
 import json
+import re
 import socket
 import configparser
 import traceback
@@ -36,12 +135,20 @@ import OpenSSL
 import ssl
 import requests
 import hashlib
+import heapq
 import logging
+import multiprocessing
+import zlib
+import random
+import shlex
+import shutil
 
 from os import access, R_OK, devnull
 from os.path import isfile
+from email.utils import parsedate_tz, mktime_tz
 from time import sleep
 from contextlib import contextmanager
+from collections import deque, namedtuple
 from OpenSSL.SSL import FILETYPE_PEM
 from OpenSSL.crypto import (dump_certificate_request, dump_privatekey, load_certificate, PKey, TYPE_RSA, X509Req)
 from logging.handlers import RotatingFileHandler
@@ -49,6 +156,8 @@ from logging.handlers import RotatingFileHandler
 isPython3 = False
 system = 'linux'
 jmx_import_successfull = False
+zstd_import_successfull = False
+brotli_import_successfull = False
 
 
 
@@ -86,18 +195,18 @@ agent_log.info('Agent started')
 
 if (sys.version_info >= (3, 0)):
     isPython3 = True
+    import asyncio
     import concurrent.futures as futures
     import subprocess
 
-    from threading import Thread, Lock
+    from threading import Thread, Lock, Condition, Event
+    from queue import Queue, Empty
     from _thread import start_new_thread as update_crt_files_thread
-    from _thread import start_new_thread as permanent_check_thread
     from _thread import start_new_thread as permanent_webserver_thread
-    from _thread import start_new_thread as oitc_notification_thread
-    from _thread import start_new_thread as permanent_customchecks_check_thread
     from socketserver import ThreadingMixIn
     from http.server import BaseHTTPRequestHandler, HTTPServer
     from subprocess import Popen, PIPE
+    from urllib.parse import urlparse, parse_qs
 else:
     print('#########################################################')
     print('#             !!!   Python 2 Warning   !!!              #')
@@ -114,14 +223,13 @@ else:
     import subprocess32 as subprocess
     
     from concurrent import futures
-    from threading import Thread, Lock
+    from threading import Thread, Lock, Condition, Event
+    from Queue import Queue, Empty
     from thread import start_new_thread as update_crt_files_thread
-    from thread import start_new_thread as permanent_check_thread
     from thread import start_new_thread as permanent_webserver_thread
-    from thread import start_new_thread as oitc_notification_thread
-    from thread import start_new_thread as permanent_customchecks_check_thread
     from SocketServer import ThreadingMixIn
     from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from urlparse import urlparse, parse_qs
     ProcessLookupError = None
     
 try:
@@ -159,12 +267,25 @@ except:
         print('If you want to use the alfresco stats check try: pip install jmxquery')
         agent_log.info('If you want to use the alfresco stats check try: pip install jmxquery')
 
+try:
+    import zstandard
+    zstd_import_successfull = True
+except:
+    agent_log.info('zstandard not found! zstd response compression disabled.')
+
+try:
+    import brotli
+    brotli_import_successfull = True
+except:
+    agent_log.info('brotli not found! br response compression disabled.')
+
 agentVersion = "1.0.6"
 days_until_cert_warning = 120
 days_until_ca_warning = 30
 enableSSL = False
 autossl = True
 cached_check_data = {}
+check_data_snapshot = None
 cached_customchecks_check_data = {}
 docker_stats_data = {}
 qemu_stats_data = {}
@@ -172,6 +293,71 @@ alfresco_stats_data = {}
 systemd_services_data = {}
 cached_diskIO = {}
 cached_netIO = {}
+cached_cpu_times = None
+cpu_times_fields = ('user', 'nice', 'system', 'idle', 'iowait', 'irq', 'softirq', 'steal', 'guest', 'guest_nice')
+default_check_sections = {}
+default_check_section_names = ('cpustats', 'memory', 'load', 'users', 'diskstats', 'diskio', 'netio', 'netstats', 'sensorstats', 'processstats', 'winservices', 'wineventlog', 'dockerstats', 'qemustats', 'systemdservices', 'alfrescostats')
+compiled_counter_rates = {}
+io_samples = {'disk_io': {}, 'net_io': {}}
+device_filters = {}
+max_device_filter_decisions = 10000
+
+# (rate name, numerator counters, denominator counters (None = per second), factor)
+disk_io_rates = (
+    ('read_iops', ('read_count',), None, 1),
+    ('write_iops', ('write_count',), None, 1),
+    ('total_iops', ('read_count', 'write_count'), None, 1),
+    ('load_percent', ('busy_time',), None, 0.1),    # busy_time in ms: / 1000 * 100
+    ('read_avg_wait', ('read_time',), ('read_count',), 1),
+    ('read_avg_size', ('read_bytes',), ('read_count',), 1),
+    ('write_avg_wait', ('write_time',), ('write_count',), 1),
+    ('write_avg_size', ('write_bytes',), ('write_count',), 1),
+    ('total_avg_wait', ('read_time', 'write_time'), ('read_count', 'write_count'), 1),
+)
+net_io_rates = (
+    ('avg_bytes_sent_ps', ('bytes_sent',), None, 1),
+    ('avg_bytes_recv_ps', ('bytes_recv',), None, 1),
+    ('avg_packets_sent_ps', ('packets_sent',), None, 1),
+    ('avg_packets_recv_ps', ('packets_recv',), None, 1),
+    ('avg_errin', ('errin',), None, 1),
+    ('avg_errout', ('errout',), None, 1),
+    ('avg_dropin', ('dropin',), None, 1),
+    ('avg_dropout', ('dropout',), None, 1),
+)
+process_table = {}
+process_attribute_cache = {}
+process_workers = []
+disk_usage_cache = {}
+procfs_files = {}
+scheduler_jobs = []
+scheduler_job_sequence = 0
+scheduler_thread = None
+auto_certificate_job = None
+customchecks_executor = None
+customchecks_results = Queue()
+customchecks_results_thread = None
+customchecks_metrics = {'executor': None, 'slots': 0, 'busy': 0, 'busy_seconds': 0.0, 'started_sum': 0.0, 'reported': None, 'latency_sum': 0.0, 'latency_count': 0, 'latency_max': 0.0, 'checks': {}}
+customchecks_loop = None
+customchecks_loop_thread = None
+customchecks_child_watcher = None
+customchecks_async_state = {'limit': 0, 'pending': deque(), 'running': {}, 'publish_pending': False, 'stopping': False, 'killed': []}
+customchecks_splay = {'jitter': 0.0, 'max_starts_per_second': 0.0, 'next_start': 0.0, 'deferred': set(), 'rate_limited': 0}
+collector_executor = None
+collector_jobs = {}
+collector_counters = {}
+governor_process = None
+governor_samples = deque()
+governor_state = {'level': 0, 'good_windows': 0, 'cpu_percent': None, 'children_cpu_percent': None, 'rss': None}
+fork_server_process = None
+fork_server_thread = None
+fork_server_requests = {}
+fork_server_sequence = 0
+persistent_customchecks = {}
+procfs_svmem = namedtuple('svmem', ['total', 'available', 'percent', 'used', 'free', 'active', 'inactive', 'buffers', 'cached', 'shared', 'slab'])
+procfs_sswap = namedtuple('sswap', ['total', 'used', 'free', 'percent', 'sin', 'sout'])
+procfs_sdiskio = namedtuple('sdiskio', ['read_count', 'write_count', 'read_bytes', 'write_bytes', 'read_time', 'write_time', 'read_merged_count', 'write_merged_count', 'busy_time'])
+procfs_snetio = namedtuple('snetio', ['bytes_sent', 'bytes_recv', 'packets_sent', 'packets_recv', 'errin', 'errout', 'dropin', 'dropout'])
+process_stable_attributes = ('exec', 'cmdline', 'num_fds', 'open_files')
 configpath = ""
 verbose = False
 stacktrace = False
@@ -181,23 +367,54 @@ initialized = False
 
 thread_stop_requested = False
 webserver_stop_requested = False
-wait_and_check_auto_certificate_thread_stop_requested = False
 
 update_crt_files_thread_running = False
-permanent_check_thread_running = False
 permanent_webserver_thread_running = False
-oitc_notification_thread_running = False
-permanent_customchecks_check_thread_running = False
 
 cert_checksum = ''
 ssl_csr = None
 sha512 = hashlib.sha512()
+max_check_data_variants = 32
+max_disk_usage_workers = 4
+max_disk_usage_backoff = 1800
+max_scheduler_stop_wait = 10
+max_collector_workers = 4
+max_persistent_customcheck_backoff = 300
+max_governor_level = 3
+governor_recovery_windows = 2
+governed_sections = ('processstats', 'dockerstats', 'qemustats')
 print_lock = Lock()
+check_data_snapshot_lock = Lock()
+disk_usage_condition = Condition()
+procfs_lock = Lock()
+scheduler_condition = Condition()
+scheduler_stop_event = Event()
+io_samples_lock = Lock()
+customchecks_metrics_lock = Lock()
+collector_lock = Lock()
+fork_server_lock = Lock()
+persistent_customchecks_lock = Lock()
 certificate_check_lock = Lock()
 
 sample_config = """
 [default]
   interval = 30
+  cpustats-interval = 0
+  memory-interval = 0
+  load-interval = 0
+  users-interval = 0
+  diskstats-interval = 0
+  diskio-interval = 0
+  netio-interval = 0
+  netstats-interval = 0
+  sensorstats-interval = 0
+  processstats-interval = 0
+  winservices-interval = 0
+  wineventlog-interval = 0
+  dockerstats-interval = 0
+  qemustats-interval = 0
+  systemdservices-interval = 0
+  alfrescostats-interval = 0
   port = 3333
   address = 0.0.0.0
   certfile = 
@@ -220,10 +437,27 @@ sample_config = """
   sensorstats = true
   processstats = true
   processstats-including-child-ids = false
+  processstats-stable-attributes-interval = 0
+  processstats-workers = 0
   netstats = true
+  netstats-include = 
+  netstats-exclude = 
   diskstats = true
+  diskstats-include = 
+  diskstats-exclude = 
+  diskstats-timeout = 5
   netio = true
+  netio-include = 
+  netio-exclude = 
   diskio = true
+  diskio-include = 
+  diskio-exclude = 
+  io-sample-interval = 0
+  procfs-reader = false
+  procfs-root = /proc
+  governor-max-cpu-percent = 0
+  governor-max-rss = 0
+  fork-server = false
   winservices = true
   systemdservices = true
   wineventlog = true
@@ -251,6 +485,17 @@ sample_customcheck_config = """
   # max_worker_threads should be increased with increasing number of custom checks
   # but consider: each thread needs (a bit) memory
   max_worker_threads = 8
+  # executor = asyncio runs the commands in one asyncio event loop (python >= 3.8) instead of one thread per command,
+  # max. max_concurrent_checks commands at once
+  executor = threads
+  max_concurrent_checks = 128
+  # splay = true starts each check at a fixed offset (hash of the check name) within its interval,
+  # instead of starting all checks with the same interval at once
+  splay = true
+  # delay each run by a random time of 0 - jitter seconds (0 = disabled)
+  jitter = 0
+  # max. number of check commands started per second (0 = no limit)
+  max_starts_per_second = 0
 [username]
   command = whoami
   interval = 30
@@ -261,6 +506,7 @@ sample_customcheck_config = """
   interval = 15
   timeout = 5
   enabled = false
+  shell = false
 """
 
 config = configparser.ConfigParser(allow_no_value=True)
@@ -277,11 +523,18 @@ def reset_global_options():
     """
     globals()['enableSSL'] = False
     globals()['cached_check_data'] = {}
+    globals()['check_data_snapshot'] = None
     globals()['cached_customchecks_check_data'] = {}
     globals()['docker_stats_data'] = {}
     globals()['qemu_stats_data'] = {}
     globals()['alfresco_stats_data'] = {}
     globals()['systemd_services_data'] = {}
+    globals()['process_table'] = {}
+    globals()['process_attribute_cache'] = {}
+    globals()['io_samples'] = {'disk_io': {}, 'net_io': {}}
+    globals()['cached_cpu_times'] = None
+    globals()['default_check_sections'] = {}
+    globals()['device_filters'] = {}
     globals()['configpath'] = ""
     globals()['verbose'] = False
     globals()['stacktrace'] = False
@@ -289,10 +542,28 @@ def reset_global_options():
     globals()['initialized'] = False
     globals()['thread_stop_requested'] = False
     globals()['update_crt_files_thread_running'] = False
-    globals()['permanent_check_thread_running'] = False
     globals()['permanent_webserver_thread_running'] = False
-    globals()['oitc_notification_thread_running'] = False
-    globals()['permanent_customchecks_check_thread_running'] = False
+    globals()['auto_certificate_job'] = None
+    globals()['customchecks_executor'] = None
+    globals()['customchecks_results'] = Queue()
+    globals()['customchecks_results_thread'] = None
+    globals()['customchecks_metrics'] = {'executor': None, 'slots': 0, 'busy': 0, 'busy_seconds': 0.0, 'started_sum': 0.0, 'reported': None, 'latency_sum': 0.0, 'latency_count': 0, 'latency_max': 0.0, 'checks': {}}
+    globals()['customchecks_loop'] = None
+    globals()['customchecks_loop_thread'] = None
+    globals()['customchecks_child_watcher'] = None
+    globals()['customchecks_async_state'] = {'limit': 0, 'pending': deque(), 'running': {}, 'publish_pending': False, 'stopping': False, 'killed': []}
+    globals()['customchecks_splay'] = {'jitter': 0.0, 'max_starts_per_second': 0.0, 'next_start': 0.0, 'deferred': set(), 'rate_limited': 0}
+    globals()['collector_executor'] = None
+    globals()['collector_jobs'] = {}
+    globals()['collector_counters'] = {}
+    globals()['governor_process'] = None
+    globals()['governor_samples'] = deque()
+    globals()['governor_state'] = {'level': 0, 'good_windows': 0, 'cpu_percent': None, 'children_cpu_percent': None, 'rss': None}
+    globals()['fork_server_process'] = None
+    globals()['fork_server_thread'] = None
+    globals()['fork_server_requests'] = {}
+    globals()['fork_server_sequence'] = 0
+    globals()['persistent_customchecks'] = {}
     globals()['config'] = configparser.ConfigParser(allow_no_value=True)
     globals()['customchecks'] = configparser.ConfigParser(allow_no_value=True)
 
@@ -342,11 +613,12 @@ def signal_handler(sig, frame):
     """A custom signal handler to stop the agent if it is called"""
     global thread_stop_requested
     global webserver_stop_requested
-    global wait_and_check_auto_certificate_thread_stop_requested
     
     thread_stop_requested = True
     webserver_stop_requested = True
-    wait_and_check_auto_certificate_thread_stop_requested = True
+    with scheduler_condition:
+        scheduler_stop_event.set()
+        scheduler_condition.notify_all()
     agent_log.info("Agent stopped")
     
     if verbose:
@@ -386,564 +658,1647 @@ def wrapdiff(last, curr):
     return float(2**boundary - last + curr)
 
 
-def build_autossl_defaults():
-    """ Function to define the system depending certificate file paths
+def monotonic_time():
+    """Function to get the time of a monotonic clock in seconds
+    
+    Falls back to time.time() on python versions without time.monotonic().
+    
+    """
+    if hasattr(time, "monotonic"):
+        return time.monotonic()
+    return time.time()
 
-        Certificate file default paths:
 
-        - Windows:        C:\Program Files\openitcockpit-agent\agent.crt
-        - Linux:          /etc/openitcockpit-agent/agent.crt
-        - macOS:          /etc/openitcockpit-agent/agent.crt
+def compile_counter_rates(fields, rates):
+    """Function to resolve the counter names of rate definitions to tuple indexes
+    
+    Rates that need a counter, which is not available on this system, are skipped.
+    The result is cached per counter fields and rate definitions.
 
-        Config file default paths:
+    Parameters
+    ----------
+    fields
+        Counter names (namedtuple _fields) of a device
+    rates
+        Rate definitions (like disk_io_rates)
 
-        - Windows:        C:\Program Files\openitcockpit-agent\config.cnf
-        - Linux:          /etc/openitcockpit-agent/config.cnf
-        - macOS:          /Library/openitcockpit-agent/config.cnf
+    Returns
+    -------
+    list
+        (name, numerator indexes, denominator indexes or None, factor) tuples
 
     """
-    etc_agent_path = '/etc/openitcockpit-agent/'
-    if system == 'windows':
-        etc_agent_path = 'C:'+os.path.sep+'Program Files'+os.path.sep+'it-novum'+os.path.sep+'openitcockpit-agent'+os.path.sep
+    key = (fields, rates)
+    if key not in compiled_counter_rates:
+        index = dict((field, i) for i, field in enumerate(fields))
+        compiled = []
+        for name, numerator, denominator, factor in rates:
+            needed = numerator + (denominator if denominator is not None else ())
+            if all(field in index for field in needed):
+                compiled.append((
+                    name,
+                    tuple(index[field] for field in numerator),
+                    tuple(index[field] for field in denominator) if denominator is not None else None,
+                    factor
+                ))
+        compiled_counter_rates[key] = compiled
+    return compiled_counter_rates[key]
+
+
+def calculate_counter_rates(counters, cache, rates):
+    """Function to calculate rates of (io) counters of multiple devices
     
-    if config['default']['autossl-folder'] != "":
-        etc_agent_path = config['default']['autossl-folder'] + os.path.sep
+    Stores the counters of each device as tuple and calculates all deltas of a device in one pass.
+    wrapdiff() is only called for counters that wrapped.
+    The elapsed time is measured with a monotonic clock.
     
-    config['default']['autossl-csr-file'] = etc_agent_path + 'agent.csr'
-    config['default']['autossl-crt-file'] = etc_agent_path + 'agent.crt'
-    config['default']['autossl-key-file'] = etc_agent_path + 'agent.key'
-    config['default']['autossl-ca-file'] = etc_agent_path + 'server_ca.crt'
+    Rates are defined as (name, numerator counters, denominator counters, factor):
+    
+    - denominator None: numerator deltas (up to two, summed) / elapsed seconds * factor
+    - otherwise: numerator deltas (up to two, summed) / sum(denominator deltas) (0 if there is no denominator delta)
+    
+    Rates are available after the second call.
 
+    Parameters
+    ----------
+    counters
+        Dictionary device -> counters (namedtuple), like psutil.disk_io_counters(perdisk=True)
+    cache
+        Cache returned by the previous call (or an empty dict)
+    rates
+        Rate definitions (like disk_io_rates)
 
-def run_default_checks():
-    """Function to run the default checks
+    Returns
+    -------
+    tuple
+        (dictionary device -> counters and rates, new cache)
+
+    """
+    now = monotonic_time()
+    previous = cache.get('counters', {})
+    elapsed = 0
+    if 'monotonic_timestamp' in cache:
+        elapsed = now - cache['monotonic_timestamp']
+    
+    result = {}
+    new_counters = {}
+    for device, values in counters.items():
+        fields = values._fields
+        values = tuple(values)
+        new_counters[device] = values
+        data = dict(zip(fields, values))
+        
+        last = previous.get(device)
+        if last is not None and elapsed > 0 and len(last) == len(values):
+            deltas = [curr - prev if curr >= prev else wrapdiff(prev, curr) for prev, curr in zip(last, values)]
+            for name, numerator, denominator, factor in compile_counter_rates(fields, rates):
+                value = float(deltas[numerator[0]])
+                if len(numerator) > 1:
+                    value += deltas[numerator[1]]
+                if denominator is None:
+                    data[name] = value * factor / elapsed
+                else:
+                    divisor = deltas[denominator[0]]
+                    if len(denominator) > 1:
+                        divisor += deltas[denominator[1]]
+                    data[name] = value / divisor if divisor else 0
+        result[device] = data
     
-    Run default checks to get following information points.
+    return result, {'monotonic_timestamp': now, 'counters': new_counters}
+
+
+def get_io_sample_interval():
+    """Function to get the configured disk and network io sample interval
     
+    Returns
+    -------
+    float
+        Sample interval in seconds (0 = sampler disabled, otherwise at least 0.1)
+
+    """
+    try:
+        sample_interval = int(config['default'].get('io-sample-interval', 0) or 0)
+    except ValueError:
+        return 0
+    if sample_interval <= 0:
+        return 0
+    return max(100, sample_interval) / 1000.0
+
+
+def add_io_samples(kind, rates, size):
+    """Function to append the rates of a disk or network io sample to the ring buffers
     
-    - disks (Storage devices with mountpoint, filesystem and storage space definitions)
-    - disk_io (Read and write statistics of the storage devices)
-    - net_io (Input and Outputstatistics of the network devices)
-    - net_stats (Network devices including the possible speed, ...)
-    - sensors (Connected sensors, e.g. temperature of the cpu, akku state)
-    - cpu_total_percentage (Used CPU calculation time in percent)
-    - cpu_percentage (Used cpu calculation time in percent per core)
-    - cpu_total_percentage_detailed (Cpu calculation time in percent per system ressource)
-    - cpu_percentage_detailed (Cpu calculation time in percent per system ressource per core)
-    - system_load (System load 1, 5, 15 as array)
-    - users (Users logged on to the system, their terminals (pid), login time)
-    - memory (Memory information, total, used, active, buffered, ...)
-    - swap (Swap information, total, used, ...)
-    - processes (Information to running processes, cpu, memory, pid, ...)
-    - agent (Agent version, last check time, system version, ...)
-    - dockerstats (Docker containers, id, cpu, memory, block io, pid)
-    - qemustats (Information to active QEMU virtual machines)
+    Each rate of each device has its own ring buffer (deque with maxlen = size).
 
+    Parameters
+    ----------
+    kind
+        'disk_io' or 'net_io'
+    rates
+        Result of calculate_counter_rates()
+    size
+        Maximum number of samples per buffer
 
-    Notice:
+    """
+    rate_definitions = disk_io_rates if kind == 'disk_io' else net_io_rates
+    with io_samples_lock:
+        samples = io_samples[kind]
+        for device, data in rates.items():
+            if device not in samples:
+                samples[device] = {}
+            buffers = samples[device]
+            for rate in rate_definitions:
+                name = rate[0]
+                if name in data:
+                    if name not in buffers:
+                        buffers[name] = deque(maxlen=size)
+                    buffers[name].append(data[name])
+
+
+def summarize_io_samples(kind):
+    """Function to summarize and clear the disk or network io samples collected since the last call
 
-    Processes with id 0 or 1 are excluded of the process parent and child id check.
-    There are the root processes on linux, macOS and windows.
-    These checks are configurable: dockerstats, qemustats, cpustats, sensorstats, processstats, netstats, diskstats, netio, diskio, winservices.
-    Average values and iops in netio and diskio checks are available after the second check goes through.
+    Parameters
+    ----------
+    kind
+        'disk_io' or 'net_io'
 
-    
     Returns
     -------
     dict
-        Object (dictionary) containing all the default check results
+        device -> {'count': number of samples, 'rates': {rate name -> {'min', 'max', 'avg', 'p95'}}}
 
     """
-    agent_log.info('Running default checks')
-    global cached_diskIO
-    global cached_netIO
+    with io_samples_lock:
+        samples = io_samples[kind]
+        values = {}
+        for device in list(samples.keys()):
+            buffers = samples[device]
+            values[device] = dict((name, list(buffer)) for name, buffer in buffers.items() if buffer)
+            if not values[device]:
+                del samples[device]     # device is gone
+            for buffer in buffers.values():
+                buffer.clear()
+    
+    summary = {}
+    for device, rates in values.items():
+        if not rates:
+            continue
+        summary[device] = {'count': max(len(rate_values) for rate_values in rates.values()), 'rates': {}}
+        for name, rate_values in rates.items():
+            rate_values.sort()
+            count = len(rate_values)
+            summary[device]['rates'][name] = {
+                'min': rate_values[0],
+                'max': rate_values[-1],
+                'avg': sum(rate_values) / float(count),
+                'p95': rate_values[max(0, int(0.95 * count + 0.5) - 1)]     # nearest rank
+            }
+    return summary
+
+
+def collect_io_samples(size, caches):
+    """Function (scheduled job) to sample the disk and network io rates
     
-    if verbose:
-        print_lock.acquire()
-        
-    if config['default']['cpustats'] in (1, "1", "true", "True"):
+    Reads the disk and network io counters and stores the rates in ring buffers.
+    Scheduled every io-sample-interval milliseconds, the default check summarizes these buffers once per check interval (summarize_io_samples()).
     
-        # CPU #
-        cpuTotalPercentage = psutil.cpu_percent()
-        cpuPercentage = psutil.cpu_percent(interval=0, percpu=True)
+    Parameters
+    ----------
+    size
+        Maximum number of samples per ring buffer
+    caches
+        Dictionary with the counter caches of the previous sample (updated)
 
-        cpu = psutil.cpu_times_percent(interval=0, percpu=False)
-        cpuTotalPercentageDetailed = cpu._asdict()
-        
-        cpuPercentageDetailed = [dict(cpu._asdict()) for cpu in psutil.cpu_times_percent(interval=0, percpu=True)]
-    
-    uptime = 0
+    """
     try:
-        if hasattr(psutil, "boot_time") and callable(psutil.boot_time):
-            uptime = int(time.time() - psutil.boot_time())
-        else:
-            uptime = int(time.time() - psutil.BOOT_TIME)
+        if hasattr(psutil, "disk_io_counters") and config['default']['diskio'] in (1, "1", "true", "True"):
+            rates, caches['disk_io'] = calculate_counter_rates(filter_devices('diskio', get_disk_io_counters()), caches.get('disk_io', {}), disk_io_rates)
+            add_io_samples('disk_io', rates, size)
+        if hasattr(psutil, "net_io_counters") and config['default']['netio'] in (1, "1", "true", "True"):
+            rates, caches['net_io'] = calculate_counter_rates(filter_devices('netio', get_net_io_counters()), caches.get('net_io', {}), net_io_rates)
+            add_io_samples('net_io', rates, size)
     except:
-        agent_log.error("Could not get system uptime!")
-        print_verbose_without_lock("Could not get system uptime!", True)
+        print_verbose_without_lock("Could not sample disk / network io stats!", True)
+        agent_log.error("Could not sample disk / network io stats!")
         
         if stacktrace:
             traceback.print_exc()
-            
 
-    #totalCpus = psutil.cpu_count()
-    #physicalCpus = psutil.cpu_count(logical=False)
 
-    #cpuFrequency = psutil.cpu_freq()
+def compile_device_filter_patterns(option):
+    """Function to compile a whitespace separated list of regular expressions of the configuration into one pattern
+    
+    The expressions are separated by whitespace (not commas, which are part of quantifiers like {m,n}).
+    A space within an expression can be written as \\s or \\x20. Invalid expressions are logged and skipped.
 
-    # MEMORY #
+    Parameters
+    ----------
+    option
+        Name of the configuration option (like diskio-exclude)
 
-    memory = psutil.virtual_memory()
-    swap = psutil.swap_memory()
+    Returns
+    -------
+    pattern
+        Compiled pattern or None if there is no (valid) expression
 
-    if config['default']['diskstats'] in (1, "1", "true", "True"):
-        # DISKS #
-        disks = []
+    """
+    expressions = []
+    for expression in config['default'].get(option, '').split():
         try:
-            for disk in psutil.disk_partitions():
-                if os.name == 'nt':
-                    if 'cdrom' in disk.opts or disk.fstype == '':
-                        # skip cd-rom drives with no disk in it; they may raise
-                        # ENOENT, pop-up a Windows GUI error for a non-ready
-                        # partition or just hang.
-                        continue
-                disks.append(dict(
-                    disk = disk._asdict(),
-                    usage = psutil.disk_usage(disk.mountpoint)._asdict()
-                    ))
-        except:
-            agent_log.error("Could not get system disks!")
-            print_verbose_without_lock("Could not get system disks!", True)
-            
-            if stacktrace:
-                traceback.print_exc()
-                
+            re.compile(expression)
+            expressions.append('(?:%s)' % expression)
+        except re.error:
+            print_verbose_without_lock('Invalid regular expression "%s" in %s!' % (expression, option), False)
+            agent_log.error('Invalid regular expression "%s" in %s!' % (expression, option))
+    if not expressions:
+        return None
+    return re.compile('|'.join(expressions))
+
+
+def device_is_included(check, names):
+    """Function to check the include / exclude filters of a check for a device
     
-    diskIO = None
-    if hasattr(psutil, "disk_io_counters") and config['default']['diskio'] in (1, "1", "true", "True"):
-        try:
-            #diskIOTotal = psutil.disk_io_counters(perdisk=False)._asdict()
-            #diskIO = psutil.disk_io_counters(perdisk=True)
-            diskIO = { disk: iops._asdict() for disk,iops in psutil.disk_io_counters(perdisk=True).items() }
-            diskIO['timestamp'] = time.time()
+    The regular expressions of <check>-include and <check>-exclude are compiled once and matched at the beginning of each name.
+    A device is included if no include filter is set or one of its names matches it, and none of its names matches the exclude filter.
+    Decisions are cached per names, so each device is matched only once.
 
-            for disk in diskIO:
-                if disk != "timestamp" and disk in cached_diskIO:
+    Parameters
+    ----------
+    check
+        diskio, netio, netstats or diskstats
+    names
+        Tuple of names of the device (like (device,) or (device, mountpoint))
 
-                    diskIODiff = {}
-                    diskIODiff['timestamp'] = wrapdiff(float(cached_diskIO['timestamp']), float(diskIO['timestamp']))
+    Returns
+    -------
+    bool
+        True if the device should be checked
 
-                    for attr in diskIO[disk]:
-                        diff = wrapdiff(float(cached_diskIO[disk][attr]), float(diskIO[disk][attr]))
-                        diskIODiff[attr] = diff
+    """
+    if check not in device_filters:
+        device_filters[check] = (compile_device_filter_patterns(check + '-include'), compile_device_filter_patterns(check + '-exclude'), {})
+    include, exclude, decisions = device_filters[check]
+    
+    if include is None and exclude is None:
+        return True
+    if names in decisions:
+        return decisions[names]
+    
+    included = include is None or any(include.match(name) for name in names)
+    if included and exclude is not None:
+        included = not any(exclude.match(name) for name in names)
+    
+    if len(decisions) >= max_device_filter_decisions:
+        decisions.clear()   # names of short living devices (like veth interfaces) would grow the cache endless
+    decisions[names] = included
+    return included
 
-                    diskIO[disk]['read_iops'] = diskIODiff['read_count'] / diskIODiff['timestamp']
-                    diskIO[disk]['write_iops'] = diskIODiff['write_count'] / diskIODiff['timestamp']
 
-                    tot_ios = diskIODiff['read_count'] + diskIODiff['write_count']
-                    diskIO[disk]['total_iops'] = tot_ios / diskIODiff['timestamp']
-                    #diskIO[disk]['tot_ticks'] = diskIODiff['busy_time']
-                    #diskIO[disk]['interval'] = diskIODiff['timestamp']
-                    if 'busy_time' in diskIODiff:
-                        diskIO[disk]['load_percent'] = diskIODiff['busy_time'] / (diskIODiff['timestamp'] * 1000.) * 100.
+def filter_devices(check, devices):
+    """Function to remove the devices that are excluded by the filters of a check
 
-                    if diskIODiff['read_count']:
-                        diskIO[disk]['read_avg_wait'] = float(diskIODiff['read_time'] / diskIODiff['read_count'])
-                        diskIO[disk]['read_avg_size'] = float(diskIODiff['read_bytes'] / diskIODiff['read_count'])
-                    else:
-                        diskIO[disk]['read_avg_wait'] = 0
-                        diskIO[disk]['read_avg_size'] = 0
+    Parameters
+    ----------
+    check
+        diskio, netio or netstats
+    devices
+        Dictionary device name -> data (like psutil.net_io_counters(pernic=True))
 
-                    if diskIODiff['write_count']:
-                        diskIO[disk]['write_avg_wait'] = float(diskIODiff['write_time'] / diskIODiff['write_count'])
-                        diskIO[disk]['write_avg_size'] = float(diskIODiff['write_bytes'] / diskIODiff['write_count'])
-                    else:
-                        diskIO[disk]['write_avg_wait'] = 0
-                        diskIO[disk]['write_avg_size'] = 0
+    Returns
+    -------
+    dict
+        Dictionary with the included devices
 
-                    if tot_ios:
-                        diskIO[disk]['total_avg_wait'] = float((diskIODiff['read_time'] + diskIODiff['write_time']) / tot_ios)
-                    else:
-                        diskIO[disk]['total_avg_wait'] = 0
+    """
+    return dict((device, data) for device, data in devices.items() if device_is_included(check, (device,)))
 
-            cached_diskIO = diskIO
-        except:
-            print_verbose_without_lock("Could not get disk io stats!", True)
-            agent_log.error("Could not get disk io stats!")
-            
-            if stacktrace:
-                traceback.print_exc()
-                
+
+def get_procfs_root():
+    """Function to get the proc root of the procfs reader
     
-    netIO = None
-    if hasattr(psutil, "net_io_counters") and config['default']['netio'] in (1, "1", "true", "True"):
-        try:
-            netIO = { device: data._asdict() for device,data in psutil.net_io_counters(pernic=True).items() }
-            netIO['timestamp'] = time.time()
+    The procfs reader is a linux fast path for system wide metrics (memory, swap, disk and network io).
+    It needs os.pread (python >= 3.3).
+    
+    Returns
+    -------
+    str
+        Proc root (like /proc) or None if the procfs reader is disabled or not available
 
-            for device in netIO:
-                if device != "timestamp" and device in cached_netIO:
+    """
+    if system != 'linux' or not hasattr(os, "pread"):
+        return None
+    if config['default'].get('procfs-reader', 'false') not in (1, "1", "true", "True"):
+        return None
+    return config['default'].get('procfs-root', '/proc') or '/proc'
 
-                    netIODiff = {}
-                    netIODiff['timestamp'] = wrapdiff(float(cached_netIO['timestamp']), float(netIO['timestamp']))
 
-                    for attr in netIO[device]:
-                        diff = wrapdiff(float(cached_netIO[device][attr]), float(netIO[device][attr]))
-                        netIODiff[attr] = diff
+def procfs_read(root, name):
+    """Function to read a procfs file through a persistent file descriptor
+    
+    The file is opened once and re-read with os.pread at offset 0 on each call (procfs generates the content on read).
+    The buffer size is remembered per file and doubled until the whole file fits.
 
-                    if netIODiff['bytes_sent']:
-                        netIO[device]['avg_bytes_sent_ps'] = float(netIODiff['bytes_sent'] / netIODiff['timestamp'])
-                    else:
-                        netIO[device]['avg_bytes_sent_ps'] = 0
+    Parameters
+    ----------
+    root
+        Proc root (like /proc)
+    name
+        File name relative to root (like meminfo or net/dev)
 
-                    if netIODiff['bytes_recv']:
-                        netIO[device]['avg_bytes_recv_ps'] = float(netIODiff['bytes_recv'] / netIODiff['timestamp'])
-                    else:
-                        netIO[device]['avg_bytes_recv_ps'] = 0
+    Returns
+    -------
+    bytes
+        Content of the file
 
-                    if netIODiff['packets_sent']:
-                        netIO[device]['avg_packets_sent_ps'] = float(netIODiff['packets_sent'] / netIODiff['timestamp'])
-                    else:
-                        netIO[device]['avg_packets_sent_ps'] = 0
+    """
+    path = os.path.join(root, name)
+    with procfs_lock:
+        if path not in procfs_files:
+            procfs_files[path] = [os.open(path, os.O_RDONLY), 4096]
+        fd_and_size = procfs_files[path]
+    
+    size = fd_and_size[1]
+    while True:
+        try:
+            data = os.pread(fd_and_size[0], size, 0)
+        except OSError:
+            with procfs_lock:
+                if procfs_files.get(path) is fd_and_size:
+                    del procfs_files[path]
+                    os.close(fd_and_size[0])
+            raise
+        if len(data) < size:
+            break
+        size *= 2
+    fd_and_size[1] = size
+    return data
 
-                    if netIODiff['packets_recv']:
-                        netIO[device]['avg_packets_recv_ps'] = float(netIODiff['packets_recv'] / netIODiff['timestamp'])
-                    else:
-                        netIO[device]['avg_packets_recv_ps'] = 0
 
-                    if netIODiff['errin']:
-                        netIO[device]['avg_errin'] = float(netIODiff['errin'] / netIODiff['timestamp'])
-                    else:
-                        netIO[device]['avg_errin'] = 0
+def close_procfs_files():
+    """Function to close the file descriptors of the procfs reader"""
+    with procfs_lock:
+        for fd, size in procfs_files.values():
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        procfs_files.clear()
 
-                    if netIODiff['errout']:
-                        netIO[device]['avg_errout'] = float(netIODiff['errout'] / netIODiff['timestamp'])
-                    else:
-                        netIO[device]['avg_errout'] = 0
 
-                    if netIODiff['dropin']:
-                        netIO[device]['avg_dropin'] = float(netIODiff['dropin'] / netIODiff['timestamp'])
-                    else:
-                        netIO[device]['avg_dropin'] = 0
+def procfs_meminfo_values(data, keys):
+    """Function to parse the given fields of /proc/meminfo (or /proc/vmstat)
+    
+    Only the requested fields are converted, the remaining lines are not touched.
 
-                    if netIODiff['dropout']:
-                        netIO[device]['avg_dropout'] = float(netIODiff['dropout'] / netIODiff['timestamp'])
-                    else:
-                        netIO[device]['avg_dropout'] = 0
+    Parameters
+    ----------
+    data
+        Content of the file
+    keys
+        Field names (bytes, like b'MemTotal:')
+
+    Returns
+    -------
+    dict
+        Field name -> value (int, like in the file; kB for meminfo)
 
+    """
+    values = {}
+    for key in keys:
+        start = data.find(b'\n' + key)
+        if start == -1:
+            if not data.startswith(key):
+                continue
+            start = len(key)
+        else:
+            start += len(key) + 1
+        end = data.find(b'\n', start)
+        values[key] = int(data[start:end if end != -1 else len(data)].split()[0])
+    return values
 
-            cached_netIO = netIO
-        except:
-            print_verbose_without_lock("Could not get network io stats!", True)
-            agent_log.error("Could not get network io stats!")
-            
-            if stacktrace:
-                traceback.print_exc()
-                
+
+def procfs_virtual_memory(root):
+    """Function to get the virtual memory stats from /proc/meminfo
     
-    net_stats = None
-    if hasattr(psutil, "net_if_stats") and config['default']['netstats'] in (1, "1", "true", "True"):
-        try:
-            net_stats = { device: data._asdict() for device,data in psutil.net_if_stats().items() }
-        except:
-            print_verbose_without_lock("Could not get network device stats!", True)
-            agent_log.error("Could not get network device stats!")
-            
-            if stacktrace:
-                traceback.print_exc()
-                
+    Same fields and calculation as psutil.virtual_memory() of the supported psutil versions (<= 5.6.2):
+    used = total - free - cached - buffers, percent = (total - available) / total.
+    Falls back to psutil if MemAvailable is not available (kernel < 3.14).
 
-    sensors = {}
-    if config['default']['sensorstats'] in (1, "1", "true", "True"):
-        try:
-            if hasattr(psutil, "sensors_temperatures") and system != 'windows':
-                sensors['temperatures'] = {}
-                for device,data in psutil.sensors_temperatures(fahrenheit=temperatureIsFahrenheit).items():
-                    sensors['temperatures'][device] = []
-                    for value in data:
-                        sensors['temperatures'][device].append(value._asdict())
-            else:
-                sensors['temperatures'] = {}
-        except:
-            print_verbose_without_lock("Could not get temperature sensor data!", True)
-            agent_log.error("Could not get temperature sensor data!")
-            
-            if stacktrace:
-                traceback.print_exc()
-                
-        
-        try:
-            if hasattr(psutil, "sensors_fans") and system != 'windows':
-                sensors['fans'] = {}
-                for device,data in psutil.sensors_fans().items():
-                    sensors['fans'][device] = []
-                    for value in data:
-                        sensors['fans'][device].append(value._asdict())
-            else:
-                sensors['fans'] = {}
-        except:
-            print_verbose_without_lock("Could not get fans sensor data!", True)
-            agent_log.error("Could not get fans sensor data!")
-            
-            if stacktrace:
-                traceback.print_exc()
-                
-        
-        try:
-            if hasattr(psutil, "sensors_battery"):
-                sensors_battery = psutil.sensors_battery()
-                if sensors_battery is not None:
-                    sensors['battery'] = sensors_battery._asdict()
-                else:
-                    sensors['battery'] = {}
-            else:
-                sensors['battery'] = {}
-        except:
-            print_verbose_without_lock("Could not get battery sensor data!", True)
-            agent_log.error("Could not get battery sensor data!")
-            
-            if stacktrace:
-                traceback.print_exc()
-                
+    Parameters
+    ----------
+    root
+        Proc root (like /proc)
+
+    Returns
+    -------
+    namedtuple
+        svmem
+
+    """
+    mems = procfs_meminfo_values(procfs_read(root, 'meminfo'), (b'MemTotal:', b'MemFree:', b'MemAvailable:', b'Buffers:', b'Cached:', b'SReclaimable:', b'Shmem:', b'Active:', b'Inactive:', b'Slab:'))
+    if not mems.get(b'MemAvailable:'):
+        return psutil.virtual_memory()
+    
+    total = mems[b'MemTotal:'] * 1024
+    free = mems[b'MemFree:'] * 1024
+    buffers = mems.get(b'Buffers:', 0) * 1024
+    cached = (mems.get(b'Cached:', 0) + mems.get(b'SReclaimable:', 0)) * 1024
+    used = total - free - cached - buffers
+    if used < 0:
+        used = total - free    # container with distorted values
+    available = mems[b'MemAvailable:'] * 1024
+    if available > total:
+        available = free    # container with distorted values
+    percent = round(float(total - available) / total * 100, 1) if total else 0.0
+    return procfs_svmem(
+        total,
+        available,
+        percent,
+        used,
+        free,
+        mems.get(b'Active:', 0) * 1024,
+        mems.get(b'Inactive:', 0) * 1024,
+        buffers,
+        cached,
+        mems.get(b'Shmem:', 0) * 1024,
+        mems.get(b'Slab:', 0) * 1024
+    )
+
+
+def procfs_swap_memory(root):
+    """Function to get the swap memory stats from /proc/meminfo and /proc/vmstat
+    
+    Same fields and calculation as psutil.swap_memory().
+
+    Parameters
+    ----------
+    root
+        Proc root (like /proc)
+
+    Returns
+    -------
+    namedtuple
+        sswap
+
+    """
+    mems = procfs_meminfo_values(procfs_read(root, 'meminfo'), (b'SwapTotal:', b'SwapFree:'))
+    if b'SwapTotal:' not in mems or b'SwapFree:' not in mems:
+        return psutil.swap_memory()
+    vmstat = procfs_meminfo_values(procfs_read(root, 'vmstat'), (b'pswpin ', b'pswpout '))
     
-    if hasattr(psutil, "pids"):
-        pids = psutil.pids()
-    else:
-        pids = psutil.get_pid_list()
+    total = mems[b'SwapTotal:'] * 1024
+    free = mems[b'SwapFree:'] * 1024
+    used = total - free
+    percent = round(float(used) / total * 100, 1) if total else 0.0
+    # pswpin / pswpout are pages of 4 kB
+    return procfs_sswap(total, used, free, percent, vmstat.get(b'pswpin ', 0) * 4 * 1024, vmstat.get(b'pswpout ', 0) * 4 * 1024)
+
+
+def procfs_disk_io_counters(root):
+    """Function to get the io counters of each disk from /proc/diskstats
     
-    system_load_avg = []
-    try:
-        if hasattr(psutil, "getloadavg"):
-            system_load_avg = psutil.getloadavg()
-        elif hasattr(os, "getloadavg"):
-            system_load_avg = os.getloadavg()
-    except:
-        print_verbose_without_lock("Could not get average system load!", True)
-        agent_log.error("Could not get average system load!")
-        
-        if stacktrace:
-            traceback.print_exc()
-            
-            
-    users = []
+    Same fields as psutil.disk_io_counters(perdisk=True) (without nowrap, wrapped counters are handled by calculate_counter_rates()).
+
+    Parameters
+    ----------
+    root
+        Proc root (like /proc)
+
+    Returns
+    -------
+    dict
+        Disk name -> sdiskio
+
+    """
+    disks = {}
+    for line in procfs_read(root, 'diskstats').splitlines():
+        fields = line.split()
+        count = len(fields)
+        if count == 15:
+            # kernel 2.4
+            name = fields[3]
+            reads = int(fields[2])
+            reads_merged, read_sectors, read_time, writes, writes_merged, write_sectors, write_time, busy_time = int(fields[4]), int(fields[5]), int(fields[6]), int(fields[7]), int(fields[8]), int(fields[9]), int(fields[10]), int(fields[12])
+        elif count == 14 or count >= 18:
+            # kernel 2.6+
+            name = fields[2]
+            reads, reads_merged, read_sectors, read_time, writes, writes_merged, write_sectors, write_time, busy_time = int(fields[3]), int(fields[4]), int(fields[5]), int(fields[6]), int(fields[7]), int(fields[8]), int(fields[9]), int(fields[10]), int(fields[12])
+        elif count == 7:
+            # kernel 2.6 partitions
+            name = fields[2]
+            reads, read_sectors, writes, write_sectors = int(fields[3]), int(fields[4]), int(fields[5]), int(fields[6])
+            reads_merged = writes_merged = read_time = write_time = busy_time = 0
+        else:
+            continue
+        if isPython3:
+            name = name.decode('utf-8', 'replace')
+        # sectors are always 512 bytes in /proc/diskstats
+        disks[name] = procfs_sdiskio(reads, writes, read_sectors * 512, write_sectors * 512, read_time, write_time, reads_merged, writes_merged, busy_time)
+    return disks
+
+
+def procfs_net_io_counters(root):
+    """Function to get the io counters of each network interface from /proc/net/dev
+    
+    Same fields as psutil.net_io_counters(pernic=True) (without nowrap, wrapped counters are handled by calculate_counter_rates()).
+
+    Parameters
+    ----------
+    root
+        Proc root (like /proc)
+
+    Returns
+    -------
+    dict
+        Interface name -> snetio
+
+    """
+    interfaces = {}
+    for line in procfs_read(root, 'net/dev').splitlines()[2:]:
+        colon = line.rfind(b':')
+        if colon <= 0:
+            continue
+        name = line[:colon].strip()
+        if isPython3:
+            name = name.decode('utf-8', 'replace')
+        fields = line[colon + 1:].split()
+        # receive: bytes packets errs drop fifo frame compressed multicast, transmit: bytes packets errs drop ...
+        interfaces[name] = procfs_snetio(int(fields[8]), int(fields[0]), int(fields[9]), int(fields[1]), int(fields[2]), int(fields[10]), int(fields[3]), int(fields[11]))
+    return interfaces
+
+
+def get_disk_io_counters():
+    """Function to get the io counters of each disk (procfs reader or psutil)
+
+    Returns
+    -------
+    dict
+        Disk name -> io counters (namedtuple)
+
+    """
+    procfs_root = get_procfs_root()
+    if procfs_root is not None:
+        return procfs_disk_io_counters(procfs_root)
+    return psutil.disk_io_counters(perdisk=True)
+
+
+def get_net_io_counters():
+    """Function to get the io counters of each network interface (procfs reader or psutil)
+
+    Returns
+    -------
+    dict
+        Interface name -> io counters (namedtuple)
+
+    """
+    procfs_root = get_procfs_root()
+    if procfs_root is not None:
+        return procfs_net_io_counters(procfs_root)
+    return psutil.net_io_counters(pernic=True)
+
+
+def procfs_cpu_times(root):
+    """Function to get the times of each cpu from /proc/stat
+    
+    Only the cpu lines at the beginning of the file are parsed.
+
+    Parameters
+    ----------
+    root
+        Proc root (like /proc)
+
+    Returns
+    -------
+    list
+        Tuple of times (clock ticks) for each cpu, fields like cpu_times_fields
+
+    """
+    data = procfs_read(root, 'stat')
+    end = data.find(b'\nintr')
+    cpus = []
+    for line in (data[:end] if end != -1 else data).splitlines():
+        if line.startswith(b'cpu') and not line.startswith(b'cpu '):
+            cpus.append(tuple(int(value) for value in line.split()[1:]))
+    return cpus
+
+
+def get_cpu_times():
+    """Function to get one snapshot of the times of each cpu (procfs reader or psutil)
+    
+    The total cpu times are calculated from this snapshot (calculate_cpu_percentages()),
+    so all cpu values of a check are measured in the same time window.
+
+    Returns
+    -------
+    tuple
+        (field names, list with a tuple of times for each cpu)
+
+    """
+    procfs_root = get_procfs_root()
+    if procfs_root is not None:
+        cpus = procfs_cpu_times(procfs_root)
+        return cpu_times_fields[:len(cpus[0])], cpus
+    cpus = psutil.cpu_times(percpu=True)
+    return cpus[0]._fields, [tuple(cpu) for cpu in cpus]
+
+
+def calculate_cpu_times_percent(fields, previous, current):
+    """Function to calculate the used and detailed cpu time percentages between two cpu times samples
+    
+    Same calculation as psutil.cpu_percent() / psutil.cpu_times_percent():
+    guest and guest_nice are already part of user and nice, idle and iowait are not busy.
+
+    Parameters
+    ----------
+    fields
+        Names of the cpu times
+    previous
+        Previous cpu times (tuple)
+    current
+        Current cpu times (tuple)
+
+    Returns
+    -------
+    tuple
+        (used percent, dictionary field -> percent)
+
+    """
+    deltas = [max(0, curr - prev) for prev, curr in zip(previous, current)]
+    all_delta = 0
+    idle_delta = 0
+    for field, delta in zip(fields, deltas):
+        if field not in ('guest', 'guest_nice'):
+            all_delta += delta
+        if field in ('idle', 'iowait'):
+            idle_delta += delta
+    
+    if all_delta <= 0:
+        return 0.0, dict((field, 0.0) for field in fields)
+    
+    percent = min(100.0, max(0.0, round(100.0 * (all_delta - idle_delta) / all_delta, 1)))
+    detailed = dict((field, min(100.0, round(100.0 * delta / all_delta, 1))) for field, delta in zip(fields, deltas))
+    return percent, detailed
+
+
+def calculate_cpu_percentages(fields, previous, current):
+    """Function to calculate all cpu percentages of the default check from two cpu times snapshots
+    
+    The total times are the sums of the per cpu times, so the total and per cpu values are consistent.
+    Without a previous snapshot (or if the number of cpus changed) all values are 0.0.
+
+    Parameters
+    ----------
+    fields
+        Names of the cpu times
+    previous
+        Previous snapshot (list of tuples, like returned by get_cpu_times()) or None
+    current
+        Current snapshot
+
+    Returns
+    -------
+    tuple
+        (cpu_total_percentage, cpu_percentage, cpu_total_percentage_detailed, cpu_percentage_detailed)
+
+    """
+    if previous is None or len(previous) != len(current):
+        previous = current
+    
+    total_percent, total_detailed = calculate_cpu_times_percent(fields, [sum(times) for times in zip(*previous)], [sum(times) for times in zip(*current)])
+    cpu_percent = []
+    cpu_detailed = []
+    for prev, curr in zip(previous, current):
+        percent, detailed = calculate_cpu_times_percent(fields, prev, curr)
+        cpu_percent.append(percent)
+        cpu_detailed.append(detailed)
+    return total_percent, cpu_percent, total_detailed, cpu_detailed
+
+
+def schedule_job(name, function, args=(), interval=0, delay=0, inline=False):
+    """Function to add a job to the scheduler
+    
+    The scheduler runs a job once after delay seconds or, if an interval is given, periodically (first run after delay seconds).
+    Periodic jobs are drift-free: the next deadline is the previous deadline + interval (missed runs are skipped), not the end of the last run + interval.
+    A job never runs concurrently with itself; if it is still running on its next deadline, that run is skipped.
+    
+    Parameters
+    ----------
+    name
+        Name of the job (for logging)
+    function
+        Function to run
+    args
+        Arguments for the function
+    interval
+        Interval in seconds (0 = run only once)
+    delay
+        Time in seconds until the first run
+    inline
+        Run the function in the scheduler thread (only for short functions), otherwise in an own thread
+    
+    Returns
+    -------
+    dict
+        Job object (for cancel_job())
+
+    """
+    global scheduler_job_sequence
+    
+    job = {
+        'name': name,
+        'function': function,
+        'args': args,
+        'interval': interval,
+        'inline': inline,
+        'deadline': monotonic_time() + delay,
+        'cancelled': Event(),
+        'thread': None
+    }
+    with scheduler_condition:
+        scheduler_job_sequence += 1
+        heapq.heappush(scheduler_jobs, (job['deadline'], scheduler_job_sequence, job))
+        scheduler_condition.notify_all()
+    return job
+
+
+def cancel_job(job):
+    """Function to cancel a scheduled job
+    
+    A running job is not interrupted, but will not be started again.
+    
+    Parameters
+    ----------
+    job
+        Job object returned by schedule_job()
+
+    """
+    job['cancelled'].set()
+    with scheduler_condition:
+        scheduler_condition.notify_all()
+
+
+def run_job(job):
+    """Function to run the function of a scheduled job and log its errors
+    
+    Parameters
+    ----------
+    job
+        Job object
+
+    """
     try:
-        if hasattr(psutil, "users"):
-            users = [ user._asdict() for user in psutil.users() ]
+        job['function'](*job['args'])
     except:
-        print_verbose_without_lock("Could not get users, connected to the system!", True)
-        agent_log.error("Could not get users, connected to the system!")
+        print_verbose_without_lock('An error occured while running the scheduled job "%s"!' % (job['name']), True)
+        agent_log.error('An error occured while running the scheduled job "%s"!' % (job['name']))
         
         if stacktrace:
             traceback.print_exc()
-            
-        
 
-    #processes = [ psutil.Process(pid).as_dict() for pid in pids ]
-    processes = []
-    customchecks = {}
+
+def run_due_jobs(now, stop_event=None):
+    """Function to start all scheduled jobs with a deadline <= now
     
-    tmpProcessList = []
+    Periodic jobs are scheduled again (drift-free), cancelled jobs are removed.
     
-    if config['default']['processstats'] in (1, "1", "true", "True"):
-        for pid in pids:
-            try:
-                p = psutil.Process(pid)
-                try:
-                    if hasattr(p, "cpu_percent") and callable(p.cpu_percent):
-                        cpu_percent = p.cpu_percent(interval=None)
-                    else:
-                        cpu_percent = p.get_cpu_percent(interval=None)
-                        
-                    tmpProcessList.append(p)
-                except:
-                    print_verbose_without_lock("'%s' Process is not allowing us to get the CPU usage!" % (name if name != "" else str(pid)), True)
-                    #agent_log.error("'%s' Process is not allowing us to get the CPU usage!" % (name if name != "" else str(pid)))
-                    
-                    if stacktrace:
-                        traceback.print_exc()
-                        
-            
-            except psutil.NoSuchProcess:
-                continue
-            except:
-                print_verbose_without_lock("An error occured during process check!", True)
-                agent_log.error("An error occured during process check!")
-                
-                if stacktrace:
-                    traceback.print_exc()
-                    
+    Parameters
+    ----------
+    now
+        Current time of the monotonic clock (monotonic_time())
+    stop_event
+        Stop event of the scheduler thread, the remaining due jobs are not started once it is set (e.g. after a long inline job)
     
-    for p in tmpProcessList:
-        try:
-            
-            pid = p.pid
-            ppid = None
-            status = ""
-            username = ""
-            nice = None
-            name = ""
-            exe = ""
-            cmdline = ""
-            cpu_percent = None
-            memory_info = {}
-            memory_percent = None
-            num_fds = {}
-            io_counters = {}
-            open_files = ""
-            children = []
-            
-            
-            if pid not in (1, 2):
-                try:
-                    if callable(p.parent):
-                        ppid = p.parent().pid
-                except (psutil.NoSuchProcess, ProcessLookupError):
-                    continue
-                except AttributeError:
-                    print_verbose_without_lock("'%s' Process is not allowing us to get the parent process id!" % (str(pid)), True)
-                    #agent_log.error("'%s' Process is not allowing us to get the parent process id!" % (str(pid)))
-                    
-                    if stacktrace:
-                        traceback.print_exc()
-                        
-                
-                if config['default']['processstats-including-child-ids'] in (1, "1", "true", "True"):
-                    try:
-                        if callable(p.children):
-                            with suppress_stdout_stderr():
-                                for child in p.children(recursive=True):
-                                    children.append(child.pid)
-                    except:
-                        print_verbose_without_lock("'%s' Process is not allowing us to get the child process ids!" % (str(pid)), True)
-                        #agent_log.error("'%s' Process is not allowing us to get the child process ids!" % (str(pid)))
-                        
-                        if stacktrace:
-                            traceback.print_exc()
-                            
-            
-            
-            try:
-                nice = p.nice()
-            except (psutil.NoSuchProcess, ProcessLookupError):
+    Returns
+    -------
+    list
+        Started jobs
+
+    """
+    global scheduler_job_sequence
+    
+    due_jobs = []
+    with scheduler_condition:
+        while scheduler_jobs and scheduler_jobs[0][0] <= now:
+            deadline, sequence, job = heapq.heappop(scheduler_jobs)
+            if job['cancelled'].is_set():
                 continue
-            except:
-                print_verbose_without_lock("'%s' Process is not allowing us to get the nice option!" % (name if name != "" else str(pid)), True)
-                #agent_log.error("'%s' Process is not allowing us to get the nice option!" % (name if name != "" else str(pid)))
-                
-                if stacktrace:
-                    traceback.print_exc()
-                    
+            due_jobs.append(job)
+            if job['interval'] > 0:
+                # skip missed runs but stay in phase
+                job['deadline'] = deadline + (int((now - deadline) / job['interval']) + 1) * job['interval']
+                scheduler_job_sequence += 1
+                heapq.heappush(scheduler_jobs, (job['deadline'], scheduler_job_sequence, job))
+    
+    started = []
+    for job in due_jobs:
+        if stop_event is not None and stop_event.is_set():
+            break
+        if job['cancelled'].is_set():
+            continue    # cancelled while an earlier inline job was running
+        if job['thread'] is not None and job['thread'].is_alive():
+            print_verbose_without_lock('Scheduled job "%s" is still running, skip this run' % (job['name']), False)
+            agent_log.warning('Scheduled job "%s" is still running, skip this run' % (job['name']))
+            continue
+        if job['inline']:
+            run_job(job)
+        else:
+            job['thread'] = Thread(target=run_job, args=(job,))
+            job['thread'].daemon = True
+            job['thread'].start()
+        started.append(job)
+    return started
+
+
+def run_scheduler(stop_event):
+    """Function that starts as a thread to run the scheduled jobs
+    
+    Sleeps until the deadline of the next job, a new job or the stop request.
+    
+    Parameters
+    ----------
+    stop_event
+        Stop event of this scheduler thread (scheduler_stop_event when it was started), a scheduler thread that did not stop
+        in time (see stop_scheduler()) keeps its own set event, so it does not run beside the next scheduler thread
+
+    """
+    while not stop_event.is_set():
+        run_due_jobs(monotonic_time(), stop_event)
+        with scheduler_condition:
+            if stop_event.is_set():
+                break
+            if scheduler_jobs:
+                timeout = scheduler_jobs[0][0] - monotonic_time()
+                if timeout > 0:
+                    scheduler_condition.wait(timeout)
+            else:
+                scheduler_condition.wait()
+    
+    print_verbose('Stopped scheduler thread', False)
+    agent_log.info('Stopped scheduler thread')
+
+
+def start_scheduler():
+    """Function to start the scheduler thread"""
+    global scheduler_thread
+    global scheduler_stop_event
+    
+    scheduler_stop_event = Event()
+    scheduler_thread = Thread(target=run_scheduler, args=(scheduler_stop_event,))
+    scheduler_thread.daemon = True
+    scheduler_thread.start()
+
+
+def stop_scheduler():
+    """Function to stop the scheduler thread and wait for all running jobs
+    
+    Removes all scheduled jobs.
+    Waits at most max_scheduler_stop_wait seconds in total, jobs that are still running afterwards (e.g. a hanging command) are logged and left behind.
+
+    """
+    global scheduler_thread
+    
+    with scheduler_condition:
+        scheduler_stop_event.set()
+        jobs = [job for deadline, sequence, job in scheduler_jobs]
+        del scheduler_jobs[:]
+        scheduler_condition.notify_all()
+    
+    deadline = monotonic_time() + max_scheduler_stop_wait
+    if scheduler_thread is not None:
+        scheduler_thread.join(max(0, deadline - monotonic_time()))
+        if scheduler_thread.is_alive():
+            print_verbose_without_lock('Scheduler thread did not stop within %s seconds (a job is still running)' % (str(max_scheduler_stop_wait)), False)
+            agent_log.warning('Scheduler thread did not stop within %s seconds (a job is still running)' % (str(max_scheduler_stop_wait)))
+        scheduler_thread = None
+    for job in jobs:
+        job['cancelled'].set()
+        if job['thread'] is not None:
+            job['thread'].join(max(0, deadline - monotonic_time()))
+            if job['thread'].is_alive():
+                print_verbose_without_lock('Scheduled job "%s" is still running, it is not waited for' % (job['name']), False)
+                agent_log.warning('Scheduled job "%s" is still running, it is not waited for' % (job['name']))
+
+
+def publish_check_data():
+    """Function to publish the current check results
+    
+    Serializes cached_check_data exactly once into an immutable bytes object and tags it with a new version number.
+    The webserver and the push mode use this snapshot instead of serializing cached_check_data on each request.
+    
+    Returns
+    -------
+    dict
+        Snapshot containing 'version', 'body' (json as bytes), 'etag', 'last_modified' (timestamp) and 'last_modified_unique'
+        (False if another snapshot was published in the same second, the Last-Modified header can not tell them apart),
+        filtered variants are built from the body, so they contain exactly the published check results
+
+    """
+    global check_data_snapshot
+    
+    with check_data_snapshot_lock:
+        published = time.time()
+        version = 1
+        last_modified_unique = True
+        if check_data_snapshot is not None:
+            version = check_data_snapshot['version'] + 1
+            last_modified_unique = int(check_data_snapshot['last_modified']) < int(published)
         
+        check_data_snapshot = {
+            'version': version,
+            'body': json.dumps(cached_check_data).encode(),
+            'etag': '"%x-%d"' % (int(published * 1000), version),
+            'last_modified': published,
+            'last_modified_unique': last_modified_unique,
+            'encoded': {},
+            'encoding_lock': Lock(),
+            'variants': {},
+            'variants_lock': Lock()
+        }
+        return check_data_snapshot
+
+
+def get_check_data_snapshot():
+    """Function to get the latest published check results snapshot
+    
+    Publishes the current check results if nothing was published yet.
+    
+    Returns
+    -------
+    dict
+        Snapshot created by publish_check_data()
+
+    """
+    snapshot = check_data_snapshot
+    if snapshot is None:
+        snapshot = publish_check_data()
+    return snapshot
+
+
+def parse_process_filter(query):
+    """Function to parse the process filter query parameters of a GET / request
+    
+    Supported parameters:
+    
+    - processes.top (Return only the top N processes, ordered by processes.sort)
+    - processes.sort (Numeric process field to order by, default: cpu_percent)
+    - processes.name (Comma separated process names, that will always be returned)
+    - processes.fields (Comma separated process fields to return)
+    
+    Parameters
+    ----------
+    query
+        Query string of the request
+
+    Returns
+    -------
+    tuple
+        Normalized filter (usable as cache key) or None if no process filter is requested
+
+    Raises
+    ------
+    ValueError
+        If a parameter has an invalid value
+
+    """
+    params = parse_qs(query)
+    
+    top = None
+    sort = None
+    names = ()
+    fields = ()
+    
+    if 'processes.top' in params:
+        top = int(params['processes.top'][-1])
+        if top < 0:
+            raise ValueError('processes.top must not be negative')
+    if 'processes.sort' in params:
+        sort = params['processes.sort'][-1].strip()
+    if 'processes.name' in params:
+        names = tuple(sorted(set(name.strip() for value in params['processes.name'] for name in value.split(',') if name.strip())))
+    if 'processes.fields' in params:
+        fields = tuple(field.strip() for field in params['processes.fields'][-1].split(',') if field.strip())
+    
+    if top is None and sort is None and not names and not fields:
+        return None
+    if (top is not None or names) and sort is None:
+        sort = 'cpu_percent'
+    return (top, sort, names, fields)
+
+
+def filter_processes(processes, process_filter):
+    """Function to apply a process filter to a list of processes
+    
+    The top N processes are selected using a heap (heapq.nlargest) instead of sorting the whole list.
+    Processes listed in processes.name are appended if they are not part of the top N.
+    
+    Parameters
+    ----------
+    processes
+        List of process dicts created by run_default_checks()
+    process_filter
+        Filter created by parse_process_filter()
+
+    Returns
+    -------
+    list
+        Filtered (and projected) process dicts
+
+    """
+    top, sort, names, fields = process_filter
+    
+    def sort_key(process):
+        value = process.get(sort)
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return float('-inf')
+        return value
+    
+    if top is not None:
+        selected = heapq.nlargest(top, processes, key=sort_key)
+    elif names:
+        selected = []
+    elif sort is not None:
+        selected = sorted(processes, key=sort_key, reverse=True)
+    else:
+        selected = processes
+    
+    if names:
+        selected_pids = set(process['pid'] for process in selected)
+        for process in processes:
+            if process['name'] in names and process['pid'] not in selected_pids:
+                selected.append(process)
+    
+    if fields:
+        selected = [ { field: process[field] for field in fields if field in process } for process in selected ]
+    return selected
+
+
+def get_check_data_variant(snapshot, process_filter):
+    """Function to get a filtered variant of a check data snapshot
+    
+    Each variant is built and serialized only once per snapshot version.
+    At most max_check_data_variants variants are cached per snapshot, further variants are built on each request.
+    
+    Parameters
+    ----------
+    snapshot
+        Snapshot created by publish_check_data()
+    process_filter
+        Filter created by parse_process_filter() or None
+
+    Returns
+    -------
+    dict
+        Variant containing 'body', 'etag', 'last_modified' and the compression cache (like a snapshot)
+
+    """
+    if process_filter is None:
+        return snapshot
+    
+    variant = snapshot['variants'].get(process_filter)
+    if variant is not None:
+        return variant
+    
+    with snapshot['variants_lock']:
+        variant = snapshot['variants'].get(process_filter)
+        if variant is None:
+            # decoded from the published body (not cached_check_data, whose nested results change after publishing)
+            data = json.loads(snapshot['body'].decode('utf-8'))
+            if 'processes' in data:
+                data['processes'] = filter_processes(data['processes'], process_filter)
+            
+            variant = {
+                'body': json.dumps(data).encode(),
+                'etag': '%s-%s"' % (snapshot['etag'][:-1], '%08x' % (zlib.crc32(repr(process_filter).encode()) & 0xffffffff)),
+                'last_modified': snapshot['last_modified'],
+                'last_modified_unique': snapshot['last_modified_unique'],
+                'encoded': {},
+                'encoding_lock': Lock()
+            }
+            if len(snapshot['variants']) < max_check_data_variants:
+                snapshot['variants'][process_filter] = variant
+    return variant
+
+
+def get_supported_content_encodings():
+    """Function to get the supported response content encodings
+    
+    gzip is always available, zstd and br only if the python modules zstandard and brotli are installed.
+    
+    Returns
+    -------
+    list
+        Supported content encodings, ordered by server preference
+
+    """
+    encodings = []
+    if zstd_import_successfull:
+        encodings.append('zstd')
+    if brotli_import_successfull:
+        encodings.append('br')
+    encodings.append('gzip')
+    return encodings
+
+
+def compress_data(data, encoding):
+    """Function to compress data with a given content encoding
+    
+    Parameters
+    ----------
+    data
+        Bytes to compress
+    encoding
+        Content encoding (gzip, zstd or br)
+
+    Returns
+    -------
+    bytes
+        Compressed data
+
+    """
+    if encoding == 'zstd':
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    if encoding == 'br':
+        return brotli.compress(data, quality=5)
+    
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)    # wbits + 16: gzip header and trailer
+    return compressor.compress(data) + compressor.flush()
+
+
+def get_encoded_check_data(snapshot, encoding):
+    """Function to get the check data snapshot body in a given content encoding
+    
+    Each encoding is compressed only once per snapshot version (and variant).
+    Concurrent requests for the same encoding wait for the first one instead of compressing the data again.
+    
+    Parameters
+    ----------
+    snapshot
+        Snapshot created by publish_check_data() or variant created by get_check_data_variant()
+    encoding
+        Content encoding (gzip, zstd or br)
+
+    Returns
+    -------
+    bytes
+        Compressed snapshot body
+
+    """
+    encoded = snapshot['encoded'].get(encoding)
+    if encoded is None:
+        with snapshot['encoding_lock']:
+            encoded = snapshot['encoded'].get(encoding)
+            if encoded is None:
+                encoded = compress_data(snapshot['body'], encoding)
+                snapshot['encoded'][encoding] = encoded
+    return encoded
+
+
+def build_autossl_defaults():
+    """ Function to define the system depending certificate file paths
+
+        Certificate file default paths:
+
+        - Windows:        C:\Program Files\openitcockpit-agent\agent.crt
+        - Linux:          /etc/openitcockpit-agent/agent.crt
+        - macOS:          /etc/openitcockpit-agent/agent.crt
+
+        Config file default paths:
+
+        - Windows:        C:\Program Files\openitcockpit-agent\config.cnf
+        - Linux:          /etc/openitcockpit-agent/config.cnf
+        - macOS:          /Library/openitcockpit-agent/config.cnf
+
+    """
+    etc_agent_path = '/etc/openitcockpit-agent/'
+    if system == 'windows':
+        etc_agent_path = 'C:'+os.path.sep+'Program Files'+os.path.sep+'it-novum'+os.path.sep+'openitcockpit-agent'+os.path.sep
+    
+    if config['default']['autossl-folder'] != "":
+        etc_agent_path = config['default']['autossl-folder'] + os.path.sep
+    
+    config['default']['autossl-csr-file'] = etc_agent_path + 'agent.csr'
+    config['default']['autossl-crt-file'] = etc_agent_path + 'agent.crt'
+    config['default']['autossl-key-file'] = etc_agent_path + 'agent.key'
+    config['default']['autossl-ca-file'] = etc_agent_path + 'server_ca.crt'
+
+
+@contextmanager
+
+def process_oneshot(p):
+    """A context manager that caches the process information of p while collecting its attributes
+    
+    Uses psutil.Process.oneshot() (if available), so /proc/<pid>/stat and /proc/<pid>/status
+    are read once instead of once per attribute.
+    
+    """
+    if hasattr(p, "oneshot"):
+        with p.oneshot():
+            yield
+    else:
+        yield
+
+
+def update_process_table(pids):
+    """Function to update the process table used by the default process check
+    
+    The process table keeps the psutil.Process objects keyed by (pid, create_time) across check cycles.
+    Known processes reuse their object (and so their last cpu_percent sample), only new pids get a new object.
+    Exited processes are dropped, reused pids (other create_time) get a new object.
+    Processes that do not allow to read their create time are keyed by (pid, None).
+    
+    Parameters
+    ----------
+    pids
+        List of the current process ids
+
+    Returns
+    -------
+    list
+        psutil.Process objects of the running processes
+
+    """
+    global process_table
+    global process_attribute_cache
+    
+    known_keys = {}
+    for key in process_table:
+        known_keys[key[0]] = key
+    
+    new_process_table = {}
+    for pid in pids:
+        try:
+            key = known_keys.get(pid)
+            if key is not None:
+                p = process_table[key]
+                # is_running() compares the create time, so a reused pid is not taken for the known process
+                if key[1] is None or p.is_running():
+                    new_process_table[key] = p
+                    continue
+            
+            p = psutil.Process(pid)
             try:
-                name = p.name()
-            except (psutil.NoSuchProcess, ProcessLookupError):
-                continue
-            except:
-                print_verbose_without_lock("'%s' Process is not allowing us to get the name option!" % (name if name != "" else str(pid)), True)
-                #agent_log.error("'%s' Process is not allowing us to get the name option!" % (name if name != "" else str(pid)))
+                key = (pid, p.create_time())
+            except psutil.AccessDenied:
+                print_verbose_without_lock("'%s' Process is not allowing us to get the create time!" % (str(pid)), True)
                 
                 if stacktrace:
                     traceback.print_exc()
-                    
+                key = (pid, None)
+            new_process_table[key] = p
+        except psutil.NoSuchProcess:
+            continue
+        except:
+            print_verbose_without_lock("An error occured during process check!", True)
+            agent_log.error("An error occured during process check!")
+            
+            if stacktrace:
+                traceback.print_exc()
+                
+    
+    process_table = new_process_table
+    process_attribute_cache = { key: attributes for key,attributes in process_attribute_cache.items() if key in process_table }
+    return list(process_table.values())
+
+
+def get_process_stable_attributes_interval():
+    """Function to get the refresh interval of the stable process attributes
+    
+    Stable process attributes (exec, cmdline, num_fds, open_files) rarely change, but are expensive to collect.
+    If the governor throttles the agent, they are refreshed at most every 2^level process checks.
+    
+    Returns
+    -------
+    int
+        Interval in seconds (0 = refresh on each check)
+
+    """
+    try:
+        interval = max(0, int(config['default'].get('processstats-stable-attributes-interval', 0) or 0))
+    except ValueError:
+        interval = 0
+    if governor_state['level'] > 0:
+        interval = max(interval, get_default_check_section_interval('processstats') * 2 ** governor_state['level'])
+    return interval
+
+
+def process_attribute_is_fresh(attributes, field, now, max_age):
+    """Function to check whether a cached process attribute can be reused
+    
+    Parameters
+    ----------
+    attributes
+        Cached attributes of a process (from process_attribute_cache) or None if the tiered mode is disabled
+    field
+        Attribute name
+    now
+        Timestamp of the current check
+    max_age
+        Maximum age in seconds of a reusable value (processstats-stable-attributes-interval)
+
+    Returns
+    -------
+    bool
+        True if the cached value is younger than max_age, False otherwise.
+
+    """
+    if attributes is None or field not in attributes:
+        return False
+    return now - attributes[field]['timestamp'] < max_age
+
+
+def cache_process_attribute(attributes, field, value, now):
+    """Function to cache a freshly collected process attribute
+    
+    Only successful reads are cached, a failed read (e.g. AccessDenied) is retried on the next check.
+    
+    Parameters
+    ----------
+    attributes
+        Cached attributes of a process (from process_attribute_cache) or None if the tiered mode is disabled
+    field
+        Attribute name
+    value
+        Collected value
+    now
+        Timestamp of the current check
+
+    """
+    if attributes is not None:
+        attributes[field] = {
+            'value': value,
+            'timestamp': now
+        }
+
+
+def get_process_attributes_age(attributes, now):
+    """Function to get the age of the stable process attributes
+    
+    Parameters
+    ----------
+    attributes
+        Cached attributes of a process (from process_attribute_cache)
+    now
+        Timestamp of the current check
+
+    Returns
+    -------
+    dict
+        Age in seconds of each stable attribute (0 = collected in this check)
+
+    """
+    return { field: round(now - attributes[field]['timestamp']) for field in process_stable_attributes if field in attributes }
+
+
+def add_process_children_ids(processes):
+    """Function to add the (recursive) child process ids to the collected processes
+    
+    Builds a ppid -> children index once from the collected processes
+    and fills the 'children' list of each process with all its descendants.
+    Each subtree is only walked once, descendant lists of children are reused for their parents.
+    
+    Processes with id 1 or 2 are skipped (like in the parent process id check).
+
+    Parameters
+    ----------
+    processes
+        List of process dicts (containing 'pid', 'ppid' and 'children') created by run_default_checks()
+
+    """
+    children_index = {}
+    for process in processes:
+        if process['ppid'] is not None and process['ppid'] != process['pid']:
+            children_index.setdefault(process['ppid'], []).append(process['pid'])
+    
+    descendants = {}
+    for process in processes:
+        pid = process['pid']
+        if pid in (1, 2):
+            continue
+        
+        # iterative post-order walk, to not hit the recursion limit on deep process trees
+        stack = [(pid, False)]
+        while stack:
+            current, children_done = stack.pop()
+            if children_done:
+                current_descendants = []
+                for child in children_index.get(current, []):
+                    current_descendants.append(child)
+                    current_descendants.extend(descendants.get(child, []))
+                descendants[current] = current_descendants
+            elif current not in descendants:
+                descendants[current] = []    # guards against ppid loops
+                stack.append((current, True))
+                for child in children_index.get(current, []):
+                    if child not in descendants:
+                        stack.append((child, False))
+        
+        process['children'] = descendants[pid]
+
+
+def get_process_data(p, memory_total, now, stable_attributes_interval):
+    """Function to collect the information of a single process
+    
+    Parameters
+    ----------
+    p
+        psutil.Process object (from the process table)
+    memory_total
+        Total physical memory in bytes (used to calculate the memory_percent)
+    now
+        Timestamp of the current check
+    stable_attributes_interval
+        Refresh interval in seconds of the stable process attributes (see get_process_stable_attributes_interval())
+
+    Returns
+    -------
+    dict
+        Process information or None if the process does no longer exist
+
+    """
+    pid = p.pid
+    ppid = None
+    status = ""
+    username = ""
+    nice = None
+    name = ""
+    exe = ""
+    cmdline = ""
+    cpu_percent = None
+    memory_info = {}
+    memory_percent = None
+    num_fds = {}
+    io_counters = {}
+    open_files = ""
+    children = []
+    cached_attributes = None
+    
+    if stable_attributes_interval > 0:
+        try:
+            cached_attributes = process_attribute_cache.setdefault((pid, p.create_time()), {})
+        except (psutil.NoSuchProcess, ProcessLookupError):
+            return None
+        except psutil.AccessDenied:
+            pass    # no reliable cache key (see update_process_table()), the attributes are collected on each check
+    
+    
+    with process_oneshot(p):
+        if pid not in (1, 2):
             try:
-                username = p.username()
+                if callable(p.ppid):
+                    ppid = p.ppid()
             except (psutil.NoSuchProcess, ProcessLookupError):
-                continue
-            except:
-                print_verbose_without_lock("'%s' Process is not allowing us to get the username option!" % (name if name != "" else str(pid)), True)
-                #agent_log.error("'%s' Process is not allowing us to get the username option!" % (name if name != "" else str(pid)))
+                return None
+            except AttributeError:
+                print_verbose_without_lock("'%s' Process is not allowing us to get the parent process id!" % (str(pid)), True)
+                #agent_log.error("'%s' Process is not allowing us to get the parent process id!" % (str(pid)))
                 
                 if stacktrace:
                     traceback.print_exc()
+                    
         
+        
+        try:
+            nice = p.nice()
+        except (psutil.NoSuchProcess, ProcessLookupError):
+            return None
+        except:
+            print_verbose_without_lock("'%s' Process is not allowing us to get the nice option!" % (name if name != "" else str(pid)), True)
+            #agent_log.error("'%s' Process is not allowing us to get the nice option!" % (name if name != "" else str(pid)))
+            
+            if stacktrace:
+                traceback.print_exc()
+                
+    
+        try:
+            name = p.name()
+        except (psutil.NoSuchProcess, ProcessLookupError):
+            return None
+        except:
+            print_verbose_without_lock("'%s' Process is not allowing us to get the name option!" % (name if name != "" else str(pid)), True)
+            #agent_log.error("'%s' Process is not allowing us to get the name option!" % (name if name != "" else str(pid)))
+            
+            if stacktrace:
+                traceback.print_exc()
+                
+        try:
+            username = p.username()
+        except (psutil.NoSuchProcess, ProcessLookupError):
+            return None
+        except:
+            print_verbose_without_lock("'%s' Process is not allowing us to get the username option!" % (name if name != "" else str(pid)), True)
+            #agent_log.error("'%s' Process is not allowing us to get the username option!" % (name if name != "" else str(pid)))
+            
+            if stacktrace:
+                traceback.print_exc()
+    
+        if process_attribute_is_fresh(cached_attributes, 'exec', now, stable_attributes_interval):
+            exe = cached_attributes['exec']['value']
+        else:
             try:
                 exe = p.exe()
+                cache_process_attribute(cached_attributes, 'exec', exe, now)
             except (psutil.NoSuchProcess, ProcessLookupError):
-                continue
+                return None
             except:
                 print_verbose_without_lock("'%s' Process is not allowing us to get the exec option!" % (name if name != "" else str(pid)), True)
                 #agent_log.error("'%s' Process is not allowing us to get the exec option!" % (name if name != "" else str(pid)))
                 
                 if stacktrace:
                     traceback.print_exc()
-                    
-            
+                
+        
+        if process_attribute_is_fresh(cached_attributes, 'cmdline', now, stable_attributes_interval):
+            cmdline = cached_attributes['cmdline']['value']
+        else:
             try:
                 cmdline = p.cmdline()
+                cache_process_attribute(cached_attributes, 'cmdline', cmdline, now)
             except (psutil.NoSuchProcess, ProcessLookupError):
-                continue
+                return None
             except:
                 print_verbose_without_lock("'%s' Process is not allowing us to get the cmdline option!" % (name if name != "" else str(pid)), True)
                 #agent_log.error("'%s' Process is not allowing us to get the cmdline option!" % (name if name != "" else str(pid)))
                 
                 if stacktrace:
                     traceback.print_exc()
-                    
                 
-            try:
-                cpu_percent = p.cpu_percent(interval=None)
-            except (psutil.NoSuchProcess, ProcessLookupError):
-                continue
-            except:
-                print_verbose_without_lock("'%s' Process is not allowing us to get the CPU usage!" % (name if name != "" else str(pid)), True)
-                #agent_log.error("'%s' Process is not allowing us to get the CPU usage!" % (name if name != "" else str(pid)))
-                
-                if stacktrace:
-                    traceback.print_exc()
-                    
-                
-            try:
-                memory_info = p.memory_info()._asdict()
-            except (psutil.NoSuchProcess, ProcessLookupError):
-                continue
-            except:
-                print_verbose_without_lock("'%s' Process is not allowing us to get memory usage information!" % (name if name != "" else str(pid)), True)
-                #agent_log.error("'%s' Process is not allowing us to get memory usage information!" % (name if name != "" else str(pid)))
+            
+        try:
+            cpu_percent = p.cpu_percent(interval=None)
+        except (psutil.NoSuchProcess, ProcessLookupError):
+            return None
+        except:
+            print_verbose_without_lock("'%s' Process is not allowing us to get the CPU usage!" % (name if name != "" else str(pid)), True)
+            #agent_log.error("'%s' Process is not allowing us to get the CPU usage!" % (name if name != "" else str(pid)))
+            
+            if stacktrace:
+                traceback.print_exc()
                 
-                if stacktrace:
-                    traceback.print_exc()
-                    
+            
+        try:
+            memory_info = p.memory_info()._asdict()
+        except (psutil.NoSuchProcess, ProcessLookupError):
+            return None
+        except:
+            print_verbose_without_lock("'%s' Process is not allowing us to get memory usage information!" % (name if name != "" else str(pid)), True)
+            #agent_log.error("'%s' Process is not allowing us to get memory usage information!" % (name if name != "" else str(pid)))
+            
+            if stacktrace:
+                traceback.print_exc()
                 
-            try:
+            
+        try:
+            if 'rss' in memory_info and memory_total:
+                memory_percent = float(memory_info['rss']) / memory_total * 100
+            else:
                 memory_percent = p.memory_percent()
-            except (psutil.NoSuchProcess, ProcessLookupError):
-                continue
-            except:
-                print_verbose_without_lock("'%s' Process is not allowing us to get the percent of memory usage!" % (name if name != "" else str(pid)), True)
-                #agent_log.error("'%s' Process is not allowing us to get the percent of memory usage!" % (name if name != "" else str(pid)))
-                
-                if stacktrace:
-                    traceback.print_exc()
-                    
+        except (psutil.NoSuchProcess, ProcessLookupError):
+            return None
+        except:
+            print_verbose_without_lock("'%s' Process is not allowing us to get the percent of memory usage!" % (name if name != "" else str(pid)), True)
+            #agent_log.error("'%s' Process is not allowing us to get the percent of memory usage!" % (name if name != "" else str(pid)))
+            
+            if stacktrace:
+                traceback.print_exc()
                 
+            
+        if process_attribute_is_fresh(cached_attributes, 'num_fds', now, stable_attributes_interval):
+            num_fds = cached_attributes['num_fds']['value']
+        else:
             try:
                 num_fds = p.num_fds()
+                cache_process_attribute(cached_attributes, 'num_fds', num_fds, now)
             except (psutil.NoSuchProcess, ProcessLookupError):
-                continue
+                return None
             except:
                 print_verbose_without_lock("'%s' Process is not allowing us to get the num_fds option!" % (name if name != "" else str(pid)), True)
                 #agent_log.error("'%s' Process is not allowing us to get the num_fds option!" % (name if name != "" else str(pid)))
                 
                 if stacktrace:
                     traceback.print_exc()
-                    
-            
-            try:
-                io_counters = p.io_counters.__dict__
-            except (psutil.NoSuchProcess, ProcessLookupError):
-                continue
-            except:
-                print_verbose_without_lock("'%s' Process is not allowing us to get the IO counters!" % (name if name != "" else str(pid)), True)
-                #agent_log.error("'%s' Process is not allowing us to get the IO counters!" % (name if name != "" else str(pid)))
                 
-                if stacktrace:
-                    traceback.print_exc()
-                    
+        
+        try:
+            io_counters = p.io_counters.__dict__
+        except (psutil.NoSuchProcess, ProcessLookupError):
+            return None
+        except:
+            print_verbose_without_lock("'%s' Process is not allowing us to get the IO counters!" % (name if name != "" else str(pid)), True)
+            #agent_log.error("'%s' Process is not allowing us to get the IO counters!" % (name if name != "" else str(pid)))
             
+            if stacktrace:
+                traceback.print_exc()
+                
+        
+        if process_attribute_is_fresh(cached_attributes, 'open_files', now, stable_attributes_interval):
+            open_files = cached_attributes['open_files']['value']
+        else:
             try:
                 open_files = p.open_files()
+                cache_process_attribute(cached_attributes, 'open_files', open_files, now)
             except (psutil.NoSuchProcess, ProcessLookupError):
-                continue
+                return None
             except psutil.AccessDenied:
                 print_verbose_without_lock("'%s' Process is not allowing us to get the open_files option!" % (name if name != "" else str(pid)), True)
                 #agent_log.error("'%s' Process is not allowing us to get the open_files option!" % (name if name != "" else str(pid)))
@@ -951,28 +2306,71 @@ def run_default_checks():
                 if stacktrace:
                     traceback.print_exc()
 
-            name = name[:1000]
-            exe = exe[:1000]
-            cmdline = cmdline[:1000]
-                
-            process = {
-                'name': name,
-                'exec': exe,
-                'cmdline': cmdline,
-                'pid': pid,
-                'ppid': ppid,
-                'children': children,
-                'status': status,
-                'username': username,
-                'cpu_percent': cpu_percent,
-                'memory': memory_info,
-                'memory_percent': memory_percent,
-                'num_fds': num_fds,
-                'open_files': open_files,
-                'io_counters': io_counters,
-                'nice_level': nice
-            }
-            processes.append(process)
+        try:
+            status = p.status()
+        except (psutil.NoSuchProcess, ProcessLookupError):
+            return None
+        except:
+            print_verbose_without_lock("'%s' Process is not allowing us to get the status option!" % (name if name != "" else str(pid)), True)
+            
+            if stacktrace:
+                traceback.print_exc()
+        
+        name = name[:1000]
+        exe = exe[:1000]
+        cmdline = cmdline[:1000]
+            
+        process = {
+            'name': name,
+            'exec': exe,
+            'cmdline': cmdline,
+            'pid': pid,
+            'ppid': ppid,
+            'children': children,
+            'status': status,
+            'username': username,
+            'cpu_percent': cpu_percent,
+            'memory': memory_info,
+            'memory_percent': memory_percent,
+            'num_fds': num_fds,
+            'open_files': open_files,
+            'io_counters': io_counters,
+            'nice_level': nice
+        }
+        if cached_attributes is not None:
+            process['attributes_age'] = get_process_attributes_age(cached_attributes, now)
+    
+    return process
+
+
+def collect_processes(pids, memory_total, now, stable_attributes_interval):
+    """Function to collect the information of the given processes
+    
+    Updates the process table and calls get_process_data() for each process.
+    
+    Parameters
+    ----------
+    pids
+        List of process ids
+    memory_total
+        Total physical memory in bytes
+    now
+        Timestamp of the current check
+    stable_attributes_interval
+        Refresh interval in seconds of the stable process attributes
+
+    Returns
+    -------
+    list
+        Process dicts
+
+    """
+    processes = []
+    for p in update_process_table(pids):
+        try:
+            process = get_process_data(p, memory_total, now, stable_attributes_interval)
+            if process is not None:
+                processes.append(process)
         except psutil.NoSuchProcess:
             continue
         except:
@@ -982,313 +2380,1329 @@ def run_default_checks():
             if stacktrace:
                 traceback.print_exc()
                 
+    return processes
 
-    windows_services = []
-    windows_eventlog = {}
-    if system == 'windows':
-        if config['default']['winservices'] in (1, "1", "true", "True"):
-            try:
-                for win_process in psutil.win_service_iter():
-                    windows_services.append(win_process.as_dict())
-            except:
-                print_verbose_without_lock("An error occured during windows services check!", True)
-                agent_log.error("An error occured during windows services check!")
-                
-                if stacktrace:
-                    traceback.print_exc()
-                    
-        if config['default']['wineventlog'] in (1, "1", "true", "True"):
-            try:
-                server = 'localhost'    # name of the target computer to get event logs
-                logTypes = []
-                if config['default']['wineventlog-logtypes'] != "":
-                    for logtype in config['default']['wineventlog-logtypes'].split(','):
-                        if logtype.strip() != '':
-                            logTypes.append(logtype.strip())
-                else:
-                    logTypes = ['System', 'Application', 'Security', 'openITCOCKPIT Agent']
-
-                evt_dict={
-                    win32con.EVENTLOG_AUDIT_FAILURE:'EVENTLOG_AUDIT_FAILURE',           # 16 -> critical
-                    win32con.EVENTLOG_AUDIT_SUCCESS:'EVENTLOG_AUDIT_SUCCESS',           # 8  -> ok
-                    win32con.EVENTLOG_INFORMATION_TYPE:'EVENTLOG_INFORMATION_TYPE',     # 4  -> ok
-                    win32con.EVENTLOG_WARNING_TYPE:'EVENTLOG_WARNING_TYPE',             # 2  -> warning
-                    win32con.EVENTLOG_ERROR_TYPE:'EVENTLOG_ERROR_TYPE'                  # 1  -> critical
-                }
-
-                for logType in logTypes:
-                    try:
-                        if logType not in windows_eventlog:
-                            windows_eventlog[logType] = []
-                        hand = win32evtlog.OpenEventLog(server,logType)
-                        flags = win32evtlog.EVENTLOG_BACKWARDS_READ|win32evtlog.EVENTLOG_SEQUENTIAL_READ
-                        total = win32evtlog.GetNumberOfEventLogRecords(hand)
-                        events = win32evtlog.ReadEventLog(hand, flags, 0)
-                        if events:
-                            for event in events:
-                                msg = win32evtlogutil.SafeFormatMessage(event, logType)
-                                sidDesc = None
-                                if event.Sid is not None:
-                                    try:
-                                        domain, user, typ = win32security.LookupAccountSid(server, event.Sid)
-                                        sidDesc = "%s/%s" % (domain, user)
-                                    except win32security.error:
-                                        sidDesc = str(event.Sid)
-
-                                evt_type = "unknown"
-                                if event.EventType in evt_dict.keys():
-                                    evt_type = str(evt_dict[event.EventType])
 
-                                tmp_evt = {
-                                    'event_category': event.EventCategory,
-                                    'time_generated': str(event.TimeGenerated),
-                                    'source_name': event.SourceName,
-                                    'associated_user': sidDesc,
-                                    'event_id': event.EventID,
-                                    'event_type': evt_type,
-                                    'event_type_id': event.EventType,
-                                    'event_msg': msg,
-                                    'event_data': [ data for data in event.StringInserts ] if event.StringInserts else ''
-                                }
-                                windows_eventlog[logType].append(tmp_evt)
-                    except:
-                        print_verbose_without_lock("An error occured during windows eventlog check with log type %s!" % (logType), True)
-                        agent_log.error("An error occured during windows eventlog check with log type %s!" % (logType))
-                        
-                        if stacktrace:
-                            traceback.print_exc()
-                            
-            except:
-                print_verbose_without_lock("An error occured during windows eventlog check!", True)
-                agent_log.error("An error occured during windows eventlog check!")
-                
-                if stacktrace:
-                    traceback.print_exc()
-                    
+def get_process_workers_count():
+    """Function to get the configured number of worker processes for the process check
+    
+    Linux only! On other systems the processes are always collected in the agent process.
+    
+    Returns
+    -------
+    int
+        Number of worker processes (0 = collect in the agent process)
 
+    """
+    if system != 'linux':
+        return 0
     try:
-        agent = {
-            'last_updated': time.ctime(),
-            'last_updated_timestamp': round(time.time()),
-            'system': platform.system(),
-            'system_uptime': uptime,
-            'kernel_version': platform.release(),
-            'mac_version': platform.mac_ver()[0],
-            'agent_version': agentVersion,
-            'temperature_unit': 'F' if temperatureIsFahrenheit else 'C'
-        }
-    except:
-        agent = {
-            'last_updated': time.ctime(),
-            'last_updated_timestamp': round(time.time()),
-            'system_uptime': uptime,
-            'agent_version': agentVersion,
-            'temperature_unit': 'F' if temperatureIsFahrenheit else 'C'
-        }
-
-    out = {
-        'agent': agent,
-        #'disks': disks,
-        #'disk_io': diskIO,
-        #'disk_io_total': diskIOTotal,
-        #'net_stats': net_stats,
-        #'net_io': netIO,
-        
-        #'sensors': sensors,
+        workers = int(config['default'].get('processstats-workers', 0) or 0)
+    except ValueError:
+        return 0
+    if workers < 2:
+        return 0
+    return workers
 
-        #'cpu_total_percentage': cpuTotalPercentage,
-        #'cpu_percentage': cpuPercentage,
-        #'cpu_total_percentage_detailed': cpuTotalPercentageDetailed,
-        #'cpu_percentage_detailed': cpuPercentageDetailed,
-        
-        'system_load': system_load_avg,
-        'users': users,
-        
-        'memory': memory._asdict(),
-        'swap': swap._asdict(),
 
-        #'processes': processes
-    }
-        
-    if config['default']['diskstats'] in (1, "1", "true", "True"):
-        out['disks'] = disks
-        
-    if config['default']['diskio'] in (1, "1", "true", "True"):
-        out['disk_io'] = diskIO
-        
-    if config['default']['netstats'] in (1, "1", "true", "True"):
-        out['net_stats'] = net_stats
-        
-    if config['default']['netio'] in (1, "1", "true", "True"):
-        out['net_io'] = netIO
-        
-    if config['default']['sensorstats'] in (1, "1", "true", "True"):
-        out['sensors'] = sensors
-        
-    if config['default']['cpustats'] in (1, "1", "true", "True"):
-        out['cpu_total_percentage'] = cpuTotalPercentage
-        out['cpu_percentage'] = cpuPercentage
-        out['cpu_total_percentage_detailed'] = cpuTotalPercentageDetailed
-        out['cpu_percentage_detailed'] = cpuPercentageDetailed
-        
-    if config['default']['processstats'] in (1, "1", "true", "True"):
-        out['processes'] = processes
+def process_worker(conn):
+    """Function that runs in a worker process of the parallel process check
     
-    if system == 'windows':
-        if config['default']['winservices'] in (1, "1", "true", "True"):
-            out['windows_services'] = windows_services
-        if config['default']['wineventlog'] in (1, "1", "true", "True"):
-            out['windows_eventlog'] = windows_eventlog
-        
-    if len(systemd_services_data) > 0:
-        out['systemd_services'] = systemd_services_data
-        
-    if len(cached_customchecks_check_data) > 0:
-        out['customchecks'] = cached_customchecks_check_data
-        
-    if len(docker_stats_data) > 0:
-        out['dockerstats'] = docker_stats_data
-        
-    if len(qemu_stats_data) > 0:
-        out['qemustats'] = qemu_stats_data
-        
-    if 'result' in alfresco_stats_data and config['default']['alfrescostats'] in (1, "1", "true", "True"):
-        out['alfrescostats'] = alfresco_stats_data['result']
-        
-    #if jmx_import_successfull and 'alfrescostats' in config['default'] and config['default']['alfrescostats'] in (1, "1", "true", "True", True):
-    #    out['alfrescostats'] = alfrescostats
-    if verbose:
-        print_lock.release()
-    return out
-
-
-def file_readable(path):
-    """Function to check whether a file is readable or not
+    Linux only!
     
+    Each worker keeps its own process table, so it always gets the same shard of process ids (pid % number of workers).
+    Receives (pids, memory_total, now, stable_attributes_interval) requests and answers with the json serialized process information.
+    A None request stops the worker.
+
     Parameters
     ----------
-    path
-        Path to file
+    conn
+        Worker side of a multiprocessing.Pipe
 
     """
-    return (isfile(path) and access(path, R_OK))
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    
+    while True:
+        try:
+            request = conn.recv()
+        except (EOFError, IOError):
+            break
+        if request is None:
+            break
+        
+        pids, memory_total, now, stable_attributes_interval = request
+        conn.send_bytes(json.dumps(collect_processes(pids, memory_total, now, stable_attributes_interval)).encode())
+    conn.close()
 
 
-def is_base64(s):
-    """Function to check whether a string is base64 encoded or not
+def start_process_workers(count):
+    """Function to start the worker processes of the parallel process check
     
+    Linux only! The workers are forked from the agent process.
+    Needs to be called before the webserver thread starts, so the workers do not inherit its listening socket.
+
     Parameters
     ----------
-    s
-        String to check
+    count
+        Number of worker processes
 
     """
-    try:
-        return base64.b64encode(base64.b64decode(s)) == s
-    except Exception:
-        return False
+    if isPython3:
+        context = multiprocessing.get_context('fork')
+    else:
+        context = multiprocessing
+    
+    for index in range(count):
+        parent_conn, child_conn = context.Pipe()
+        worker = context.Process(target=process_worker, args=(child_conn,), name='oitc_agent_process_worker_%d' % (index))
+        worker.daemon = True
+        worker.start()
+        child_conn.close()
+        process_workers.append((worker, parent_conn))
+    
+    print_verbose('Started %d process check workers' % (count), False)
+    agent_log.info('Started %d process check workers' % (count))
 
 
-def update_crt_files(data):
-    """Function to update the certificate files
+def stop_process_workers():
+    """Function to stop the worker processes of the parallel process check"""
+    for worker, conn in process_workers:
+        try:
+            conn.send(None)
+            conn.close()
+        except:
+            pass
+        worker.join(1)
+        if worker.is_alive():
+            worker.terminate()
     
-    Update the automatically generated agent certificate file and the ca certificate file if they are writeable.
-    Update the cached certificate checksum.
+    if len(process_workers) > 0:
+        print_verbose_without_lock('Stopped process check workers', False)
+        agent_log.info('Stopped process check workers')
+    del process_workers[:]
+
+
+def collect_processes_in_workers(pids, memory_total, now, stable_attributes_interval, timeout):
+    """Function to collect the information of the given processes using the worker processes
+    
+    Shards the process ids (pid % number of workers) across the workers and merges their results.
 
     Parameters
     ----------
-    data
-        Object containing 'signed'(certificate file) and 'ca'(ca certificate) contents.
+    pids
+        List of process ids
+    memory_total
+        Total physical memory in bytes
+    now
+        Timestamp of the current check
+    stable_attributes_interval
+        Refresh interval in seconds of the stable process attributes
+    timeout
+        Time in seconds to wait for each worker
+
+    Returns
+    -------
+    list
+        Process dicts (ordered by pid)
+
+    Raises
+    ------
+    RuntimeError
+        If a worker does not answer in time
 
     """
-    agent_log.info('update crt files')
-    global cert_checksum
-    global update_crt_files_thread_running
+    count = len(process_workers)
+    shards = [[] for i in range(count)]
+    for pid in pids:
+        shards[pid % count].append(pid)
+    
+    for (worker, conn), shard in zip(process_workers, shards):
+        conn.send((shard, memory_total, now, stable_attributes_interval))
+    
+    processes = []
+    for worker, conn in process_workers:
+        if not conn.poll(timeout):
+            raise RuntimeError('Process check worker %s did not answer within %s seconds' % (worker.name, str(timeout)))
+        processes.extend(json.loads(conn.recv_bytes().decode('utf-8')))
+    
+    processes.sort(key=lambda process: process['pid'])
+    return processes
 
-    if update_crt_files_thread_running:
-        return False
 
-    update_crt_files_thread_running = True
+class ForkServerProcess(object):
+    """Handle of a command started by the fork server (see spawn_process()), supports communicate(), poll() and kill() like subprocess.Popen"""
     
-    try:
-        jdata = json.loads(data.decode('utf-8'))
-        jxdata = json.loads(jdata)
-        if 'signed' in jdata and 'ca' in jdata:
-            with open(config['default']['autossl-crt-file'], 'w+') as f:
-                f.write(jxdata['signed'])
-                sha512.update(jxdata['signed'].encode())
-                cert_checksum = sha512.hexdigest().upper()
-            with open(config['default']['autossl-ca-file'], 'w+') as f:
-                f.write(jxdata['ca'])
-            
-            restart_webserver()
+    def __init__(self, request_id, command):
+        self.request_id = request_id
+        self.command = command
+        self.returncode = None
+        self.output = None
+        self.error = None
+        self.finished = Event()
+    
+    def communicate(self, timeout=None):
+        """Function to wait for the output of the command
         
-    except Exception as e:
-        print_verbose("An error occured during new certificate processing", True)
-        agent_log.error("An error occured during new certificate processing")
-        agent_log.exception(e)
+        Parameters
+        ----------
+        timeout
+            Time in seconds to wait (None = no limit)
+        
+        Returns
+        -------
+        tuple
+            Output (stdout and stderr) and None
+        
+        Raises
+        ------
+        subprocess.TimeoutExpired
+            If the command did not finish in time
+        OSError
+            If the command could not be started or the fork server stopped
+
+        """
+        if not self.finished.wait(timeout):
+            raise subprocess.TimeoutExpired(self.command, timeout)
+        if self.error is not None:
+            raise OSError(self.error)
+        return self.output, None
+    
+    def poll(self):
+        """Function to get the return code of the command (None if still running)"""
+        return self.returncode
+    
+    def kill(self):
+        """Function to kill the command"""
+        send_fork_server_request({'id': self.request_id, 'kill': True})
+
+
+def start_fork_server():
+    """Function to start the fork server process (fork-server = true)
+    
+    The fork server is a new process of the agent (see run_fork_server()), it does not inherit the memory of the agent process.
+
+    """
+    global fork_server_process
+    global fork_server_thread
+    
+    if getattr(sys, 'frozen', False):
+        command = [sys.executable, '--fork-server']
+    else:
+        command = [sys.executable, os.path.abspath(__file__), '--fork-server']
+    
+    try:
+        process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    except:
+        print_verbose('Could not start the fork server, commands are started by the agent process!', True)
+        agent_log.error('Could not start the fork server, commands are started by the agent process!')
         
         if stacktrace:
             traceback.print_exc()
-            print(e)
-            
-    update_crt_files_thread_running = False
+        return
+    
+    fork_server_process = process
+    fork_server_thread = Thread(target=read_fork_server_answers, args=(process,))
+    fork_server_thread.daemon = True
+    fork_server_thread.start()
+    
+    print_verbose('Started fork server (pid %d)' % (process.pid), False)
+    agent_log.info('Started fork server (pid %d)' % (process.pid))
+
+
+def stop_fork_server():
+    """Function to stop the fork server process (kills its running commands)"""
+    global fork_server_process
+    
+    with fork_server_lock:
+        process = fork_server_process
+        fork_server_process = None
+    if process is None:
+        return
+    
+    try:
+        process.stdin.close()
+        process.wait(timeout=5)
+    except:
+        process.kill()
+    if fork_server_thread is not None:
+        fork_server_thread.join(5)
+    
+    print_verbose_without_lock('Stopped fork server', False)
+    agent_log.info('Stopped fork server')
+
+
+def read_fork_server_answers(process):
+    """Function that starts as a thread to read the answers of the fork server
+    
+    Hands the result of each finished command to its ForkServerProcess.
+    If the fork server stops unexpectedly, the waiting commands fail and new commands are started by the agent process.
+    
+    Parameters
+    ----------
+    process
+        Fork server process (subprocess.Popen)
 
+    """
+    for line in iter(process.stdout.readline, b''):
+        try:
+            answer = json.loads(line.decode('utf-8'))
+        except ValueError:
+            continue
         
-def check_update_data(data):
-    """Function that starts as a thread (future) to check and update the agent configuration
+        with fork_server_lock:
+            handle = fork_server_requests.pop(answer['id'], None)
+        if handle is not None:
+            handle.returncode = answer['returncode']
+            handle.output = base64.b64decode(answer['output'])
+            handle.error = answer['error']
+            handle.finished.set()
     
-    The POST Data Object will be parsed as valid json object.
-    The configuration options are loaded into the configparser objects and will be written to the configfiles(if defined).
-    After that an agent reload will be triggered calling load_main_processing().
+    with fork_server_lock:
+        stopped = fork_server_process is not process
+        if not stopped:
+            globals()['fork_server_process'] = None
+        handles = list(fork_server_requests.values())
+        fork_server_requests.clear()
+    
+    for handle in handles:
+        handle.error = 'Fork server stopped'
+        handle.finished.set()
+    
+    if not stopped:
+        print_verbose_without_lock('Fork server stopped unexpectedly, commands are started by the agent process!', False)
+        agent_log.error('Fork server stopped unexpectedly, commands are started by the agent process!')
+
+
+def send_fork_server_request(request, handle=None):
+    """Function to send a request to the fork server
+    
+    Parameters
+    ----------
+    request
+        Request object (see run_fork_server())
+    handle
+        ForkServerProcess that waits for the answer (None for kill requests)
+    
+    Returns
+    -------
+    bool
+        True if the request was sent, False if the fork server is not running
+
+    """
+    with fork_server_lock:
+        if fork_server_process is None:
+            return False
+        try:
+            if handle is not None:
+                fork_server_requests[request['id']] = handle
+            fork_server_process.stdin.write((json.dumps(request) + '\n').encode('utf-8'))
+            fork_server_process.stdin.flush()
+        except (IOError, OSError, ValueError):
+            fork_server_requests.pop(request['id'], None)
+            return False
+    return True
+
+
+def spawn_process(command, shell=True, args=None, executable=None):
+    """Function to start a command with its output (stdout and stderr) in a pipe
+    
+    If the fork server is running (fork-server = true), the command is started by the fork server
+    and a ForkServerProcess is returned, otherwise a subprocess.Popen object.
+    
+    Parameters
+    ----------
+    command
+        Command (shell = True) or its name (for logging)
+    shell
+        Run the command with /bin/sh, otherwise args are executed directly
+    args
+        List of arguments (shell = False)
+    executable
+        Path of the program (shell = False, None = search in PATH)
+    
+    Returns
+    -------
+    object
+        subprocess.Popen or ForkServerProcess
+
+    """
+    global fork_server_sequence
+    
+    if fork_server_process is not None:
+        with fork_server_lock:
+            fork_server_sequence += 1
+            request_id = fork_server_sequence
+        handle = ForkServerProcess(request_id, command)
+        if send_fork_server_request({'id': request_id, 'command': command, 'shell': shell, 'args': args, 'executable': executable}, handle):
+            return handle
+    
+    if shell:
+        return subprocess.Popen(command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    # without close_fds, subprocess uses posix_spawn (python >= 3.8); the file descriptors of the agent are not inheritable (python >= 3.4)
+    return subprocess.Popen(args, executable=executable, close_fds=not isPython3, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+
+
+def get_default_check_section_interval(section):
+    """Function to get the collection interval of a default check section
+    
+    Parameters
+    ----------
+    section
+        Name of the section (see default_check_section_names)
+    
+    Returns
+    -------
+    int
+        Configured <section>-interval in seconds or the check interval if not set (0),
+        expensive sections (governed_sections) are stretched by 2^level if the governor throttles the agent
+
+    """
+    try:
+        interval = int(config['default'].get(section + '-interval', 0) or 0)
+    except ValueError:
+        interval = 0
+    if interval <= 0:
+        interval = int(config['default']['interval'])
+    if interval <= 0:
+        interval = 5
+    if section in governed_sections:
+        interval = interval * 2 ** governor_state['level']
+    return interval
+
+
+def get_default_checks_interval():
+    """Function to get the interval of the default checks job
+    
+    The greatest common divisor of the section intervals, so each section is collected on time
+    (with the shortest interval, interval = 30 and cpustats-interval = 20 would collect the 30 s sections every 40 s).
+    
+    Returns
+    -------
+    int
+        Greatest common divisor of the collection intervals of all default check sections in seconds
+
+    """
+    interval = 0
+    for section in default_check_section_names:
+        section_interval = get_default_check_section_interval(section)
+        while section_interval > 0:
+            interval, section_interval = section_interval, interval % section_interval
+    return interval
+
 
+def default_check_section_is_due(section, now):
+    """Function to check if a default check section needs to be collected again
+    
+    Parameters
+    ----------
+    section
+        Name of the section
+    now
+        Current value of the monotonic clock (monotonic_time())
+    
+    Returns
+    -------
+    bool
+        True if the section was not collected yet or its interval is over
+
+    """
+    if section not in default_check_sections:
+        return True
+    # tolerate a slightly early run of the default checks job
+    return now - default_check_sections[section]['monotonic_timestamp'] + 0.5 >= get_default_check_section_interval(section)
+
+
+def update_default_check_section(section, data, now):
+    """Function to cache the latest result of a default check section
+    
     Parameters
     ----------
+    section
+        Name of the section
     data
-        POST Data Object from webserver
+        Dictionary (output key -> value) that is added to the check result or None (section with its own result cache,
+        its last_updated(_timestamp) is set when its collector job finished, see default_check_section_collected())
+    now
+        Current value of the monotonic clock (monotonic_time())
+
+    """
+    if data is None:
+        previous = default_check_sections.get(section, {})
+        default_check_sections[section] = {
+            'data': None,
+            'monotonic_timestamp': now,
+            'last_updated': previous.get('last_updated'),
+            'last_updated_timestamp': previous.get('last_updated_timestamp')
+        }
+        return
+    
+    default_check_sections[section] = {
+        'data': data,
+        'monotonic_timestamp': now,
+        'last_updated': time.ctime(),
+        'last_updated_timestamp': round(time.time())
+    }
+
+
+def default_check_section_collected(section):
+    """Function to set the last_updated(_timestamp) of a default check section with its own result cache (docker, qemu, systemd, alfresco)
+    
+    Parameters
+    ----------
+    section
+        Name of the section
+
+    """
+    if section in default_check_sections:
+        default_check_sections[section]['last_updated'] = time.ctime()
+        default_check_sections[section]['last_updated_timestamp'] = round(time.time())
+
+
+def get_governor_budget():
+    """Function to get the configured cpu and memory budget of the agent
+    
+    Returns
+    -------
+    tuple
+        Max. cpu usage in percent of one cpu and max. rss in bytes (0 = no limit)
 
     """
     try:
-        jdata = json.loads(data.decode('utf-8'))
+        max_cpu_percent = max(0.0, float(config['default'].get('governor-max-cpu-percent', 0) or 0))
+    except ValueError:
+        max_cpu_percent = 0.0
+    try:
+        max_rss = max(0, int(config['default'].get('governor-max-rss', 0) or 0)) * 1024 * 1024
+    except ValueError:
+        max_rss = 0
+    return max_cpu_percent, max_rss
 
-        for key in jdata:
-            if key == 'config' and file_readable(configpath):
-                newconfig = configparser.ConfigParser(allow_no_value=True)
-                newconfig['default'] = {}
-                newconfig['oitc'] = {}
-                
-                if 'interval' in jdata[key]:
-                    if int(jdata[key]['interval']) > 0:
-                        newconfig['default']['interval'] = str(jdata[key]['interval'])
-                if 'port' in jdata[key]:
-                    if int(jdata[key]['port']) > 0:
-                        newconfig['default']['port'] = str(jdata[key]['port'])
-                if 'address' in jdata[key]:
-                    newconfig['default']['address'] = str(jdata[key]['address'])
-                if 'certfile' in jdata[key]:
-                    newconfig['default']['certfile'] = str(jdata[key]['certfile'])
-                if 'keyfile' in jdata[key]:
-                    newconfig['default']['keyfile'] = str(jdata[key]['keyfile'])
-                if 'try-autossl' in jdata[key]:
-                    if jdata[key]['try-autossl'] in (1, "1", "true", "True"):
-                        newconfig['default']['try-autossl'] = "true"
+
+def measure_agent_usage():
+    """Function to measure the resource usage of the agent
+    
+    The cpu time of the agent includes the process check workers. The finished child processes (e.g. docker or custom check commands)
+    are measured separately, so slow custom checks do not throttle the agent's own checks.
+    
+    Returns
+    -------
+    tuple
+        Used cpu time in seconds of the agent and of its finished child processes (since the agent start) and current rss in bytes
+
+    """
+    global governor_process
+    
+    if governor_process is None:
+        governor_process = psutil.Process()
+    
+    cpu_times = governor_process.cpu_times()
+    cpu_seconds = cpu_times.user + cpu_times.system
+    children_cpu_seconds = getattr(cpu_times, 'children_user', 0) + getattr(cpu_times, 'children_system', 0)
+    rss = governor_process.memory_info().rss
+    for worker, conn in process_workers:
+        try:
+            p = psutil.Process(worker.pid)
+            cpu_times = p.cpu_times()
+            cpu_seconds += cpu_times.user + cpu_times.system
+            rss += p.memory_info().rss
+        except psutil.Error:
+            pass
+    return cpu_seconds, children_cpu_seconds, rss
+
+
+def update_governor(now):
+    """Function to throttle the expensive checks if the agent exceeds its cpu or memory budget
+    
+    The cpu usage is measured over a window of the longest interval of the governed sections (processstats, dockerstats, qemustats),
+    so each window contains a run of the expensive checks.
+    If the budget is exceeded, the level is increased by one, which doubles the interval of the governed sections
+    and refreshes the stable process attributes less often (see get_process_stable_attributes_interval()).
+    The level is decreased by one after governor_recovery_windows windows in which the agent would stay within the budget on the lower level.
+    
+    Parameters
+    ----------
+    now
+        Current time of the monotonic clock (monotonic_time())
+
+    """
+    max_cpu_percent, max_rss = get_governor_budget()
+    if max_cpu_percent <= 0 and max_rss <= 0:
+        return
+    
+    cpu_seconds, children_cpu_seconds, rss = measure_agent_usage()
+    governor_state['rss'] = rss
+    governor_samples.append((now, cpu_seconds, children_cpu_seconds))
+    
+    window = max(get_default_check_section_interval(section) for section in governed_sections)
+    while len(governor_samples) > 1 and now - governor_samples[1][0] >= window:
+        governor_samples.popleft()
+    start, start_cpu_seconds, start_children_cpu_seconds = governor_samples[0]
+    if now - start < window * 0.9:
+        return    # not enough data for a full window
+    
+    cpu_percent = round(max(0.0, cpu_seconds - start_cpu_seconds) / (now - start) * 100, 1)
+    governor_state['cpu_percent'] = cpu_percent
+    governor_state['children_cpu_percent'] = round(max(0.0, children_cpu_seconds - start_children_cpu_seconds) / (now - start) * 100, 1)
+    
+    if (max_cpu_percent > 0 and cpu_percent > max_cpu_percent) or (max_rss > 0 and rss > max_rss):
+        governor_state['good_windows'] = 0
+        if governor_state['level'] < max_governor_level:
+            governor_state['level'] += 1
+            print_verbose_without_lock('Agent exceeds its budget (cpu: %s%%, rss: %s bytes), throttling level %d' % (str(cpu_percent), str(rss), governor_state['level']), False)
+            agent_log.warning('Agent exceeds its budget (cpu: %s%%, rss: %s bytes), throttling level %d' % (str(cpu_percent), str(rss), governor_state['level']))
+    elif governor_state['level'] > 0 and (max_cpu_percent <= 0 or cpu_percent * 2 <= max_cpu_percent):
+        # one level less doubles the frequency of the governed checks
+        governor_state['good_windows'] += 1
+        if governor_state['good_windows'] >= governor_recovery_windows:
+            governor_state['good_windows'] = 0
+            governor_state['level'] -= 1
+            print_verbose_without_lock('Agent is within its budget (cpu: %s%%, rss: %s bytes), throttling level %d' % (str(cpu_percent), str(rss), governor_state['level']), False)
+            agent_log.info('Agent is within its budget (cpu: %s%%, rss: %s bytes), throttling level %d' % (str(cpu_percent), str(rss), governor_state['level']))
+    else:
+        governor_state['good_windows'] = 0
+        return
+    
+    # start a new window (intervals may have changed)
+    governor_samples.clear()
+    governor_samples.append((now, cpu_seconds, children_cpu_seconds))
+
+
+def get_diskstats_timeout():
+    """Function to get the configured timeout of a disk usage (statvfs) call
+    
+    Returns
+    -------
+    float
+        Timeout in seconds (default 5)
+
+    """
+    try:
+        timeout = float(config['default'].get('diskstats-timeout', 5) or 5)
+    except ValueError:
+        return 5.0
+    if timeout <= 0:
+        return 5.0
+    return timeout
+
+
+def disk_usage_worker(mountpoint, request):
+    """Function that starts as a (daemon) thread to get the disk usage of a mountpoint
+    
+    The call may block forever (e.g. on a stale NFS or CIFS mount).
+    The result is stored in the request (usage or error, done = True) and all waiting threads are notified.
+
+    Parameters
+    ----------
+    mountpoint
+        Mountpoint of the partition
+    request
+        Dictionary to store the result
+
+    """
+    usage = None
+    error = None
+    try:
+        usage = psutil.disk_usage(mountpoint)._asdict()
+    except Exception as e:
+        error = e
+    
+    with disk_usage_condition:
+        request['usage'] = usage
+        request['error'] = error
+        request['done'] = True
+        disk_usage_condition.notify_all()
+
+
+def update_disk_usages(mountpoints, timeout):
+    """Function to update the cached disk usage of the given mountpoints
+    
+    Runs at most max_disk_usage_workers statvfs calls in parallel (daemon threads), each with its own timeout.
+    A mountpoint that times out is not requested again while the call still hangs (at most one hanging thread per mountpoint),
+    afterwards it is skipped with an exponential backoff (up to max_disk_usage_backoff seconds).
+    The last known value of skipped or timed out mountpoints stays in disk_usage_cache.
+
+    Parameters
+    ----------
+    mountpoints
+        List of mountpoints
+    timeout
+        Timeout in seconds per mountpoint
+
+    Returns
+    -------
+    set
+        Mountpoints with an updated disk usage
+
+    """
+    now = monotonic_time()
+    for mountpoint in list(disk_usage_cache.keys()):
+        request = disk_usage_cache[mountpoint]['request']
+        if mountpoint not in mountpoints and (request is None or request['done']):
+            del disk_usage_cache[mountpoint]    # not mounted anymore
+    
+    pending = []
+    for mountpoint in mountpoints:
+        if mountpoint not in disk_usage_cache:
+            disk_usage_cache[mountpoint] = {'usage': None, 'timestamp': None, 'request': None, 'failures': 0, 'retry_after': 0}
+        entry = disk_usage_cache[mountpoint]
+        if entry['request'] is not None and not entry['request']['done']:
+            continue    # still hanging
+        if now < entry['retry_after']:
+            continue
+        pending.append(mountpoint)
+    
+    updated = set()
+    running = {}
+    with disk_usage_condition:
+        while True:
+            now = monotonic_time()
+            while pending and len(running) < max_disk_usage_workers:
+                mountpoint = pending.pop(0)
+                request = {'done': False, 'deadline': now + timeout}
+                disk_usage_cache[mountpoint]['request'] = request
+                running[mountpoint] = request
+                thread = Thread(target=disk_usage_worker, args=(mountpoint, request))
+                thread.daemon = True
+                thread.start()
+            
+            for mountpoint, request in list(running.items()):
+                entry = disk_usage_cache[mountpoint]
+                if request['done']:
+                    del running[mountpoint]
+                    if request['usage'] is not None:
+                        entry['usage'] = request['usage']
+                        entry['timestamp'] = time.time()
+                        entry['failures'] = 0
+                        entry['retry_after'] = 0
+                        updated.add(mountpoint)
                     else:
-                        newconfig['default']['try-autossl'] = "false"
-                if 'autossl-folder' in jdata[key]:
-                    newconfig['default']['autossl-folder'] = str(jdata[key]['autossl-folder'])
-                if 'autossl-csr-file' in jdata[key]:
-                    newconfig['default']['autossl-csr-file'] = str(jdata[key]['autossl-csr-file'])
-                if 'autossl-crt-file' in jdata[key]:
-                    newconfig['default']['autossl-crt-file'] = str(jdata[key]['autossl-crt-file'])
-                if 'autossl-key-file' in jdata[key]:
-                    newconfig['default']['autossl-key-file'] = str(jdata[key]['autossl-key-file'])
-                if 'autossl-ca-file' in jdata[key]:
-                    newconfig['default']['autossl-ca-file'] = str(jdata[key]['autossl-ca-file'])
-                if 'auth' in jdata[key]:
-                    newconfig['default']['auth'] = str(jdata[key]['auth'])
-                if 'verbose' in jdata[key]:
-                    if jdata[key]['verbose'] in (1, "1", "true", "True"):
-                        newconfig['default']['verbose'] = "true"
+                        print_verbose_without_lock('Could not get disk usage of "%s": %s' % (mountpoint, request['error']), False)
+                        agent_log.error('Could not get disk usage of "%s": %s' % (mountpoint, request['error']))
+                elif now >= request['deadline']:
+                    del running[mountpoint]
+                    entry['failures'] += 1
+                    entry['retry_after'] = now + min(timeout * 2 ** entry['failures'], max_disk_usage_backoff)
+                    print_verbose_without_lock('Disk usage of "%s" timed out (%d times in a row)!' % (mountpoint, entry['failures']), False)
+                    agent_log.warning('Disk usage of "%s" timed out (%d times in a row)!' % (mountpoint, entry['failures']))
+            
+            if not running:
+                if pending:
+                    continue
+                break
+            disk_usage_condition.wait(max(0.01, min(request['deadline'] for request in running.values()) - now))
+    
+    return updated
+
+
+def run_default_checks():
+    """Function to run the default checks
+    
+    Run default checks to get following information points.
+    
+    
+    - disks (Storage devices with mountpoint, filesystem and storage space definitions)
+    - disk_io (Read and write statistics of the storage devices)
+    - net_io (Input and Outputstatistics of the network devices)
+    - net_stats (Network devices including the possible speed, ...)
+    - sensors (Connected sensors, e.g. temperature of the cpu, akku state)
+    - cpu_total_percentage (Used CPU calculation time in percent)
+    - cpu_percentage (Used cpu calculation time in percent per core)
+    - cpu_total_percentage_detailed (Cpu calculation time in percent per system ressource)
+    - cpu_percentage_detailed (Cpu calculation time in percent per system ressource per core)
+    - system_load (System load 1, 5, 15 as array)
+    - users (Users logged on to the system, their terminals (pid), login time)
+    - memory (Memory information, total, used, active, buffered, ...)
+    - swap (Swap information, total, used, ...)
+    - processes (Information to running processes, cpu, memory, pid, ...)
+    - agent (Agent version, last check time, system version, ...)
+    - dockerstats (Docker containers, id, cpu, memory, block io, pid)
+    - qemustats (Information to active QEMU virtual machines)
+
+
+    Notice:
+
+    Processes with id 0 or 1 are excluded of the process parent and child id check.
+    There are the root processes on linux, macOS and windows.
+    All cpu percentages are calculated from one cpu times snapshot and measured since the previous check.
+    The cpu_percent of a process is measured since the previous check (0.0 for processes that are new in this check).
+    If processstats-stable-attributes-interval is set, exec, cmdline, num_fds and open_files of a process are only refreshed in that interval
+    and each process contains 'attributes_age' (age of these values in seconds).
+    These checks are configurable: dockerstats, qemustats, cpustats, sensorstats, processstats, netstats, diskstats, netio, diskio, winservices.
+    Average values and iops in netio and diskio checks are available after the second check goes through.
+    Devices (disks, partitions, network interfaces) can be filtered with <check>-include and <check>-exclude regular expressions for diskio, netio, netstats and diskstats.
+    Disk usages are collected in parallel with a timeout per partition (diskstats-timeout); if a partition does not respond in time (e.g. a stale NFS mount)
+    its last known usage is returned with 'stale' = True and 'usage_timestamp'.
+    If procfs-reader is enabled (linux), memory, swap, disk and network io are read from procfs-root through persistent file descriptors.
+    If io-sample-interval is set, each device in netio and diskio contains 'samples' (min/max/avg/p95 of the rates sampled since the last check).
+    Each section (see default_check_section_names) is collected in its own interval (<section>-interval, default: interval),
+    the result contains the latest cached value of each section and agent['sections'] contains their last_updated(_timestamp) and interval.
+    The docker, qemu, systemd and alfresco checks run in a bounded thread pool, agent['collectors'] contains their runs, skipped, overrun and timed_out counters.
+    If governor-max-cpu-percent or governor-max-rss is set, agent['governor'] contains the throttle state of the agent (see update_governor()).
+    If custom checks are configured, agent['customchecks'] contains the custom check scheduler metrics (see get_customchecks_metrics()).
+
+    
+    Returns
+    -------
+    dict
+        Object (dictionary) containing all the default check results
+
+    """
+    agent_log.info('Running default checks')
+    global cached_diskIO
+    global cached_netIO
+    global cached_cpu_times
+    
+    now = monotonic_time()
+    
+    if verbose:
+        print_lock.acquire()
+    
+    if config['default']['cpustats'] in (1, "1", "true", "True") and default_check_section_is_due('cpustats', now):
+        
+        # CPU #
+        cpu_fields, cpu_times = get_cpu_times()
+        cpuTotalPercentage, cpuPercentage, cpuTotalPercentageDetailed, cpuPercentageDetailed = calculate_cpu_percentages(cpu_fields, cached_cpu_times, cpu_times)
+        cached_cpu_times = cpu_times
+        update_default_check_section('cpustats', {
+            'cpu_total_percentage': cpuTotalPercentage,
+            'cpu_percentage': cpuPercentage,
+            'cpu_total_percentage_detailed': cpuTotalPercentageDetailed,
+            'cpu_percentage_detailed': cpuPercentageDetailed
+        }, now)
+    
+    uptime = 0
+    try:
+        if hasattr(psutil, "boot_time") and callable(psutil.boot_time):
+            uptime = int(time.time() - psutil.boot_time())
+        else:
+            uptime = int(time.time() - psutil.BOOT_TIME)
+    except:
+        agent_log.error("Could not get system uptime!")
+        print_verbose_without_lock("Could not get system uptime!", True)
+        
+        if stacktrace:
+            traceback.print_exc()
+            
+
+    #totalCpus = psutil.cpu_count()
+    #physicalCpus = psutil.cpu_count(logical=False)
+
+    #cpuFrequency = psutil.cpu_freq()
+
+    # MEMORY #
+    
+    if default_check_section_is_due('memory', now):
+        procfs_root = get_procfs_root()
+        if procfs_root is not None:
+            memory = procfs_virtual_memory(procfs_root)
+            swap = procfs_swap_memory(procfs_root)
+        else:
+            memory = psutil.virtual_memory()
+            swap = psutil.swap_memory()
+        update_default_check_section('memory', {
+            'memory': memory._asdict(),
+            'swap': swap._asdict()
+        }, now)
+
+    if config['default']['diskstats'] in (1, "1", "true", "True") and default_check_section_is_due('diskstats', now):
+        # DISKS #
+        disks = []
+        partitions = []
+        try:
+            for disk in psutil.disk_partitions():
+                if os.name == 'nt':
+                    if 'cdrom' in disk.opts or disk.fstype == '':
+                        # skip cd-rom drives with no disk in it; they may raise
+                        # ENOENT, pop-up a Windows GUI error for a non-ready
+                        # partition or just hang.
+                        continue
+                if not device_is_included('diskstats', (disk.device, disk.mountpoint)):
+                    continue
+                partitions.append(disk)
+            
+            updated = update_disk_usages([disk.mountpoint for disk in partitions], get_diskstats_timeout())
+            for disk in partitions:
+                entry = disk_usage_cache[disk.mountpoint]
+                if entry['usage'] is None:
+                    continue
+                data = dict(
+                    disk = disk._asdict(),
+                    usage = entry['usage']
+                    )
+                if disk.mountpoint not in updated:
+                    data['stale'] = True
+                    data['usage_timestamp'] = entry['timestamp']
+                disks.append(data)
+        except:
+            agent_log.error("Could not get system disks!")
+            print_verbose_without_lock("Could not get system disks!", True)
+            
+            if stacktrace:
+                traceback.print_exc()
+        
+        update_default_check_section('diskstats', {'disks': disks}, now)
+    
+    if hasattr(psutil, "disk_io_counters") and config['default']['diskio'] in (1, "1", "true", "True") and default_check_section_is_due('diskio', now):
+        diskIO = None
+        try:
+            #diskIOTotal = psutil.disk_io_counters(perdisk=False)._asdict()
+            diskIO, cached_diskIO = calculate_counter_rates(filter_devices('diskio', get_disk_io_counters()), cached_diskIO, disk_io_rates)
+            if get_io_sample_interval() > 0:
+                for device, samples in summarize_io_samples('disk_io').items():
+                    if device in diskIO:
+                        diskIO[device]['samples'] = samples
+            diskIO['timestamp'] = time.time()
+        except:
+            print_verbose_without_lock("Could not get disk io stats!", True)
+            agent_log.error("Could not get disk io stats!")
+            
+            if stacktrace:
+                traceback.print_exc()
+        
+        update_default_check_section('diskio', {'disk_io': diskIO}, now)
+    
+    if hasattr(psutil, "net_io_counters") and config['default']['netio'] in (1, "1", "true", "True") and default_check_section_is_due('netio', now):
+        netIO = None
+        try:
+            netIO, cached_netIO = calculate_counter_rates(filter_devices('netio', get_net_io_counters()), cached_netIO, net_io_rates)
+            if get_io_sample_interval() > 0:
+                for device, samples in summarize_io_samples('net_io').items():
+                    if device in netIO:
+                        netIO[device]['samples'] = samples
+            netIO['timestamp'] = time.time()
+        except:
+            print_verbose_without_lock("Could not get network io stats!", True)
+            agent_log.error("Could not get network io stats!")
+            
+            if stacktrace:
+                traceback.print_exc()
+        
+        update_default_check_section('netio', {'net_io': netIO}, now)
+    
+    if hasattr(psutil, "net_if_stats") and config['default']['netstats'] in (1, "1", "true", "True") and default_check_section_is_due('netstats', now):
+        net_stats = None
+        try:
+            net_stats = { device: data._asdict() for device,data in filter_devices('netstats', psutil.net_if_stats()).items() }
+        except:
+            print_verbose_without_lock("Could not get network device stats!", True)
+            agent_log.error("Could not get network device stats!")
+            
+            if stacktrace:
+                traceback.print_exc()
+        
+        update_default_check_section('netstats', {'net_stats': net_stats}, now)
+    
+    if config['default']['sensorstats'] in (1, "1", "true", "True") and default_check_section_is_due('sensorstats', now):
+        sensors = {}
+        try:
+            if hasattr(psutil, "sensors_temperatures") and system != 'windows':
+                sensors['temperatures'] = {}
+                for device,data in psutil.sensors_temperatures(fahrenheit=temperatureIsFahrenheit).items():
+                    sensors['temperatures'][device] = []
+                    for value in data:
+                        sensors['temperatures'][device].append(value._asdict())
+            else:
+                sensors['temperatures'] = {}
+        except:
+            print_verbose_without_lock("Could not get temperature sensor data!", True)
+            agent_log.error("Could not get temperature sensor data!")
+            
+            if stacktrace:
+                traceback.print_exc()
+                
+        
+        try:
+            if hasattr(psutil, "sensors_fans") and system != 'windows':
+                sensors['fans'] = {}
+                for device,data in psutil.sensors_fans().items():
+                    sensors['fans'][device] = []
+                    for value in data:
+                        sensors['fans'][device].append(value._asdict())
+            else:
+                sensors['fans'] = {}
+        except:
+            print_verbose_without_lock("Could not get fans sensor data!", True)
+            agent_log.error("Could not get fans sensor data!")
+            
+            if stacktrace:
+                traceback.print_exc()
+                
+        
+        try:
+            if hasattr(psutil, "sensors_battery"):
+                sensors_battery = psutil.sensors_battery()
+                if sensors_battery is not None:
+                    sensors['battery'] = sensors_battery._asdict()
+                else:
+                    sensors['battery'] = {}
+            else:
+                sensors['battery'] = {}
+        except:
+            print_verbose_without_lock("Could not get battery sensor data!", True)
+            agent_log.error("Could not get battery sensor data!")
+            
+            if stacktrace:
+                traceback.print_exc()
+        
+        update_default_check_section('sensorstats', {'sensors': sensors}, now)
+    
+    if default_check_section_is_due('load', now):
+        system_load_avg = []
+        try:
+            if hasattr(psutil, "getloadavg"):
+                system_load_avg = psutil.getloadavg()
+            elif hasattr(os, "getloadavg"):
+                system_load_avg = os.getloadavg()
+        except:
+            print_verbose_without_lock("Could not get average system load!", True)
+            agent_log.error("Could not get average system load!")
+            
+            if stacktrace:
+                traceback.print_exc()
+        
+        update_default_check_section('load', {'system_load': system_load_avg}, now)
+    
+    if default_check_section_is_due('users', now):
+        users = []
+        try:
+            if hasattr(psutil, "users"):
+                users = [ user._asdict() for user in psutil.users() ]
+        except:
+            print_verbose_without_lock("Could not get users, connected to the system!", True)
+            agent_log.error("Could not get users, connected to the system!")
+            
+            if stacktrace:
+                traceback.print_exc()
+        
+        update_default_check_section('users', {'users': users}, now)
+    
+    #processes = [ psutil.Process(pid).as_dict() for pid in pids ]
+    
+    if config['default']['processstats'] in (1, "1", "true", "True") and default_check_section_is_due('processstats', now):
+        if hasattr(psutil, "pids"):
+            pids = psutil.pids()
+        else:
+            pids = psutil.get_pid_list()
+        memory_total = default_check_sections['memory']['data']['memory']['total']
+        
+        if len(process_workers) > 0:
+            try:
+                processes = collect_processes_in_workers(pids, memory_total, time.time(), get_process_stable_attributes_interval(), int(config['default']['interval']))
+            except:
+                print_verbose_without_lock("Process check workers failed! Fall back to the process check in the agent process.", True)
+                agent_log.error("Process check workers failed! Fall back to the process check in the agent process.")
+                
+                if stacktrace:
+                    traceback.print_exc()
+                
+                stop_process_workers()
+                processes = collect_processes(pids, memory_total, time.time(), get_process_stable_attributes_interval())
+        else:
+            processes = collect_processes(pids, memory_total, time.time(), get_process_stable_attributes_interval())
+        
+        if config['default']['processstats-including-child-ids'] in (1, "1", "true", "True"):
+            try:
+                add_process_children_ids(processes)
+            except:
+                print_verbose_without_lock("An error occured while building the process tree!", True)
+                agent_log.error("An error occured while building the process tree!")
+                
+                if stacktrace:
+                    traceback.print_exc()
+        
+        update_default_check_section('processstats', {'processes': processes}, now)
+    
+    if system == 'windows':
+        if config['default']['winservices'] in (1, "1", "true", "True") and default_check_section_is_due('winservices', now):
+            windows_services = []
+            try:
+                for win_process in psutil.win_service_iter():
+                    windows_services.append(win_process.as_dict())
+            except:
+                print_verbose_without_lock("An error occured during windows services check!", True)
+                agent_log.error("An error occured during windows services check!")
+                
+                if stacktrace:
+                    traceback.print_exc()
+            
+            update_default_check_section('winservices', {'windows_services': windows_services}, now)
+        if config['default']['wineventlog'] in (1, "1", "true", "True") and default_check_section_is_due('wineventlog', now):
+            windows_eventlog = {}
+            try:
+                server = 'localhost'    # name of the target computer to get event logs
+                logTypes = []
+                if config['default']['wineventlog-logtypes'] != "":
+                    for logtype in config['default']['wineventlog-logtypes'].split(','):
+                        if logtype.strip() != '':
+                            logTypes.append(logtype.strip())
+                else:
+                    logTypes = ['System', 'Application', 'Security', 'openITCOCKPIT Agent']
+
+                evt_dict={
+                    win32con.EVENTLOG_AUDIT_FAILURE:'EVENTLOG_AUDIT_FAILURE',           # 16 -> critical
+                    win32con.EVENTLOG_AUDIT_SUCCESS:'EVENTLOG_AUDIT_SUCCESS',           # 8  -> ok
+                    win32con.EVENTLOG_INFORMATION_TYPE:'EVENTLOG_INFORMATION_TYPE',     # 4  -> ok
+                    win32con.EVENTLOG_WARNING_TYPE:'EVENTLOG_WARNING_TYPE',             # 2  -> warning
+                    win32con.EVENTLOG_ERROR_TYPE:'EVENTLOG_ERROR_TYPE'                  # 1  -> critical
+                }
+
+                for logType in logTypes:
+                    try:
+                        if logType not in windows_eventlog:
+                            windows_eventlog[logType] = []
+                        hand = win32evtlog.OpenEventLog(server,logType)
+                        flags = win32evtlog.EVENTLOG_BACKWARDS_READ|win32evtlog.EVENTLOG_SEQUENTIAL_READ
+                        total = win32evtlog.GetNumberOfEventLogRecords(hand)
+                        events = win32evtlog.ReadEventLog(hand, flags, 0)
+                        if events:
+                            for event in events:
+                                msg = win32evtlogutil.SafeFormatMessage(event, logType)
+                                sidDesc = None
+                                if event.Sid is not None:
+                                    try:
+                                        domain, user, typ = win32security.LookupAccountSid(server, event.Sid)
+                                        sidDesc = "%s/%s" % (domain, user)
+                                    except win32security.error:
+                                        sidDesc = str(event.Sid)
+
+                                evt_type = "unknown"
+                                if event.EventType in evt_dict.keys():
+                                    evt_type = str(evt_dict[event.EventType])
+
+                                tmp_evt = {
+                                    'event_category': event.EventCategory,
+                                    'time_generated': str(event.TimeGenerated),
+                                    'source_name': event.SourceName,
+                                    'associated_user': sidDesc,
+                                    'event_id': event.EventID,
+                                    'event_type': evt_type,
+                                    'event_type_id': event.EventType,
+                                    'event_msg': msg,
+                                    'event_data': [ data for data in event.StringInserts ] if event.StringInserts else ''
+                                }
+                                windows_eventlog[logType].append(tmp_evt)
+                    except:
+                        print_verbose_without_lock("An error occured during windows eventlog check with log type %s!" % (logType), True)
+                        agent_log.error("An error occured during windows eventlog check with log type %s!" % (logType))
+                        
+                        if stacktrace:
+                            traceback.print_exc()
+                            
+            except:
+                print_verbose_without_lock("An error occured during windows eventlog check!", True)
+                agent_log.error("An error occured during windows eventlog check!")
+                
+                if stacktrace:
+                    traceback.print_exc()
+            
+            update_default_check_section('wineventlog', {'windows_eventlog': windows_eventlog}, now)
+
+    try:
+        agent = {
+            'last_updated': time.ctime(),
+            'last_updated_timestamp': round(time.time()),
+            'system': platform.system(),
+            'system_uptime': uptime,
+            'kernel_version': platform.release(),
+            'mac_version': platform.mac_ver()[0],
+            'agent_version': agentVersion,
+            'temperature_unit': 'F' if temperatureIsFahrenheit else 'C'
+        }
+    except:
+        agent = {
+            'last_updated': time.ctime(),
+            'last_updated_timestamp': round(time.time()),
+            'system_uptime': uptime,
+            'agent_version': agentVersion,
+            'temperature_unit': 'F' if temperatureIsFahrenheit else 'C'
+        }
+
+    agent['sections'] = {}
+    out = {
+        'agent': agent
+    }
+    for section in default_check_section_names:
+        if section in default_check_sections and default_check_sections[section]['last_updated'] is not None:
+            if default_check_sections[section]['data'] is not None:
+                out.update(default_check_sections[section]['data'])
+            agent['sections'][section] = {
+                'last_updated': default_check_sections[section]['last_updated'],
+                'last_updated_timestamp': default_check_sections[section]['last_updated_timestamp'],
+                'interval': get_default_check_section_interval(section)
+            }
+
+    collectors = get_collector_stats()
+    if len(collectors) > 0:
+        agent['collectors'] = collectors
+    
+    max_cpu_percent, max_rss = get_governor_budget()
+    if max_cpu_percent > 0 or max_rss > 0:
+        agent['governor'] = {
+            'level': governor_state['level'],
+            'throttled': governor_state['level'] > 0,
+            'interval_factor': 2 ** governor_state['level'],
+            'cpu_percent': governor_state['cpu_percent'],
+            'children_cpu_percent': governor_state['children_cpu_percent'],
+            'rss': governor_state['rss'],
+            'max_cpu_percent': max_cpu_percent,
+            'max_rss': max_rss
+        }
+    
+    if len(systemd_services_data) > 0:
+        out['systemd_services'] = systemd_services_data
+        
+    if len(cached_customchecks_check_data) > 0:
+        out['customchecks'] = cached_customchecks_check_data
+        agent['customchecks'] = get_customchecks_metrics()
+        
+    if len(docker_stats_data) > 0:
+        out['dockerstats'] = docker_stats_data
+        
+    if len(qemu_stats_data) > 0:
+        out['qemustats'] = qemu_stats_data
+        
+    if 'result' in alfresco_stats_data and config['default']['alfrescostats'] in (1, "1", "true", "True"):
+        out['alfrescostats'] = alfresco_stats_data['result']
+        
+    #if jmx_import_successfull and 'alfrescostats' in config['default'] and config['default']['alfrescostats'] in (1, "1", "true", "True", True):
+    #    out['alfrescostats'] = alfrescostats
+    if verbose:
+        print_lock.release()
+    return out
+
+
+def file_readable(path):
+    """Function to check whether a file is readable or not
+    
+    Parameters
+    ----------
+    path
+        Path to file
+
+    """
+    return (isfile(path) and access(path, R_OK))
+
+
+def is_base64(s):
+    """Function to check whether a string is base64 encoded or not
+    
+    Parameters
+    ----------
+    s
+        String to check
+
+    """
+    try:
+        return base64.b64encode(base64.b64decode(s)) == s
+    except Exception:
+        return False
+
+
+def update_crt_files(data):
+    """Function to update the certificate files
+    
+    Update the automatically generated agent certificate file and the ca certificate file if they are writeable.
+    Update the cached certificate checksum.
+
+    Parameters
+    ----------
+    data
+        Object containing 'signed'(certificate file) and 'ca'(ca certificate) contents.
+
+    """
+    agent_log.info('update crt files')
+    global cert_checksum
+    global update_crt_files_thread_running
+
+    if update_crt_files_thread_running:
+        return False
+
+    update_crt_files_thread_running = True
+    
+    try:
+        jdata = json.loads(data.decode('utf-8'))
+        jxdata = json.loads(jdata)
+        if 'signed' in jdata and 'ca' in jdata:
+            with open(config['default']['autossl-crt-file'], 'w+') as f:
+                f.write(jxdata['signed'])
+                sha512.update(jxdata['signed'].encode())
+                cert_checksum = sha512.hexdigest().upper()
+            with open(config['default']['autossl-ca-file'], 'w+') as f:
+                f.write(jxdata['ca'])
+            
+            restart_webserver()
+        
+    except Exception as e:
+        print_verbose("An error occured during new certificate processing", True)
+        agent_log.error("An error occured during new certificate processing")
+        agent_log.exception(e)
+        
+        if stacktrace:
+            traceback.print_exc()
+            print(e)
+            
+    update_crt_files_thread_running = False
+
+        
+def check_update_data(data):
+    """Function that starts as a thread (future) to check and update the agent configuration
+    
+    The POST Data Object will be parsed as valid json object.
+    The configuration options are loaded into the configparser objects and will be written to the configfiles(if defined).
+    After that an agent reload will be triggered calling load_main_processing().
+
+    Parameters
+    ----------
+    data
+        POST Data Object from webserver
+
+    """
+    try:
+        jdata = json.loads(data.decode('utf-8'))
+
+        for key in jdata:
+            if key == 'config' and file_readable(configpath):
+                newconfig = configparser.ConfigParser(allow_no_value=True)
+                newconfig['default'] = {}
+                newconfig['oitc'] = {}
+                
+                if 'interval' in jdata[key]:
+                    if int(jdata[key]['interval']) > 0:
+                        newconfig['default']['interval'] = str(jdata[key]['interval'])
+                for section in default_check_section_names:
+                    if section + '-interval' in jdata[key]:
+                        if int(jdata[key][section + '-interval']) >= 0:
+                            newconfig['default'][section + '-interval'] = str(jdata[key][section + '-interval'])
+                if 'port' in jdata[key]:
+                    if int(jdata[key]['port']) > 0:
+                        newconfig['default']['port'] = str(jdata[key]['port'])
+                if 'address' in jdata[key]:
+                    newconfig['default']['address'] = str(jdata[key]['address'])
+                if 'certfile' in jdata[key]:
+                    newconfig['default']['certfile'] = str(jdata[key]['certfile'])
+                if 'keyfile' in jdata[key]:
+                    newconfig['default']['keyfile'] = str(jdata[key]['keyfile'])
+                if 'try-autossl' in jdata[key]:
+                    if jdata[key]['try-autossl'] in (1, "1", "true", "True"):
+                        newconfig['default']['try-autossl'] = "true"
+                    else:
+                        newconfig['default']['try-autossl'] = "false"
+                if 'autossl-folder' in jdata[key]:
+                    newconfig['default']['autossl-folder'] = str(jdata[key]['autossl-folder'])
+                if 'autossl-csr-file' in jdata[key]:
+                    newconfig['default']['autossl-csr-file'] = str(jdata[key]['autossl-csr-file'])
+                if 'autossl-crt-file' in jdata[key]:
+                    newconfig['default']['autossl-crt-file'] = str(jdata[key]['autossl-crt-file'])
+                if 'autossl-key-file' in jdata[key]:
+                    newconfig['default']['autossl-key-file'] = str(jdata[key]['autossl-key-file'])
+                if 'autossl-ca-file' in jdata[key]:
+                    newconfig['default']['autossl-ca-file'] = str(jdata[key]['autossl-ca-file'])
+                if 'auth' in jdata[key]:
+                    newconfig['default']['auth'] = str(jdata[key]['auth'])
+                if 'verbose' in jdata[key]:
+                    if jdata[key]['verbose'] in (1, "1", "true", "True"):
+                        newconfig['default']['verbose'] = "true"
                     else:
                         newconfig['default']['verbose'] = "false"
                 if 'stacktrace' in jdata[key]:
@@ -1331,26 +3745,72 @@ def check_update_data(data):
                         newconfig['default']['processstats-including-child-ids'] = "true"
                     else:
                         newconfig['default']['processstats-including-child-ids'] = "false"
+                if 'processstats-stable-attributes-interval' in jdata[key]:
+                    if int(jdata[key]['processstats-stable-attributes-interval']) >= 0:
+                        newconfig['default']['processstats-stable-attributes-interval'] = str(jdata[key]['processstats-stable-attributes-interval'])
+                if 'processstats-workers' in jdata[key]:
+                    if int(jdata[key]['processstats-workers']) >= 0:
+                        newconfig['default']['processstats-workers'] = str(jdata[key]['processstats-workers'])
                 if 'netstats' in jdata[key]:
                     if jdata[key]['netstats'] in (1, "1", "true", "True"):
                         newconfig['default']['netstats'] = "true"
                     else:
                         newconfig['default']['netstats'] = "false"
+                if 'netstats-include' in jdata[key]:
+                    newconfig['default']['netstats-include'] = str(jdata[key]['netstats-include'])
+                if 'netstats-exclude' in jdata[key]:
+                    newconfig['default']['netstats-exclude'] = str(jdata[key]['netstats-exclude'])
                 if 'diskstats' in jdata[key]:
                     if jdata[key]['diskstats'] in (1, "1", "true", "True"):
                         newconfig['default']['diskstats'] = "true"
                     else:
                         newconfig['default']['diskstats'] = "false"
+                if 'diskstats-timeout' in jdata[key]:
+                    if float(jdata[key]['diskstats-timeout']) > 0:
+                        newconfig['default']['diskstats-timeout'] = str(jdata[key]['diskstats-timeout'])
+                if 'diskstats-include' in jdata[key]:
+                    newconfig['default']['diskstats-include'] = str(jdata[key]['diskstats-include'])
+                if 'diskstats-exclude' in jdata[key]:
+                    newconfig['default']['diskstats-exclude'] = str(jdata[key]['diskstats-exclude'])
                 if 'netio' in jdata[key]:
                     if jdata[key]['netio'] in (1, "1", "true", "True"):
                         newconfig['default']['netio'] = "true"
                     else:
                         newconfig['default']['netio'] = "false"
+                if 'netio-include' in jdata[key]:
+                    newconfig['default']['netio-include'] = str(jdata[key]['netio-include'])
+                if 'netio-exclude' in jdata[key]:
+                    newconfig['default']['netio-exclude'] = str(jdata[key]['netio-exclude'])
                 if 'diskio' in jdata[key]:
                     if jdata[key]['diskio'] in (1, "1", "true", "True"):
                         newconfig['default']['diskio'] = "true"
                     else:
                         newconfig['default']['diskio'] = "false"
+                if 'diskio-include' in jdata[key]:
+                    newconfig['default']['diskio-include'] = str(jdata[key]['diskio-include'])
+                if 'diskio-exclude' in jdata[key]:
+                    newconfig['default']['diskio-exclude'] = str(jdata[key]['diskio-exclude'])
+                if 'procfs-reader' in jdata[key]:
+                    if jdata[key]['procfs-reader'] in (1, "1", "true", "True"):
+                        newconfig['default']['procfs-reader'] = "true"
+                    else:
+                        newconfig['default']['procfs-reader'] = "false"
+                if 'procfs-root' in jdata[key]:
+                    newconfig['default']['procfs-root'] = str(jdata[key]['procfs-root'])
+                if 'governor-max-cpu-percent' in jdata[key]:
+                    if float(jdata[key]['governor-max-cpu-percent']) >= 0:
+                        newconfig['default']['governor-max-cpu-percent'] = str(jdata[key]['governor-max-cpu-percent'])
+                if 'governor-max-rss' in jdata[key]:
+                    if int(jdata[key]['governor-max-rss']) >= 0:
+                        newconfig['default']['governor-max-rss'] = str(jdata[key]['governor-max-rss'])
+                if 'fork-server' in jdata[key]:
+                    if jdata[key]['fork-server'] in (1, "1", "true", "True"):
+                        newconfig['default']['fork-server'] = "true"
+                    else:
+                        newconfig['default']['fork-server'] = "false"
+                if 'io-sample-interval' in jdata[key]:
+                    if int(jdata[key]['io-sample-interval']) >= 0:
+                        newconfig['default']['io-sample-interval'] = str(jdata[key]['io-sample-interval'])
                 if 'winservices' in jdata[key]:
                     if jdata[key]['winservices'] in (1, "1", "true", "True"):
                         newconfig['default']['winservices'] = "true"
@@ -1369,902 +3829,2105 @@ def check_update_data(data):
                 if 'wineventlog-logtypes' in jdata[key]:
                     newconfig['default']['wineventlog-logtypes'] = str(jdata[key]['wineventlog-logtypes'])
                 
-                if 'alfrescostats' in jdata[key]:
-                    if jdata[key]['alfrescostats'] in (1, "1", "true", "True"):
-                        newconfig['default']['alfrescostats'] = "true"
-                    else:
-                        newconfig['default']['alfrescostats'] = "false"
-                if 'alfresco-jmxuser' in jdata[key]:
-                    newconfig['default']['alfresco-jmxuser'] = str(jdata[key]['alfresco-jmxuser'])
-                if 'alfresco-jmxpassword' in jdata[key]:
-                    newconfig['default']['alfresco-jmxpassword'] = str(jdata[key]['alfresco-jmxpassword'])
-                if 'alfresco-jmxaddress' in jdata[key]:
-                    newconfig['default']['alfresco-jmxaddress'] = str(jdata[key]['alfresco-jmxaddress'])
-                if 'alfresco-jmxport' in jdata[key]:
-                    newconfig['default']['alfresco-jmxport'] = str(jdata[key]['alfresco-jmxport'])
-                if 'alfresco-jmxpath' in jdata[key]:
-                    newconfig['default']['alfresco-jmxpath'] = str(jdata[key]['alfresco-jmxpath'])
-                if 'alfresco-jmxquery' in jdata[key]:
-                    newconfig['default']['alfresco-jmxquery'] = str(jdata[key]['alfresco-jmxquery'])
-                if 'alfresco-javapath' in jdata[key]:
-                    newconfig['default']['alfresco-javapath'] = str(jdata[key]['alfresco-javapath'])
+                if 'alfrescostats' in jdata[key]:
+                    if jdata[key]['alfrescostats'] in (1, "1", "true", "True"):
+                        newconfig['default']['alfrescostats'] = "true"
+                    else:
+                        newconfig['default']['alfrescostats'] = "false"
+                if 'alfresco-jmxuser' in jdata[key]:
+                    newconfig['default']['alfresco-jmxuser'] = str(jdata[key]['alfresco-jmxuser'])
+                if 'alfresco-jmxpassword' in jdata[key]:
+                    newconfig['default']['alfresco-jmxpassword'] = str(jdata[key]['alfresco-jmxpassword'])
+                if 'alfresco-jmxaddress' in jdata[key]:
+                    newconfig['default']['alfresco-jmxaddress'] = str(jdata[key]['alfresco-jmxaddress'])
+                if 'alfresco-jmxport' in jdata[key]:
+                    newconfig['default']['alfresco-jmxport'] = str(jdata[key]['alfresco-jmxport'])
+                if 'alfresco-jmxpath' in jdata[key]:
+                    newconfig['default']['alfresco-jmxpath'] = str(jdata[key]['alfresco-jmxpath'])
+                if 'alfresco-jmxquery' in jdata[key]:
+                    newconfig['default']['alfresco-jmxquery'] = str(jdata[key]['alfresco-jmxquery'])
+                if 'alfresco-javapath' in jdata[key]:
+                    newconfig['default']['alfresco-javapath'] = str(jdata[key]['alfresco-javapath'])
+                
+                if 'customchecks' in jdata[key]:
+                    if jdata[key]['customchecks'] not in (1, "1", "true", "True", 0, "0", "false", "False"):
+                        newconfig['default']['customchecks'] = str(jdata[key]['customchecks'])
+                if 'temperature-fahrenheit' in jdata[key]:
+                    if jdata[key]['temperature-fahrenheit'] in (1, "1", "true", "True"):
+                        newconfig['default']['temperature-fahrenheit'] = "true"
+                    else:
+                        newconfig['default']['temperature-fahrenheit'] = "false"
+                if 'oitc-hostuuid' in jdata[key]:
+                    newconfig['oitc']['hostuuid'] = str(jdata[key]['oitc-hostuuid'])
+                if 'oitc-url' in jdata[key]:
+                    newconfig['oitc']['url'] = str(jdata[key]['oitc-url'])
+                if 'oitc-apikey' in jdata[key]:
+                    newconfig['oitc']['apikey'] = str(jdata[key]['oitc-apikey'])
+                if 'oitc-interval' in jdata[key]:
+                    newconfig['oitc']['interval'] = str(jdata[key]['oitc-interval'])
+                if 'oitc-enabled' in jdata[key]:
+                    if jdata[key]['oitc-enabled'] in (1, "1", "true", "True"):
+                        newconfig['oitc']['enabled'] = "true"
+                    else:
+                        newconfig['oitc']['enabled'] = "false"
+                        
+                if configpath != "":
+                    with open(configpath, 'w') as configfile:
+                        print_verbose("Update agent configuration ...", False)
+                        agent_log.info("Update agent configuration ...")
+                        newconfig.write(configfile)
+                else:
+                    print_verbose("No valid configuration path found", False)
+                    agent_log.error("No valid configuration path found")
+            
+            elif key == 'config' and not file_readable(configpath):
+                print_verbose("Agent configuration file not readable", False)
+                agent_log.error("Agent configuration file not readable")
+            
+            if key == 'customchecks' and file_readable(config['default']['customchecks']):
+                newcustomchecks = configparser.ConfigParser(allow_no_value=True)
+                if isPython3:
+                    newcustomchecks.read_string(sample_customcheck_config)
+                else:
+                    newcustomchecks.readfp(io.BytesIO(sample_customcheck_config))
+                
+                for customkey in jdata[key]:
+                    newcustomchecks[customkey] = {}
+                    
+                    if customkey == 'default':
+                        if 'max_worker_threads' in jdata[key][customkey]:
+                            newcustomchecks[customkey]['max_worker_threads'] = str(jdata[key][customkey]['max_worker_threads'])
+                        if 'executor' in jdata[key][customkey]:
+                            newcustomchecks[customkey]['executor'] = str(jdata[key][customkey]['executor'])
+                        if 'max_concurrent_checks' in jdata[key][customkey]:
+                            if int(jdata[key][customkey]['max_concurrent_checks']) > 0:
+                                newcustomchecks[customkey]['max_concurrent_checks'] = str(jdata[key][customkey]['max_concurrent_checks'])
+                        if 'splay' in jdata[key][customkey]:
+                            if jdata[key][customkey]['splay'] in (1, "1", "true", "True", True):
+                                newcustomchecks[customkey]['splay'] = "true"
+                            else:
+                                newcustomchecks[customkey]['splay'] = "false"
+                        if 'jitter' in jdata[key][customkey]:
+                            if float(jdata[key][customkey]['jitter']) >= 0:
+                                newcustomchecks[customkey]['jitter'] = str(jdata[key][customkey]['jitter'])
+                        if 'max_starts_per_second' in jdata[key][customkey]:
+                            if float(jdata[key][customkey]['max_starts_per_second']) >= 0:
+                                newcustomchecks[customkey]['max_starts_per_second'] = str(jdata[key][customkey]['max_starts_per_second'])
+                    else:
+                    
+                        if 'command' in jdata[key][customkey]:
+                            newcustomchecks[customkey]['command'] = str(jdata[key][customkey]['command'])
+                        if 'interval' in jdata[key][customkey]:
+                            if int(jdata[key][customkey]['interval']) > 0:
+                                newcustomchecks[customkey]['interval'] = str(jdata[key][customkey]['interval'])
+                        if 'timeout' in jdata[key][customkey]:
+                            if int(jdata[key][customkey]['timeout']) > 0:
+                                newcustomchecks[customkey]['timeout'] = str(jdata[key][customkey]['timeout'])
+                        if 'enabled' in jdata[key][customkey]:
+                            newcustomchecks[customkey]['enabled'] = "false"
+                            if jdata[key][customkey]['enabled'] in (1, "1", "true", "True"):
+                                newcustomchecks[customkey]['enabled'] = "true"
+                        if 'shell' in jdata[key][customkey]:
+                            newcustomchecks[customkey]['shell'] = "true"
+                            if jdata[key][customkey]['shell'] in (0, "0", "false", "False", False):
+                                newcustomchecks[customkey]['shell'] = "false"
+                        if 'type' in jdata[key][customkey]:
+                            if str(jdata[key][customkey]['type']) in ('command', 'persistent'):
+                                newcustomchecks[customkey]['type'] = str(jdata[key][customkey]['type'])
+                            
+                if config['default']['customchecks'] != "":
+                    with open(config['default']['customchecks'], 'w') as configfile:
+                        print_verbose("Update customchecks configuration ...", False)
+                        agent_log.info("Update customchecks configuration ...")
+                        newcustomchecks.write(configfile)
+                else:
+                    print_verbose("No valid customchecks configuration path found", False)
+                    agent_log.error("No valid customchecks configuration path found")
+            
+            elif key == 'customchecks' and not file_readable(config['default']['customchecks']):
+                print_verbose("Customchecks configuration file not readable", False)
+                agent_log.error("Customchecks configuration file not readable")
+            
+        load_main_processing()
+        
+    except Exception as e:
+        print_verbose("An error occurred while processing the new configuration", True)
+        agent_log.error("An error occurred while processing the new configuration")
+        agent_log.exception(e)
+        
+        if stacktrace:
+            traceback.print_exc()
+            print(e)
+            
+
+class ThreadedHTTPServer(ThreadingMixIn, HTTPServer):
+    """Handle requests in a separate thread.
+    
+    timeout defines how long (in seconds) handle_request() waits for a new connection,
+    so the webserver thread is able to notice stop requests without a (fake) request.
+    request_queue_size is the listen backlog, the default of 5 drops connections of concurrent pollers
+    (the client retries after one second, see benchmarks/bench_webserver.py).
+    
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+    timeout = 0.5
+    request_queue_size = 64
+
+class AgentWebserver(BaseHTTPRequestHandler):
+    
+    """Webserver class
+
+    Parameters
+    ----------
+    BaseHTTPRequestHandler
+        BaseHTTPRequestHandler
+
+    """
+
+    def _set_headers(self):
+        self.send_response(200)
+        self.send_header('Content-type', 'application/json')
+        self.end_headers()
+    
+    
+    def do_AUTHHEAD(self):
+        self.send_response(401)
+        self.send_header('WWW-Authenticate', 'Basic realm=')
+        self.send_header('Content-type', 'text/html')
+       
+        self.end_headers()
+        
+    
+    def get_csr(self):
+        """Returns new csr
+
+        Calls create_new_csr()
+
+        Returns
+        -------
+        FILETYPE_PEM
+            Certificate request (csr) in FILETYPE_PEM format.
+
+        """
+        return create_new_csr()
+
+    
+    def build_json_config(self):
+        """Build / Prepare config for a JSON object
+
+        Build and returns the current configuration as object (dict).
+
+        Returns
+        -------
+        data
+            Dictionary object with the current configuration
+
+        """
+        data = {}
+        data['config'] = {}
+        data['customchecks'] = {}
+        
+        for key in config['default']:
+            data['config'][key] = config['default'][key]
+        for key in config['oitc']:
+            data['config']['oitc-'+key] = config['oitc'][key]
+        
+        for customkey in customchecks:
+            data['customchecks'][customkey] = {}
+            if customkey == 'default':
+                data['customchecks'][customkey]['max_worker_threads'] = customchecks[customkey]['max_worker_threads']
+            else:
+                for customkeyoption in customchecks[customkey]:
+                    data['customchecks'][customkey][customkeyoption] = customchecks[customkey][customkeyoption]
+        
+        if 'DEFAULT' in data['customchecks']:
+            del data['customchecks']['DEFAULT']
+            
+        if data['config']['auth'] != "":
+            data['config']['auth'] = str(base64.b64decode(data['config']['auth']), "utf-8")
+        
+        return data
+    
+    
+    def _negotiate_content_encoding(self):
+        """Choose a response content encoding based on the Accept-Encoding header
+
+        The encoding with the highest q-value wins, ties are decided by get_supported_content_encodings().
+
+        Returns
+        -------
+        str
+            Content encoding or None (identity)
+
+        """
+        accept_encoding = self.headers.get('Accept-Encoding')
+        if not accept_encoding:
+            return None
+        
+        qvalues = {}
+        for item in accept_encoding.split(','):
+            params = item.strip().split(';')
+            coding = params[0].strip().lower()
+            qvalue = 1.0
+            for param in params[1:]:
+                param = param.strip()
+                if param.startswith('q='):
+                    try:
+                        qvalue = float(param[2:])
+                    except ValueError:
+                        qvalue = 0.0
+            if coding:
+                qvalues[coding] = qvalue
+        
+        best_encoding = None
+        best_qvalue = 0.0
+        for encoding in get_supported_content_encodings():
+            qvalue = qvalues.get(encoding, qvalues.get('*', 0.0))
+            if qvalue > best_qvalue:
+                best_encoding = encoding
+                best_qvalue = qvalue
+        return best_encoding
+    
+    
+    def _is_not_modified(self, variant, etag):
+        """Check the conditional request headers against a check data snapshot
+
+        If-None-Match takes precedence over If-Modified-Since.
+        Last-Modified has a resolution of one second, so If-Modified-Since is only trusted for the second of the snapshot
+        if no other snapshot was published in that second (otherwise the ETag has to be used).
+
+        Returns
+        -------
+        bool
+            True if the client already has the given snapshot, False otherwise.
+
+        """
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match is not None:
+            etags = [tag.strip() for tag in if_none_match.split(',')]
+            return '*' in etags or etag in etags or ('W/' + etag) in etags or variant['etag'] in etags
+        
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_modified_since is not None:
+            try:
+                if_modified_since = mktime_tz(parsedate_tz(if_modified_since))
+                last_modified = int(variant['last_modified'])
+                return last_modified < if_modified_since or (last_modified == if_modified_since and variant['last_modified_unique'])
+            except (TypeError, ValueError, OverflowError):
+                return False
+        return False
+    
+    
+    def _send_check_data(self, query):
+        """Send the latest published check data snapshot
+
+        Responds with 304 (without body) if the client already has the current snapshot.
+        The body is compressed if the client accepts a supported content encoding.
+        The processes can be filtered with query parameters (see parse_process_filter()).
+
+        """
+        try:
+            process_filter = parse_process_filter(query)
+        except ValueError as e:
+            self.send_response(400)
+            self.send_header('Content-type', 'application/json')
+            self.end_headers()
+            self.wfile.write(json.dumps({'error': str(e)}).encode())
+            return
+        
+        variant = get_check_data_variant(get_check_data_snapshot(), process_filter)
+        encoding = self._negotiate_content_encoding()
+        
+        etag = variant['etag']
+        if encoding is not None:
+            etag = etag[:-1] + '-' + encoding + '"'
+        
+        if self._is_not_modified(variant, etag):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Last-Modified', self.date_time_string(variant['last_modified']))
+            self.send_header('Vary', 'Accept-Encoding')
+            self.end_headers()
+            return
+        
+        body = variant['body']
+        if encoding is not None:
+            body = get_encoded_check_data(variant, encoding)
+        
+        self.send_response(200)
+        self.send_header('Content-type', 'application/json')
+        if encoding is not None:
+            self.send_header('Content-Encoding', encoding)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', self.date_time_string(variant['last_modified']))
+        self.send_header('Vary', 'Accept-Encoding')
+        self.end_headers()
+        self.wfile.write(body)
+    
+    
+    def _process_get_data(self):
+        url = urlparse(self.path)
+        if url.path == "/":
+            self._send_check_data(url.query)
+            return
+        
+        self._set_headers()
+        
+        if self.path == "/config" and config['default']['config-update-mode'] in (1, "1", "true", "True", True):
+            self.wfile.write(json.dumps(self.build_json_config()).encode())
+        elif self.path == "/getCsr":
+            data = {}
+            if autossl:
+                data['csr'] = self.get_csr().decode("utf-8")
+            else:
+                data['csr'] = "disabled"
+            self.wfile.write(json.dumps(data).encode())
+        
+    
+    def do_GET(self):
+        try:
+            if 'auth' in config['default']:
+                if str(config['default']['auth']).strip() and self.headers.get('Authorization') == None:
+                    self.do_AUTHHEAD()
+                    self.wfile.write('no auth header received'.encode())
+                elif self.headers.get('Authorization') == 'Basic ' + config['default']['auth'] or config['default']['auth'] == "":
+                    self._process_get_data()
+                elif str(config['default']['auth']).strip():
+                    self.do_AUTHHEAD()
+                    self.wfile.write(self.headers.get('Authorization').encode())
+                    self.wfile.write('not authenticated'.encode())
+            else:
+                self._process_get_data()
+        except:
+            if stacktrace:
+                traceback.print_exc()
+                
+                
+    def _process_post_data(self, data):
+        executor = futures.ThreadPoolExecutor(max_workers=1)
+        returnMessage = {}
+        returnMessage['success'] = False
+        
+        if self.path == "/config" and config['default']['config-update-mode'] in (1, "1", "true", "True", True):
+            executor.submit(check_update_data, data)
+            returnMessage['success'] = True
+        
+        elif self.path == "/updateCrt" and autossl:
+            permanent_webserver_thread(update_crt_files, (data,))
+            returnMessage['success'] = True
+
+        self._set_headers()
+        self.wfile.write(json.dumps(returnMessage).encode())
+    
+    
+    def do_POST(self):
+        try:
+            if 'auth' in config['default']:
+                if str(config['default']['auth']).strip() and self.headers.get('Authorization') == None:
+                    self.do_AUTHHEAD()
+                    self.wfile.write('no auth header received'.encode())
+                elif self.headers.get('Authorization') == 'Basic ' + config['default']['auth'] or config['default']['auth'] == "":
+                    self.wfile.write(json.dumps(self._process_post_data(data=self.rfile.read(int(self.headers['Content-Length'])))).encode())
+                elif str(config['default']['auth']).strip():
+                    self.do_AUTHHEAD()
+                    self.wfile.write(self.headers.get('Authorization').encode())
+                    self.wfile.write('not authenticated'.encode())
+            else:
+                self._process_post_data(data=self.rfile.read(int(self.headers['Content-Length'])))
+
+        except:
+            print_verbose('Caught something in do_POST', True)
+            if stacktrace:
+                traceback.print_exc()
+                
+    
+    def log_message(self, format, *args):
+        agent_log.info("%s - - [%s] %s" % (self.address_string(),self.log_date_time_string(),format%args))
+        if verbose:
+            print("%s - - [%s] %s" % (self.address_string(),self.log_date_time_string(),format%args))
+        return
+
+    
+
+
+def check_systemd_services(timeout):
+    """Function that starts as a thread to run the systemd services check
+    
+    Linux only! (beta)
+    
+    Function that runs a (systemctl) command (as python subprocess) to get a status result for each registered systemd service.
+
+    Parameters
+    ----------
+    timeout
+        Command timeout in seconds
+
+    """
+    global systemd_services_data
+    global cached_check_data
+    
+    agent_log.info('Start systemd services check with timeout of %ss at %s' % (str(timeout), str(round(time.time()))))
+    if verbose:
+        print('Start systemd services check with timeout of %ss at %s' % (str(timeout), str(round(time.time()))))
+    
+    systemd_services = []
+    if system == 'linux' and config['default']['systemdservices'] in (1, "1", "true", "True"):
+        systemd_stats_command = "systemctl list-units --type=service --all --no-legend --no-pager --no-ask-password"
+        try:
+            tmp_systemd_stats_result = ''
+            p = spawn_process(systemd_stats_command)
+            
+            try:
+                stdout, stderr = p.communicate(timeout=3)
+                p.poll()
+                if stdout:
+                    tmp_systemd_stats_result = tmp_systemd_stats_result + stdout.decode()
+                if stderr:
+                    stderr = stderr.decode()
+
+                systemd_services_data['error'] = None if str(stderr) == 'None' else str(stderr)
+                systemd_services_data['returncode'] = p.returncode
+            except subprocess.TimeoutExpired:
+                print_verbose('systemd status check timed out', False)
+                p.kill()    #not needed; just to be sure
+                systemd_services_data['result'] = None
+                systemd_services_data['error'] = 'systemd status check timeout after 3 seconds'
+                systemd_services_data['returncode'] = 124
+        
+            if tmp_systemd_stats_result != '' and systemd_services_data['returncode'] == 0:
+                results = tmp_systemd_stats_result.split('\n')
+                for result in results:
+                    if result.strip() != "":
+                        try:
+                            result_array_unsorted = result.strip().split(' ')
+                            result_array_tmp = []
+                            result_array = []
+                            for i in range(len(result_array_unsorted)):
+                                if str(result_array_unsorted[i]) != "":
+                                    result_array_tmp.append(result_array_unsorted[i])
+                                
+                            for i in range(4):
+                                result_array.append(result_array_tmp[0])
+                                del result_array_tmp[0]
+                                
+                            service_description = ''
+                            for i in range(len(result_array_tmp)):
+                                service_description = service_description + result_array_tmp[i] + ' '
+                            
+                            tmp_dict = {}
+                            tmp_dict['unit'] = result_array[0]
+                            tmp_dict['load'] = result_array[1]
+                            tmp_dict['active'] = result_array[2]
+                            tmp_dict['sub'] = result_array[3]
+                            tmp_dict['desc'] = service_description.strip()
+                            systemd_services.append(tmp_dict)
+                        except:
+                            print_verbose("An error occured while processing the systemd check output!", True)
+                            agent_log.error("An error occured while processing the systemd check output!")
+                            
+                            if stacktrace:
+                                traceback.print_exc()
+                                
                 
-                if 'customchecks' in jdata[key]:
-                    if jdata[key]['customchecks'] not in (1, "1", "true", "True", 0, "0", "false", "False"):
-                        newconfig['default']['customchecks'] = str(jdata[key]['customchecks'])
-                if 'temperature-fahrenheit' in jdata[key]:
-                    if jdata[key]['temperature-fahrenheit'] in (1, "1", "true", "True"):
-                        newconfig['default']['temperature-fahrenheit'] = "true"
-                    else:
-                        newconfig['default']['temperature-fahrenheit'] = "false"
-                if 'oitc-hostuuid' in jdata[key]:
-                    newconfig['oitc']['hostuuid'] = str(jdata[key]['oitc-hostuuid'])
-                if 'oitc-url' in jdata[key]:
-                    newconfig['oitc']['url'] = str(jdata[key]['oitc-url'])
-                if 'oitc-apikey' in jdata[key]:
-                    newconfig['oitc']['apikey'] = str(jdata[key]['oitc-apikey'])
-                if 'oitc-interval' in jdata[key]:
-                    newconfig['oitc']['interval'] = str(jdata[key]['oitc-interval'])
-                if 'oitc-enabled' in jdata[key]:
-                    if jdata[key]['oitc-enabled'] in (1, "1", "true", "True"):
-                        newconfig['oitc']['enabled'] = "true"
-                    else:
-                        newconfig['oitc']['enabled'] = "false"
-                        
-                if configpath != "":
-                    with open(configpath, 'w') as configfile:
-                        print_verbose("Update agent configuration ...", False)
-                        agent_log.info("Update agent configuration ...")
-                        newconfig.write(configfile)
-                else:
-                    print_verbose("No valid configuration path found", False)
-                    agent_log.error("No valid configuration path found")
+                systemd_services_data['result'] = systemd_services
+                systemd_services_data['last_updated_timestamp'] = round(time.time())
+                systemd_services_data['last_updated'] = time.ctime()
             
-            elif key == 'config' and not file_readable(configpath):
-                print_verbose("Agent configuration file not readable", False)
-                agent_log.error("Agent configuration file not readable")
+        except:
+            print_verbose('An error occured while running the systemd status check!', True)
+            agent_log.error('An error occured while running the systemd status check!')
             
-            if key == 'customchecks' and file_readable(config['default']['customchecks']):
-                newcustomchecks = configparser.ConfigParser(allow_no_value=True)
-                if isPython3:
-                    newcustomchecks.read_string(sample_customcheck_config)
-                else:
-                    newcustomchecks.readfp(io.BytesIO(sample_customcheck_config))
+            if stacktrace:
+                traceback.print_exc()
                 
-                for customkey in jdata[key]:
-                    newcustomchecks[customkey] = {}
-                    
-                    if customkey == 'default':
-                        if 'max_worker_threads' in jdata[key][customkey]:
-                            newcustomchecks[customkey]['max_worker_threads'] = str(jdata[key][customkey]['max_worker_threads'])
-                    else:
+    
+    if len(systemd_services_data) > 0:
+        cached_check_data['systemd_services'] = systemd_services_data
+        publish_check_data()
+    print_verbose('Systemd services check finished', False)
+    agent_log.info('Systemd services check finished')
+    
+    
+def check_alfresco_stats():
+    """Function that starts as a thread to run the alfresco stats check
+        
+    Function that a jmx query to get a status result for a configured alfresco enterprise instance.
+
+    """
+    global alfresco_stats_data
+    global cached_check_data
+    
+    agent_log.info('Start alfresco stats check at %s' % (str(round(time.time()))))
+    if verbose:
+        print('Start alfresco stats check at %s' % (str(round(time.time()))))
+        
+    
+    alfrescostats = []
+    if jmx_import_successfull and 'alfrescostats' in config['default'] and config['default']['alfrescostats'] in (1, "1", "true", "True", True):
+        if file_readable(config['default']['alfresco-javapath']):
+            try:
+                uri = ("%s:%s%s" % (config['default']['alfresco-jmxaddress'], config['default']['alfresco-jmxport'], config['default']['alfresco-jmxpath']))
+                alfresco_jmxConnection = JMXConnection("service:jmx:rmi:///jndi/rmi://" + uri, config['default']['alfresco-jmxuser'], config['default']['alfresco-jmxpassword'], config['default']['alfresco-javapath'])
+                alfresco_jmxQueryString = "java.lang:type=Memory/HeapMemoryUsage/used;java.lang:type=OperatingSystem/SystemLoadAverage;java.lang:type=Threading/ThreadCount;Alfresco:Name=Runtime/TotalMemory;Alfresco:Name=Runtime/FreeMemory;Alfresco:Name=Runtime/MaxMemory;Alfresco:Name=WorkflowInformation/NumberOfActivitiWorkflowInstances;Alfresco:Name=WorkflowInformation/NumberOfActivitiTaskInstances;Alfresco:Name=Authority/NumberOfGroups;Alfresco:Name=Authority/NumberOfUsers;Alfresco:Name=RepoServerMgmt/UserCountNonExpired;Alfresco:Name=ConnectionPool/NumActive;Alfresco:Name=License/RemainingDays;Alfresco:Name=License/CurrentUsers;Alfresco:Name=License/MaxUsers"
+                
+                if 'alfresco-jmxquery' in config and config['default']['alfresco-jmxquery'] != "":
+                    print("customquerx")
+                    agent_log.info("customquerx")
+                    alfresco_jmxQueryString = config['default']['alfresco-jmxquery']
+                
+                alfresco_jmxQuery = [JMXQuery(alfresco_jmxQueryString)]
+                alfresco_metrics = alfresco_jmxConnection.query(alfresco_jmxQuery)
+                
+                for metric in alfresco_metrics:
+                    alfrescostats.append({
+                        'name': metric.to_query_string(),
+                        'value': str(metric.value),
+                        'value_type': str(metric.value_type)
+                    })
+                
+            except subprocess.CalledProcessError as e:
+                alfrescostats = "An error occured during alfresco stats check while connecting to jmx!"
+                print_verbose(alfrescostats, True)
+                agent_log.error(alfrescostats)
+                
+                if stacktrace:
+                    traceback.print_exc()
                     
-                        if 'command' in jdata[key][customkey]:
-                            newcustomchecks[customkey]['command'] = str(jdata[key][customkey]['command'])
-                        if 'interval' in jdata[key][customkey]:
-                            if int(jdata[key][customkey]['interval']) > 0:
-                                newcustomchecks[customkey]['interval'] = str(jdata[key][customkey]['interval'])
-                        if 'timeout' in jdata[key][customkey]:
-                            if int(jdata[key][customkey]['timeout']) > 0:
-                                newcustomchecks[customkey]['timeout'] = str(jdata[key][customkey]['timeout'])
-                        if 'enabled' in jdata[key][customkey]:
-                            newcustomchecks[customkey]['enabled'] = "false"
-                            if jdata[key][customkey]['enabled'] in (1, "1", "true", "True"):
-                                newcustomchecks[customkey]['enabled'] = "true"
-                            
-                if config['default']['customchecks'] != "":
-                    with open(config['default']['customchecks'], 'w') as configfile:
-                        print_verbose("Update customchecks configuration ...", False)
-                        agent_log.info("Update customchecks configuration ...")
-                        newcustomchecks.write(configfile)
-                else:
-                    print_verbose("No valid customchecks configuration path found", False)
-                    agent_log.error("No valid customchecks configuration path found")
+            except:
+                alfrescostats = "An error occured during alfresco stats check!"
+                print_verbose(alfrescostats, True)
+                agent_log.error(alfrescostats)
+                
+                if stacktrace:
+                    traceback.print_exc()
             
-            elif key == 'customchecks' and not file_readable(config['default']['customchecks']):
-                print_verbose("Customchecks configuration file not readable", False)
-                agent_log.error("Customchecks configuration file not readable")
+        else:
+            alfrescostats = 'JAVA instance not found! (' + config['default']['alfresco-javapath'] + ')';
+    
+    alfresco_stats_data['result'] = alfrescostats
+    cached_check_data['alfrescostats'] = alfrescostats
+    publish_check_data()
+    print_verbose('Alfresco stats check finished', False)
+    agent_log.info('Alfresco stats check finished')
+
+
+def check_qemu_stats(timeout):
+    """Function that starts as a thread to run the qemu status check
+    
+    Linux only! (beta)
+    
+    Function that runs a (ps) command (as python subprocess) to get a status result for each running qemu (kvm) virtual machine.
+
+    Parameters
+    ----------
+    timeout
+        Command timeout in seconds
+
+    """
+    global qemu_stats_data
+    global cached_check_data
+    
+    agent_log.info('Start qemu status check with timeout of %ss at %s' % (str(timeout), str(round(time.time()))))
+    if verbose:
+        print('Start qemu status check with timeout of %ss at %s' % (str(timeout), str(round(time.time()))))
+        
+    
+    tmp_qemu_stats_result = None
+    
+    # regex source: https://gist.github.com/kitschysynq/867caebec581cee4c44c764b4dd2bde7
+    # qemu_command = "ps -ef | awk -e '/qemu/ && !/awk/ && !/openitcockpit-agent/' | sed -e 's/[^/]*/\n/' -e 's/ -/\n\t-/g'" # customized (without secure character escape)
+    qemu_command = "ps -ef | gawk -e '/qemu/ && !/gawk/ && !/openitcockpit-agent/' | sed -e 's/[^/]*/\\n/' -e 's/ -/\\n\\t-/g'" # customized
+    
+    try:
+        p = spawn_process(qemu_command)
+        
+        try:
+            stdout, stderr = p.communicate(timeout=int(timeout))
+            p.poll()
+            if stdout:
+                stdout = stdout.decode()
+            if stderr:
+                stderr = stderr.decode()
+            tmp_qemu_stats_result = str(stdout)
+            qemu_stats_data['error'] = None if str(stderr) == 'None' else str(stderr)
+            qemu_stats_data['returncode'] = p.returncode
+        except subprocess.TimeoutExpired:
+            print_verbose('Qemu status check timed out', False)
+            agent_log.warning('Qemu status check timed out')
+            p.kill()    #not needed; just to be sure
+            qemu_stats_data['result'] = None
+            qemu_stats_data['error'] = 'Qemu status check timeout after ' + str(timeout) + ' seconds'
+            qemu_stats_data['returncode'] = 124
+    
+    except:
+        print_verbose('An error occured while running the qemu status check!', True)
+        agent_log.error('An error occured while running the qemu status check!')
+        
+        if stacktrace:
+            traceback.print_exc()
             
-        load_main_processing()
+    
+    if tmp_qemu_stats_result is not None and qemu_stats_data['returncode'] == 0:
+        ordered_results = []
+        qemuresults = tmp_qemu_stats_result.split('\n\n')
+        for machine in qemuresults:
+            machine_data = {}
+            for line in machine.split('\n'):
+                line = line.strip()
+                
+                if line.split(' ')[0].strip().startswith('-'):
+                    option = line.split(' ')[0].strip()
+                    arrayoption = option[1:]
+                    if arrayoption not in machine_data:
+                        machine_data[arrayoption] = line.split(option)[1].strip()
+                    else:
+                        if isinstance(machine_data[arrayoption], list):
+                            machine_data[arrayoption].append(line.split(option)[1].strip())
+                        else:
+                            current_content = machine_data[arrayoption]
+                            machine_data[arrayoption] = []
+                            machine_data[arrayoption].append(current_content)
+                            machine_data[arrayoption].append(line.split(option)[1].strip())
+                
+            ordered_results.append(machine_data)
+        
+        qemu_stats_data['result'] = ordered_results
+        qemu_stats_data['last_updated_timestamp'] = round(time.time())
+        qemu_stats_data['last_updated'] = time.ctime()
+        
+    elif qemu_stats_data['error'] is None and tmp_qemu_stats_result != "":
+        if qemu_stats_data['returncode'] == 1 and tmp_qemu_stats_result.startswith('sed:'):
+            qemu_stats_data['error'] = "No qemu machines running"
+        else:
+            qemu_stats_data['error'] = tmp_qemu_stats_result
+    
+    if len(qemu_stats_data) > 0:
+        cached_check_data['qemustats'] = qemu_stats_data
+        publish_check_data()
+    print_verbose('Qemu status check finished', False)
+    agent_log.info('Qemu status check finished')
+
+
+def check_docker_stats(timeout):
+    """Function that starts as a thread to run the docker status check
+    
+    Linux only!
+    
+    Function that runs a docker command (as python subprocess) to get a status result for each running docker container.
+
+    Parameters
+    ----------
+    timeout
+        Command timeout in seconds
+
+    """
+    global docker_stats_data
+    global cached_check_data
+    
+    print('Start docker status check with timeout of %ss at %s' % (str(timeout), str(round(time.time()))))
+    if verbose:
+        agent_log.info('Start docker status check with timeout of %ss at %s' % (str(timeout), str(round(time.time()))))
+    
+    tmp_docker_stats_result = ''
+    
+    docker_stats_command = 'docker stats --no-stream --format "stats;{{.ID}};{{.Name}};{{.CPUPerc}};{{.MemUsage}};{{.MemPerc}};{{.NetIO}};{{.BlockIO}};{{.PIDs}}"'
+    if system == 'windows':
+        docker_stats_command = 'docker stats --no-stream --format "stats;{{.ID}};{{.Name}};{{.CPUPerc}};{{.MemUsage}};;{{.NetIO}};{{.BlockIO}};"'   #fill not existing 'MemPerc' and 'PIDs' with empty ; separated value
+    docker_container_list_command = 'docker container list -a -s --format "cl;{{.ID}};{{.Status}};{{.Size}};{{.Image}};{{.RunningFor}};{{.Names}}"'
+
+    try:
+        p = spawn_process(docker_stats_command)
+        p2 = spawn_process(docker_container_list_command)
         
-    except Exception as e:
-        print_verbose("An error occurred while processing the new configuration", True)
-        agent_log.error("An error occurred while processing the new configuration")
-        agent_log.exception(e)
+        try:
+            stdout, stderr = p.communicate(timeout=int(timeout))
+            stdout2, stderr2 = p2.communicate(timeout=int(timeout))
+            p.poll()
+            p2.poll()
+            if stdout:
+                tmp_docker_stats_result = tmp_docker_stats_result + stdout.decode()
+            if stdout2:
+                tmp_docker_stats_result = tmp_docker_stats_result + stdout2.decode()
+            if stderr:
+                stderr = stderr.decode()
+            if stderr2:
+                stderr2 = stderr2.decode()
+
+            docker_stats_data['error'] = None if str(stderr) == 'None' else str(stderr)
+            docker_stats_data['error'] = None if str(stderr) == 'None' and str(stderr2) == 'None' else str(stderr2)
+            docker_stats_data['returncode'] = p.returncode
+        except subprocess.TimeoutExpired:
+            print_verbose('Docker status check timed out', False)
+            agent_log.error('Docker status check timed out')
+            p.kill()    #not needed; just to be sure
+            p2.kill()
+            docker_stats_data['result'] = None
+            docker_stats_data['error'] = 'Docker status check timeout after ' + str(timeout) + ' seconds'
+            docker_stats_data['returncode'] = 124
+    
+    except:
+        print_verbose('An error occured while running the docker status check!', True)
+        agent_log.error('An error occured while running the docker status check!')
         
         if stacktrace:
             traceback.print_exc()
-            print(e)
             
+    
+    if tmp_docker_stats_result != '' and docker_stats_data['returncode'] == 0:
+        results = tmp_docker_stats_result.split('\n')
+        sorted_data = []
+        sorted_stats_data = []
+        sorted_cl_data = []
+        for result in results:
+            if result.strip() != "":
+                try:
+                    result_array = result.strip().split(';')
+                    tmp_dict = {}
+                    if result_array[0] == 'stats':
+                        tmp_dict['id'] = result_array[1]
+                        tmp_dict['name'] = result_array[2]
+                        tmp_dict['cpu_percent'] = result_array[3]
+                        tmp_dict['memory_usage'] = result_array[4]
+                        tmp_dict['memory_percent'] = result_array[5]
+                        tmp_dict['net_io'] = result_array[6]
+                        tmp_dict['block_io'] = result_array[7]
+                        tmp_dict['pids'] = result_array[8]
+                        sorted_stats_data.append(tmp_dict)
+                    if result_array[0] == 'cl':
+                        tmp_dict['id'] = result_array[1]
+                        tmp_dict['status'] = result_array[2]
+                        tmp_dict['size'] = result_array[3]
+                        tmp_dict['image'] = result_array[4]
+                        tmp_dict['created'] = result_array[5]
+                        tmp_dict['name'] = result_array[6]
+                        sorted_cl_data.append(tmp_dict)
+                except:
+                    print_verbose("An error occured while processing the docker check output! Seems like there are no docker containers.", True)
+                    agent_log.error("An error occured while processing the docker check output! Seems like there are no docker containers.")
+                    
+                    if stacktrace:
+                        traceback.print_exc()
 
-class ThreadedHTTPServer(ThreadingMixIn, HTTPServer):
-    """Handle requests in a separate thread."""
-    daemon_threads = True
+        for cl_data in sorted_cl_data:
+            tmp_dict = cl_data
 
-class AgentWebserver(BaseHTTPRequestHandler):
+            for stats_data in sorted_stats_data:
+                if stats_data['id'] == cl_data['id']:
+                    tmp_dict['name'] = stats_data['name']
+                    tmp_dict['cpu_percent'] = stats_data['cpu_percent']
+                    tmp_dict['memory_usage'] = stats_data['memory_usage']
+                    tmp_dict['memory_percent'] = stats_data['memory_percent']
+                    tmp_dict['net_io'] = stats_data['net_io']
+                    tmp_dict['block_io'] = stats_data['block_io']
+                    tmp_dict['pids'] = stats_data['pids']
+            sorted_data.append(tmp_dict)
     
-    """Webserver class
+        docker_stats_data['result'] = sorted_data
+        docker_stats_data['last_updated_timestamp'] = round(time.time())
+        docker_stats_data['last_updated'] = time.ctime()
+    elif docker_stats_data['error'] is None and tmp_docker_stats_result != "":
+        docker_stats_data['error'] = tmp_docker_stats_result
+    
+    if len(docker_stats_data) > 0:
+        cached_check_data['dockerstats'] = docker_stats_data
+        publish_check_data()
+    print_verbose('Docker status check finished', False)
+    agent_log.info('Docker status check finished')
 
+
+def collector_job_done(name, job):
+    """Function (future callback) to update the counters of a finished collector job
+    
     Parameters
     ----------
-    BaseHTTPRequestHandler
-        BaseHTTPRequestHandler
+    name
+        Name of the collector job
+    job
+        Job object (see submit_collector_job())
 
     """
+    now = monotonic_time()
+    with collector_lock:
+        counters = collector_counters[name]
+        counters['last_duration'] = round(now - job['started'], 3)
+        if now > job['deadline'] and not job['timed_out']:
+            counters['overrun'] += 1
+    
+    if job['future'].exception() is not None:
+        print_verbose_without_lock('An error occured while running the collector job "%s"!' % (name), True)
+        agent_log.error('An error occured while running the collector job "%s"!' % (name))
+    else:
+        default_check_section_collected(name)
 
-    def _set_headers(self):
-        self.send_response(200)
-        self.send_header('Content-type', 'application/json')
-        self.end_headers()
+
+def submit_collector_job(name, function, args, timeout, now):
+    """Function to run a collector job (docker, qemu, systemd or alfresco check) in the collector thread pool
     
+    A collector job is never submitted while its previous run is still in flight (queued or running);
+    in that case the run is skipped and, if the previous run passed its deadline, counted as timed out (once per run).
+    A run that finishes after its deadline (but was not counted as timed out) is counted as overrun.
     
-    def do_AUTHHEAD(self):
-        self.send_response(401)
-        self.send_header('WWW-Authenticate', 'Basic realm=')
-        self.send_header('Content-type', 'text/html')
-       
-        self.end_headers()
-        
+    Parameters
+    ----------
+    name
+        Name of the collector job
+    function
+        Function to run
+    args
+        Arguments for the function
+    timeout
+        Time in seconds until the deadline of this run
+    now
+        Current time of the monotonic clock (monotonic_time())
     
-    def get_csr(self):
-        """Returns new csr
-
-        Calls create_new_csr()
+    Returns
+    -------
+    bool
+        True if the job was submitted, False if it was skipped
 
-        Returns
-        -------
-        FILETYPE_PEM
-            Certificate request (csr) in FILETYPE_PEM format.
+    """
+    with collector_lock:
+        if name not in collector_counters:
+            collector_counters[name] = {'runs': 0, 'skipped': 0, 'overrun': 0, 'timed_out': 0, 'last_duration': None}
+        counters = collector_counters[name]
+        
+        job = collector_jobs.get(name)
+        if job is not None and not job['future'].done():
+            counters['skipped'] += 1
+            if now > job['deadline'] and not job['timed_out']:
+                job['timed_out'] = True
+                counters['timed_out'] += 1
+                print_verbose_without_lock('Collector job "%s" did not finish within %ss' % (name, str(job['timeout'])), False)
+                agent_log.warning('Collector job "%s" did not finish within %ss' % (name, str(job['timeout'])))
+            return False
+        
+        job = {
+            'started': now,
+            'timeout': timeout,
+            'deadline': now + timeout,
+            'timed_out': False,
+            'future': collector_executor.submit(function, *args)
+        }
+        collector_jobs[name] = job
+        counters['runs'] += 1
+    
+    job['future'].add_done_callback(lambda future: collector_job_done(name, job))
+    return True
 
-        """
-        return create_new_csr()
 
+def get_collector_stats():
+    """Function to get the counters of the collector jobs
     
-    def build_json_config(self):
-        """Build / Prepare config for a JSON object
+    Returns
+    -------
+    dict
+        Collector job name -> runs, skipped, overrun, timed_out, last_duration (seconds) and in_flight
 
-        Build and returns the current configuration as object (dict).
+    """
+    stats = {}
+    with collector_lock:
+        for name, counters in collector_counters.items():
+            stats[name] = dict(counters)
+            stats[name]['in_flight'] = name in collector_jobs and not collector_jobs[name]['future'].done()
+    return stats
 
-        Returns
-        -------
-        data
-            Dictionary object with the current configuration
 
-        """
-        data = {}
-        data['config'] = {}
-        data['customchecks'] = {}
-        
-        for key in config['default']:
-            data['config'][key] = config['default'][key]
-        for key in config['oitc']:
-            data['config']['oitc-'+key] = config['oitc'][key]
+def collect_data_for_cache():
+    """Function (scheduled job) to process the default checks
+    
+    Submits the docker, qemu, systemd and alfresco checks (with timeout = section interval) to the collector thread pool if configured and due
+    and runs the default checks.
+    Scheduled in the greatest common divisor of the intervals of all default check sections (see get_default_checks_interval()).
+
+    """
+    global cached_check_data
+    
+    now = monotonic_time()
+    try:
+        update_governor(now)
+    except:
+        print_verbose_without_lock("Could not update the agent governor!", True)
+        agent_log.error("Could not update the agent governor!")
         
-        for customkey in customchecks:
-            data['customchecks'][customkey] = {}
-            if customkey == 'default':
-                data['customchecks'][customkey]['max_worker_threads'] = customchecks[customkey]['max_worker_threads']
-            else:
-                for customkeyoption in customchecks[customkey]:
-                    data['customchecks'][customkey][customkeyoption] = customchecks[customkey][customkeyoption]
+        if stacktrace:
+            traceback.print_exc()
+    
+    try:
+        if config['default']['dockerstats'] in (1, "1", "true", "True") and default_check_section_is_due('dockerstats', now):
+            print('run dockerstats')
+            update_default_check_section('dockerstats', None, now)
+            timeout = get_default_check_section_interval('dockerstats')
+            submit_collector_job('dockerstats', check_docker_stats, (timeout, ), timeout, now)
+        if jmx_import_successfull and 'alfrescostats' in config['default'] and config['default']['alfrescostats'] in (1, "1", "true", "True", True) and default_check_section_is_due('alfrescostats', now):
+            print('run alfrescostats')
+            update_default_check_section('alfrescostats', None, now)
+            submit_collector_job('alfrescostats', check_alfresco_stats, (), get_default_check_section_interval('alfrescostats'), now)
+        if system == 'linux':
+            if config['default']['qemustats'] in (1, "1", "true", "True") and default_check_section_is_due('qemustats', now):
+                print('run qemustats')
+                update_default_check_section('qemustats', None, now)
+                timeout = get_default_check_section_interval('qemustats')
+                submit_collector_job('qemustats', check_qemu_stats, (timeout, ), timeout, now)
+            if config['default']['systemdservices'] in (1, "1", "true", "True") and default_check_section_is_due('systemdservices', now):
+                print('run systemdservices')
+                update_default_check_section('systemdservices', None, now)
+                timeout = get_default_check_section_interval('systemdservices')
+                submit_collector_job('systemdservices', check_systemd_services, (timeout, ), timeout, now)
         
-        if 'DEFAULT' in data['customchecks']:
-            del data['customchecks']['DEFAULT']
-            
-        if data['config']['auth'] != "":
-            data['config']['auth'] = str(base64.b64decode(data['config']['auth']), "utf-8")
+        cached_check_data = run_default_checks()
+        publish_check_data()
+    except:
+        print_verbose_without_lock("Could not run default checks!", True)
+        agent_log.error("Could not run default checks!")
         
-        return data
+        if stacktrace:
+            traceback.print_exc()
+
+
+def run_customcheck_command(check, due):
+    """Function that starts as a thread (future) to process a custom check command
     
+    Process a custom check command until a given timeout.
+    With shell = false, the command is executed directly (without /bin/sh) with the arguments split at config load.
+    The result is posted to the custom check result queue when the future is done (see run_customchecks()).
     
-    def _process_get_data(self):
-        self._set_headers()
-        
-        if self.path == "/":
-            self.wfile.write(json.dumps(cached_check_data).encode())
-        elif self.path == "/config" and config['default']['config-update-mode'] in (1, "1", "true", "True", True):
-            self.wfile.write(json.dumps(self.build_json_config()).encode())
-        elif self.path == "/getCsr":
-            data = {}
-            if autossl:
-                data['csr'] = self.get_csr().decode("utf-8")
-            else:
-                data['csr'] = "disabled"
-            self.wfile.write(json.dumps(data).encode())
-        
+    Parameters
+    ----------
+    check
+        Object containing the specific check data (name, command, timeout, shell, args, executable)
+    due
+        Time of the monotonic clock when the check was due
     
-    def do_GET(self):
-        try:
-            if 'auth' in config['default']:
-                if str(config['default']['auth']).strip() and self.headers.get('Authorization') == None:
-                    self.do_AUTHHEAD()
-                    self.wfile.write('no auth header received'.encode())
-                elif self.headers.get('Authorization') == 'Basic ' + config['default']['auth'] or config['default']['auth'] == "":
-                    self._process_get_data()
-                elif str(config['default']['auth']).strip():
-                    self.do_AUTHHEAD()
-                    self.wfile.write(self.headers.get('Authorization').encode())
-                    self.wfile.write('not authenticated'.encode())
-            else:
-                self._process_get_data()
-        except:
-            if stacktrace:
-                traceback.print_exc()
-                
-                
-    def _process_post_data(self, data):
-        executor = futures.ThreadPoolExecutor(max_workers=1)
-        returnMessage = {}
-        returnMessage['success'] = False
+    Returns
+    -------
+    dict
+        result, error and returncode of the command (empty if the command could not be run)
+
+    """
+    started = record_customcheck_start(check['name'], due)
+    print_verbose('Start custom check "%s" with timeout %s at %s' % (str(check['name']), str(check['timeout']), str(round(time.time()))), False)
+    agent_log.info('Start custom check "%s" with timeout %s at %s' % (str(check['name']), str(check['timeout']), str(round(time.time()))))
+    
+    result = {}
+    try:
+        p = spawn_process(check['command'], check['shell'], check.get('args'), check.get('executable'))
         
-        if self.path == "/config" and config['default']['config-update-mode'] in (1, "1", "true", "True", True):
-            executor.submit(check_update_data, data)
-            returnMessage['success'] = True
+        try:
+            stdout, stderr = p.communicate(timeout=int(check['timeout']))
+            p.poll()
+            if stdout:
+                stdout = stdout.decode()
+            if stderr:
+                stderr = stderr.decode()
+            result['result'] = str(stdout)
+            result['error'] = None if str(stderr) == 'None' else str(stderr)
+            result['returncode'] = p.returncode
+        except subprocess.TimeoutExpired:
+            print_verbose('Custom check "%s" timed out' % (check['name']), False)
+            agent_log.error('Custom check "%s" timed out' % (check['name']))
+            p.kill()    #not needed; just to be sure
+            result['result'] = None
+            result['error'] = 'Command timeout after ' + str(check['timeout']) + ' seconds'
+            result['returncode'] = 124
+    
+    except:
+        print_verbose('An error occured while running the custom check "%s"!' % (check['name']), True)
+        agent_log.error('An error occured while running the custom check "%s"!' % (check['name']))
         
-        elif self.path == "/updateCrt" and autossl:
-            permanent_webserver_thread(update_crt_files, (data,))
-            returnMessage['success'] = True
-
-        self._set_headers()
-        self.wfile.write(json.dumps(returnMessage).encode())
+        if stacktrace:
+            traceback.print_exc()
     
+    finally:
+        record_customcheck_end(started)
+    return result
+
+
+def read_persistent_customcheck_output(process, lines):
+    """Function that starts as a thread to read the output of a persistent custom check coprocess
     
-    def do_POST(self):
-        try:
-            if 'auth' in config['default']:
-                if str(config['default']['auth']).strip() and self.headers.get('Authorization') == None:
-                    self.do_AUTHHEAD()
-                    self.wfile.write('no auth header received'.encode())
-                elif self.headers.get('Authorization') == 'Basic ' + config['default']['auth'] or config['default']['auth'] == "":
-                    self.wfile.write(json.dumps(self._process_post_data(data=self.rfile.read(int(self.headers['Content-Length'])))).encode())
-                elif str(config['default']['auth']).strip():
-                    self.do_AUTHHEAD()
-                    self.wfile.write(self.headers.get('Authorization').encode())
-                    self.wfile.write('not authenticated'.encode())
-            else:
-                self._process_post_data(data=self.rfile.read(int(self.headers['Content-Length'])))
+    Parameters
+    ----------
+    process
+        Coprocess (subprocess.Popen)
+    lines
+        Queue for the output lines (None after the coprocess closed its stdout)
 
-        except:
-            print_verbose('Caught something in do_POST', True)
-            if stacktrace:
-                traceback.print_exc()
-                
+    """
+    for line in iter(process.stdout.readline, b''):
+        lines.put(line)
+    lines.put(None)
+
+
+def start_persistent_customcheck(check, entry):
+    """Function to start the coprocess of a persistent custom check
     
-    def log_message(self, format, *args):
-        agent_log.info("%s - - [%s] %s" % (self.address_string(),self.log_date_time_string(),format%args))
-        if verbose:
-            print("%s - - [%s] %s" % (self.address_string(),self.log_date_time_string(),format%args))
-        return
+    Parameters
+    ----------
+    check
+        Custom check (name, command, shell, args, executable)
+    entry
+        State of the persistent custom check (see request_persistent_customcheck())
 
+    """
+    if check['shell']:
+        process = subprocess.Popen(check['command'], shell=True, stdin=subprocess.PIPE, stdout=subprocess.PIPE, start_new_session=(os.name == 'posix'))
+    else:
+        process = subprocess.Popen(check['args'], executable=check['executable'], stdin=subprocess.PIPE, stdout=subprocess.PIPE, start_new_session=(os.name == 'posix'))
+    
+    entry['process'] = process
+    entry['lines'] = Queue()
+    entry['starts'] += 1
+    thread = Thread(target=read_persistent_customcheck_output, args=(process, entry['lines']))
+    thread.daemon = True
+    thread.start()
     
+    print_verbose_without_lock('Started persistent custom check "%s" (pid %d)' % (check['name'], process.pid), False)
+    agent_log.info('Started persistent custom check "%s" (pid %d)' % (check['name'], process.pid))
 
 
-def check_systemd_services(timeout):
-    """Function that starts as a thread to run the systemd services check
+def stop_persistent_customcheck_process(process, timeout):
+    """Function to stop the coprocess of a persistent custom check
     
-    Linux only! (beta)
+    Closes its stdin (the coprocess should exit at end of input) and kills it if it does not exit within timeout seconds.
     
-    Function that runs a (systemctl) command (as python subprocess) to get a status result for each registered systemd service.
-
     Parameters
     ----------
+    process
+        Coprocess (subprocess.Popen)
     timeout
-        Command timeout in seconds
+        Time in seconds to wait for the coprocess to exit (0 = kill it immediately)
 
     """
-    global systemd_services_data
-    global cached_check_data
+    try:
+        process.stdin.close()
+    except (IOError, OSError):
+        pass
+    try:
+        if timeout > 0:
+            process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        pass
     
-    agent_log.info('Start systemd services check with timeout of %ss at %s' % (str(timeout), str(round(time.time()))))
-    if verbose:
-        print('Start systemd services check with timeout of %ss at %s' % (str(timeout), str(round(time.time()))))
+    if process.poll() is None:
+        kill_customcheck_process(process)
+        try:
+            process.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            pass
+
+
+def persistent_customcheck_failed(check, entry, error):
+    """Function to stop a failed persistent custom check coprocess and schedule its restart
     
-    systemd_services_data['running'] = "true"
+    The restart is delayed with an exponential backoff (up to max_persistent_customcheck_backoff seconds).
     
-    systemd_services = []
-    if system == 'linux' and config['default']['systemdservices'] in (1, "1", "true", "True"):
-        systemd_stats_command = "systemctl list-units --type=service --all --no-legend --no-pager --no-ask-password"
+    Parameters
+    ----------
+    check
+        Custom check (name, command, timeout)
+    entry
+        State of the persistent custom check (see request_persistent_customcheck())
+    error
+        Error message
+
+    """
+    if entry['process'] is not None:
+        stop_persistent_customcheck_process(entry['process'], 0)
+    entry['process'] = None
+    entry['lines'] = None
+    entry['failures'] += 1
+    delay = min(2 ** (entry['failures'] - 1), max_persistent_customcheck_backoff)
+    entry['retry_after'] = monotonic_time() + delay
+    
+    print_verbose_without_lock('Persistent custom check "%s" failed (%d times in a row): %s, restart in %ss' % (check['name'], entry['failures'], error, str(delay)), False)
+    agent_log.error('Persistent custom check "%s" failed (%d times in a row): %s, restart in %ss' % (check['name'], entry['failures'], error, str(delay)))
+
+
+def request_persistent_customcheck(check):
+    """Function to request a result from the coprocess of a persistent custom check (type = persistent)
+    
+    The coprocess is started on the first request and kept running.
+    For each request, the agent writes one json line to its stdin: {"id": sequence, "check": name, "timeout": timeout}
+    and reads the result as one json line from its stdout: {"id": sequence, "returncode": 0, "output": "OK - ..."}.
+    The answer has to echo the id of the request; a different id means the output is out of step with the requests
+    (e.g. a late answer of a timed out request) and is handled as a framing error.
+    If the coprocess exits, does not answer within the check timeout or answers something else,
+    it is stopped and restarted with an exponential backoff (see persistent_customcheck_failed()).
+    
+    Parameters
+    ----------
+    check
+        Custom check (name, command, timeout, shell, args, executable)
+    
+    Returns
+    -------
+    dict
+        result, error and returncode of the check (returncode 124 on timeout, 3 if the coprocess failed)
+
+    """
+    with persistent_customchecks_lock:
+        if check['name'] not in persistent_customchecks:
+            persistent_customchecks[check['name']] = {'process': None, 'lines': None, 'starts': 0, 'failures': 0, 'retry_after': 0, 'sequence': 0}
+        entry = persistent_customchecks[check['name']]
+    
+    if entry['process'] is not None and entry['process'].poll() is not None:
+        persistent_customcheck_failed(check, entry, 'Coprocess exited with %s' % (str(entry['process'].returncode)))
+    
+    if entry['process'] is None:
+        now = monotonic_time()
+        if now < entry['retry_after']:
+            return {'result': None, 'error': 'Coprocess failed, restart in %ss' % (str(int(entry['retry_after'] - now + 1))), 'returncode': 3}
         try:
-            tmp_systemd_stats_result = ''
-            p = subprocess.Popen(systemd_stats_command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
-            
-            try:
-                stdout, stderr = p.communicate(timeout=3)
-                p.poll()
-                if stdout:
-                    tmp_systemd_stats_result = tmp_systemd_stats_result + stdout.decode()
-                if stderr:
-                    stderr = stderr.decode()
+            start_persistent_customcheck(check, entry)
+        except (IOError, OSError) as e:
+            persistent_customcheck_failed(check, entry, 'Could not start the coprocess: %s' % (str(e)))
+            return {'result': None, 'error': 'Could not start the coprocess: %s' % (str(e)), 'returncode': 3}
+    
+    entry['sequence'] += 1
+    request_id = entry['sequence']
+    try:
+        entry['process'].stdin.write((json.dumps({'id': request_id, 'check': check['name'], 'timeout': int(check['timeout'])}) + '\n').encode('utf-8'))
+        entry['process'].stdin.flush()
+    except (IOError, OSError, ValueError) as e:
+        persistent_customcheck_failed(check, entry, 'Could not send the request: %s' % (str(e)))
+        return {'result': None, 'error': 'Coprocess failed', 'returncode': 3}
+    
+    try:
+        line = entry['lines'].get(timeout=int(check['timeout']))
+    except Empty:
+        persistent_customcheck_failed(check, entry, 'No answer within %ss' % (str(check['timeout'])))
+        return {'result': None, 'error': 'Command timeout after ' + str(check['timeout']) + ' seconds', 'returncode': 124}
+    if line is None:
+        persistent_customcheck_failed(check, entry, 'Coprocess closed its output')
+        return {'result': None, 'error': 'Coprocess failed', 'returncode': 3}
+    
+    try:
+        answer = json.loads(line.decode('utf-8'))
+        if answer.get('id') != request_id:
+            persistent_customcheck_failed(check, entry, 'Framing error: answer %s to request %s' % (str(answer.get('id')), str(request_id)))
+            return {'result': None, 'error': 'Answer of the coprocess does not match the request', 'returncode': 3}
+        result = {
+            'result': str(answer['output']),
+            'error': None,
+            'returncode': int(answer['returncode'])
+        }
+    except (ValueError, KeyError, TypeError, AttributeError):
+        persistent_customcheck_failed(check, entry, 'Invalid answer: %s' % (line.decode('utf-8', 'replace').strip()[:200]))
+        return {'result': None, 'error': 'Invalid answer of the coprocess', 'returncode': 3}
+    
+    entry['failures'] = 0
+    return result
 
-                systemd_services_data['error'] = None if str(stderr) == 'None' else str(stderr)
-                systemd_services_data['returncode'] = p.returncode
-            except subprocess.TimeoutExpired:
-                print_verbose('systemd status check timed out', False)
-                p.kill()    #not needed; just to be sure
-                systemd_services_data['result'] = None
-                systemd_services_data['error'] = 'systemd status check timeout after 3 seconds'
-                systemd_services_data['returncode'] = 124
-        
-            if tmp_systemd_stats_result != '' and systemd_services_data['returncode'] == 0:
-                results = tmp_systemd_stats_result.split('\n')
-                for result in results:
-                    if result.strip() != "":
-                        try:
-                            result_array_unsorted = result.strip().split(' ')
-                            result_array_tmp = []
-                            result_array = []
-                            for i in range(len(result_array_unsorted)):
-                                if str(result_array_unsorted[i]) != "":
-                                    result_array_tmp.append(result_array_unsorted[i])
-                                
-                            for i in range(4):
-                                result_array.append(result_array_tmp[0])
-                                del result_array_tmp[0]
-                                
-                            service_description = ''
-                            for i in range(len(result_array_tmp)):
-                                service_description = service_description + result_array_tmp[i] + ' '
-                            
-                            tmp_dict = {}
-                            tmp_dict['unit'] = result_array[0]
-                            tmp_dict['load'] = result_array[1]
-                            tmp_dict['active'] = result_array[2]
-                            tmp_dict['sub'] = result_array[3]
-                            tmp_dict['desc'] = service_description.strip()
-                            systemd_services.append(tmp_dict)
-                        except:
-                            print_verbose("An error occured while processing the systemd check output!", True)
-                            agent_log.error("An error occured while processing the systemd check output!")
-                            
-                            if stacktrace:
-                                traceback.print_exc()
-                                
-                
-                systemd_services_data['result'] = systemd_services
-                systemd_services_data['last_updated_timestamp'] = round(time.time())
-                systemd_services_data['last_updated'] = time.ctime()
-            
-        except:
-            print_verbose('An error occured while running the systemd status check!', True)
-            agent_log.error('An error occured while running the systemd status check!')
-            
-            if stacktrace:
-                traceback.print_exc()
-                
+
+def run_persistent_customcheck(check, due):
+    """Function that starts as a thread (future) to process a persistent custom check (type = persistent)
     
-    del systemd_services_data['running']
-    if len(systemd_services_data) > 0:
-        cached_check_data['systemd_services'] = systemd_services_data
-    print_verbose('Systemd services check finished', False)
-    agent_log.info('Systemd services check finished')
+    The result is posted to the custom check result queue when the future is done (see run_customchecks()).
     
+    Parameters
+    ----------
+    check
+        Object containing the specific check data (name, command, timeout, shell, args, executable)
+    due
+        Time of the monotonic clock when the check was due
     
-def check_alfresco_stats():
-    """Function that starts as a thread to run the alfresco stats check
-        
-    Function that a jmx query to get a status result for a configured alfresco enterprise instance.
+    Returns
+    -------
+    dict
+        result, error and returncode of the check (empty if the request failed unexpectedly)
 
     """
-    global alfresco_stats_data
-    global cached_check_data
+    started = record_customcheck_start(check['name'], due)
+    print_verbose('Request persistent custom check "%s" with timeout %s at %s' % (str(check['name']), str(check['timeout']), str(round(time.time()))), False)
+    agent_log.info('Request persistent custom check "%s" with timeout %s at %s' % (str(check['name']), str(check['timeout']), str(round(time.time()))))
     
-    agent_log.info('Start alfresco stats check at %s' % (str(round(time.time()))))
-    if verbose:
-        print('Start alfresco stats check at %s' % (str(round(time.time()))))
+    result = {}
+    try:
+        result = request_persistent_customcheck(check)
+    except:
+        print_verbose('An error occured while running the persistent custom check "%s"!' % (check['name']), True)
+        agent_log.error('An error occured while running the persistent custom check "%s"!' % (check['name']))
         
+        if stacktrace:
+            traceback.print_exc()
     
-    alfresco_stats_data['running'] = "true"
+    finally:
+        record_customcheck_end(started)
+    return result
+
+
+def stop_persistent_customchecks():
+    """Function to stop the coprocesses of all persistent custom checks"""
+    with persistent_customchecks_lock:
+        processes = [entry['process'] for entry in persistent_customchecks.values() if entry['process'] is not None]
+        persistent_customchecks.clear()
     
+    for process in processes:
+        try:
+            process.stdin.close()
+        except (IOError, OSError):
+            pass
+    for process in processes:
+        stop_persistent_customcheck_process(process, 1)
     
-    alfrescostats = []
-    if jmx_import_successfull and 'alfrescostats' in config['default'] and config['default']['alfrescostats'] in (1, "1", "true", "True", True):
-        if file_readable(config['default']['alfresco-javapath']):
+    if len(processes) > 0:
+        print_verbose_without_lock('Stopped %d persistent custom checks' % (len(processes)), False)
+        agent_log.info('Stopped %d persistent custom checks' % (len(processes)))
+
+
+def process_customcheck_results(results):
+    """Function that starts as a thread to consume the custom check result queue
+    
+    The only consumer of the queue: saves each result in cached_customchecks_check_data, removes the running flag
+    (that prevents an concurrent execution) and publishes the check results once per drained batch.
+    Stops on None.
+    
+    Parameters
+    ----------
+    results
+        Queue of (check, future, posted) tuples, posted = time of the monotonic clock when the future was done
+
+    """
+    while True:
+        items = [results.get()]
+        try:
+            while True:
+                items.append(results.get_nowait())
+        except Empty:
+            pass
+        
+        stop = False
+        for item in items:
+            if item is None:
+                stop = True
+                continue
+            check, future, posted = item
+            record_customcheck_result_latency(monotonic_time() - posted)
+            
+            result = None
             try:
-                uri = ("%s:%s%s" % (config['default']['alfresco-jmxaddress'], config['default']['alfresco-jmxport'], config['default']['alfresco-jmxpath']))
-                alfresco_jmxConnection = JMXConnection("service:jmx:rmi:///jndi/rmi://" + uri, config['default']['alfresco-jmxuser'], config['default']['alfresco-jmxpassword'], config['default']['alfresco-javapath'])
-                alfresco_jmxQueryString = "java.lang:type=Memory/HeapMemoryUsage/used;java.lang:type=OperatingSystem/SystemLoadAverage;java.lang:type=Threading/ThreadCount;Alfresco:Name=Runtime/TotalMemory;Alfresco:Name=Runtime/FreeMemory;Alfresco:Name=Runtime/MaxMemory;Alfresco:Name=WorkflowInformation/NumberOfActivitiWorkflowInstances;Alfresco:Name=WorkflowInformation/NumberOfActivitiTaskInstances;Alfresco:Name=Authority/NumberOfGroups;Alfresco:Name=Authority/NumberOfUsers;Alfresco:Name=RepoServerMgmt/UserCountNonExpired;Alfresco:Name=ConnectionPool/NumActive;Alfresco:Name=License/RemainingDays;Alfresco:Name=License/CurrentUsers;Alfresco:Name=License/MaxUsers"
-                
-                if 'alfresco-jmxquery' in config and config['default']['alfresco-jmxquery'] != "":
-                    print("customquerx")
-                    agent_log.info("customquerx")
-                    alfresco_jmxQueryString = config['default']['alfresco-jmxquery']
-                
-                alfresco_jmxQuery = [JMXQuery(alfresco_jmxQueryString)]
-                alfresco_metrics = alfresco_jmxConnection.query(alfresco_jmxQuery)
-                
-                for metric in alfresco_metrics:
-                    alfrescostats.append({
-                        'name': metric.to_query_string(),
-                        'value': str(metric.value),
-                        'value_type': str(metric.value_type)
-                    })
-                
-            except subprocess.CalledProcessError as e:
-                alfrescostats = "An error occured during alfresco stats check while connecting to jmx!"
-                print_verbose(alfrescostats, True)
-                agent_log.error(alfrescostats)
-                
-                if stacktrace:
-                    traceback.print_exc()
-                    
+                result = future.result()
             except:
-                alfrescostats = "An error occured during alfresco stats check!"
-                print_verbose(alfrescostats, True)
-                agent_log.error(alfrescostats)
+                print_verbose_without_lock('An error occured while checking custom check "%s" alive!' % (check['name']), True)
+                agent_log.error('An error occured while checking custom check "%s" alive!' % (check['name']))
                 
                 if stacktrace:
                     traceback.print_exc()
             
+            if check['name'] in cached_customchecks_check_data:
+                if result:
+                    cached_customchecks_check_data[check['name']].update(result)
+                cached_customchecks_check_data[check['name']]['last_updated_timestamp'] = round(time.time())
+                cached_customchecks_check_data[check['name']]['last_updated'] = time.ctime()
+                cached_customchecks_check_data[check['name']].pop('running', None)
+            print_verbose_without_lock('Custom check "%s" stopped' % (check['name']), False)
+            agent_log.info('Custom check "%s" stopped' % (check['name']))
+        
+        if len(cached_customchecks_check_data) > 0:
+            cached_check_data['customchecks'] = cached_customchecks_check_data
+            publish_check_data()
+        if stop:
+            return
+
+
+def start_customcheck_results_consumer():
+    """Function to start the consumer thread of the custom check result queue"""
+    global customchecks_results_thread
+    
+    customchecks_results_thread = Thread(target=process_customcheck_results, args=(customchecks_results,), name='oitc_agent_customchecks_results')
+    customchecks_results_thread.daemon = True
+    customchecks_results_thread.start()
+
+
+def stop_customcheck_results_consumer():
+    """Function to stop the consumer thread of the custom check result queue (after the queued results are processed)"""
+    if customchecks_results_thread is not None:
+        customchecks_results.put(None)
+        customchecks_results_thread.join(5)
+
+
+def run_customchecks(executor, checks, due=None):
+    """Function to start custom checks
+    
+    For each custom check (that is not still running or waiting for a worker) an own thread (future) will be spawned to run the custom check command
+    (or to request the coprocess of a persistent custom check) with a given timeout.
+    The future posts itself to the custom check result queue when it is done, so no worker waits for other checks.
+    
+    Parameters
+    ----------
+    executor
+        Thread pool (futures.ThreadPoolExecutor) for the custom check commands
+    checks
+        List of custom checks (name, command, timeout)
+    due
+        Time of the monotonic clock when the checks were due (default: now)
+
+    """
+    if due is None:
+        due = monotonic_time()
+    for check in checks:
+        # if not yet executed, create set timestamp = 0
+        if check['name'] not in cached_customchecks_check_data:
+            cached_customchecks_check_data[check['name']] = {
+                'last_updated': time.ctime(0),
+                'last_updated_timestamp': 0
+            }
+        if 'running' in cached_customchecks_check_data[check['name']]:
+            record_customcheck_skipped(check['name'])
+            continue
+        
+        cached_customchecks_check_data[check['name']]['running'] = "true"
+        cached_customchecks_check_data[check['name']]['command'] = check['command']
+        if check['type'] == 'persistent':
+            future = executor.submit(run_persistent_customcheck, check, due)
         else:
-            alfrescostats = 'JAVA instance not found! (' + config['default']['alfresco-javapath'] + ')';
+            future = executor.submit(run_customcheck_command, check, due)
+        future.add_done_callback(lambda future, check=check, results=customchecks_results: results.put((check, future, monotonic_time())))
+
+
+def init_customchecks_metrics(executor, slots):
+    """Function to initialize the custom check scheduler metrics
     
-    alfresco_stats_data['result'] = alfrescostats
-    cached_check_data['alfrescostats'] = alfrescostats
-    print_verbose('Alfresco stats check finished', False)
-    agent_log.info('Alfresco stats check finished')
-    del alfresco_stats_data['running']
+    Parameters
+    ----------
+    executor
+        Name of the custom check executor (threads or asyncio)
+    slots
+        Number of worker threads or max. concurrent checks
 
+    """
+    with customchecks_metrics_lock:
+        customchecks_metrics['executor'] = executor
+        customchecks_metrics['slots'] = slots
+        customchecks_metrics['reported'] = (monotonic_time(), 0.0)
 
-def check_qemu_stats(timeout):
-    """Function that starts as a thread to run the qemu status check
+
+def record_customcheck_start(name, due):
+    """Function to record the start of a custom check command (lateness and busy slots)
     
-    Linux only! (beta)
+    Parameters
+    ----------
+    name
+        Name of the custom check
+    due
+        Time of the monotonic clock when the check was due
     
-    Function that runs a (ps) command (as python subprocess) to get a status result for each running qemu (kvm) virtual machine.
+    Returns
+    -------
+    float
+        Start time (monotonic clock) for record_customcheck_end()
 
+    """
+    started = monotonic_time()
+    lateness = round(max(0.0, started - due), 3)
+    with customchecks_metrics_lock:
+        customchecks_metrics['busy'] += 1
+        customchecks_metrics['started_sum'] += started
+        if name not in customchecks_metrics['checks']:
+            customchecks_metrics['checks'][name] = {'runs': 0, 'skipped': 0, 'lateness': None, 'max_lateness': 0.0}
+        metrics = customchecks_metrics['checks'][name]
+        metrics['runs'] += 1
+        metrics['lateness'] = lateness
+        metrics['max_lateness'] = max(metrics['max_lateness'], lateness)
+    return started
+
+
+def record_customcheck_end(started):
+    """Function to record the end of a custom check command
+    
     Parameters
     ----------
-    timeout
-        Command timeout in seconds
+    started
+        Start time returned by record_customcheck_start()
 
     """
-    global qemu_stats_data
-    global cached_check_data
-    
-    agent_log.info('Start qemu status check with timeout of %ss at %s' % (str(timeout), str(round(time.time()))))
-    if verbose:
-        print('Start qemu status check with timeout of %ss at %s' % (str(timeout), str(round(time.time()))))
-        
-    
-    tmp_qemu_stats_result = None
-    qemu_stats_data['running'] = "true"
+    with customchecks_metrics_lock:
+        customchecks_metrics['busy'] -= 1
+        customchecks_metrics['started_sum'] -= started
+        customchecks_metrics['busy_seconds'] += monotonic_time() - started
+
+
+def record_customcheck_skipped(name):
+    """Function to record a custom check run that was skipped, because the previous run was still running or waiting for a slot
     
-    # regex source: https://gist.github.com/kitschysynq/867caebec581cee4c44c764b4dd2bde7
-    # qemu_command = "ps -ef | awk -e '/qemu/ && !/awk/ && !/openitcockpit-agent/' | sed -e 's/[^/]*/\n/' -e 's/ -/\n\t-/g'" # customized (without secure character escape)
-    qemu_command = "ps -ef | gawk -e '/qemu/ && !/gawk/ && !/openitcockpit-agent/' | sed -e 's/[^/]*/\\n/' -e 's/ -/\\n\\t-/g'" # customized
+    Parameters
+    ----------
+    name
+        Name of the custom check
+
+    """
+    with customchecks_metrics_lock:
+        if name not in customchecks_metrics['checks']:
+            customchecks_metrics['checks'][name] = {'runs': 0, 'skipped': 0, 'lateness': None, 'max_lateness': 0.0}
+        customchecks_metrics['checks'][name]['skipped'] += 1
+
+
+def record_customcheck_result_latency(latency):
+    """Function to record the time a custom check result waited in the result queue
     
-    try:
-        p = subprocess.Popen(qemu_command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
-        
-        try:
-            stdout, stderr = p.communicate(timeout=int(timeout))
-            p.poll()
-            if stdout:
-                stdout = stdout.decode()
-            if stderr:
-                stderr = stderr.decode()
-            tmp_qemu_stats_result = str(stdout)
-            qemu_stats_data['error'] = None if str(stderr) == 'None' else str(stderr)
-            qemu_stats_data['returncode'] = p.returncode
-        except subprocess.TimeoutExpired:
-            print_verbose('Qemu status check timed out', False)
-            agent_log.warning('Qemu status check timed out')
-            p.kill()    #not needed; just to be sure
-            qemu_stats_data['result'] = None
-            qemu_stats_data['error'] = 'Qemu status check timeout after ' + str(timeout) + ' seconds'
-            qemu_stats_data['returncode'] = 124
+    Parameters
+    ----------
+    latency
+        Time in seconds
+
+    """
+    with customchecks_metrics_lock:
+        customchecks_metrics['latency_sum'] += latency
+        customchecks_metrics['latency_count'] += 1
+        customchecks_metrics['latency_max'] = max(customchecks_metrics['latency_max'], latency)
+
+
+def get_customchecks_metrics():
+    """Function to get the custom check scheduler metrics
     
-    except:
-        print_verbose('An error occured while running the qemu status check!', True)
-        agent_log.error('An error occured while running the qemu status check!')
-        
-        if stacktrace:
-            traceback.print_exc()
-            
+    Utilization (busy time of all slots) and result queue latency are measured since the previous call.
     
-    if tmp_qemu_stats_result is not None and qemu_stats_data['returncode'] == 0:
-        ordered_results = []
-        qemuresults = tmp_qemu_stats_result.split('\n\n')
-        for machine in qemuresults:
-            machine_data = {}
-            for line in machine.split('\n'):
-                line = line.strip()
-                
-                if line.split(' ')[0].strip().startswith('-'):
-                    option = line.split(' ')[0].strip()
-                    arrayoption = option[1:]
-                    if arrayoption not in machine_data:
-                        machine_data[arrayoption] = line.split(option)[1].strip()
-                    else:
-                        if isinstance(machine_data[arrayoption], list):
-                            machine_data[arrayoption].append(line.split(option)[1].strip())
-                        else:
-                            current_content = machine_data[arrayoption]
-                            machine_data[arrayoption] = []
-                            machine_data[arrayoption].append(current_content)
-                            machine_data[arrayoption].append(line.split(option)[1].strip())
-                
-            ordered_results.append(machine_data)
+    Returns
+    -------
+    dict
+        executor, slots, busy_slots, utilization (0 - 1), queue_latency (avg, max in seconds),
+        deferred (checks waiting for their jitter or start slot), rate_limited (starts delayed by max_starts_per_second),
+        persistent (pid, starts and failures of the persistent custom check coprocesses)
+        and per check runs, skipped, lateness and max_lateness (seconds between due and start of the command)
+
+    """
+    now = monotonic_time()
+    with customchecks_metrics_lock:
+        metrics = customchecks_metrics
+        # busy time of the finished and (until now) of the running commands
+        busy_seconds = metrics['busy_seconds'] + metrics['busy'] * now - metrics['started_sum']
+        utilization = None
+        if metrics['reported'] is not None and metrics['slots'] > 0 and now > metrics['reported'][0]:
+            utilization = round(min(1.0, (busy_seconds - metrics['reported'][1]) / ((now - metrics['reported'][0]) * metrics['slots'])), 3)
+        metrics['reported'] = (now, busy_seconds)
         
-        qemu_stats_data['result'] = ordered_results
-        qemu_stats_data['last_updated_timestamp'] = round(time.time())
-        qemu_stats_data['last_updated'] = time.ctime()
+        queue_latency = None
+        if metrics['latency_count'] > 0:
+            queue_latency = {
+                'avg': round(metrics['latency_sum'] / metrics['latency_count'], 4),
+                'max': round(metrics['latency_max'], 4)
+            }
+        metrics['latency_sum'] = 0.0
+        metrics['latency_count'] = 0
+        metrics['latency_max'] = 0.0
         
-    elif qemu_stats_data['error'] is None and tmp_qemu_stats_result != "":
-        if qemu_stats_data['returncode'] == 1 and tmp_qemu_stats_result.startswith('sed:'):
-            qemu_stats_data['error'] = "No qemu machines running"
-        else:
-            qemu_stats_data['error'] = tmp_qemu_stats_result
+        return {
+            'executor': metrics['executor'],
+            'slots': metrics['slots'],
+            'busy_slots': metrics['busy'],
+            'utilization': utilization,
+            'queue_latency': queue_latency,
+            'deferred': len(customchecks_splay['deferred']),
+            'rate_limited': customchecks_splay['rate_limited'],
+            'persistent': get_persistent_customchecks_stats(),
+            'checks': { name: dict(check) for name, check in metrics['checks'].items() }
+        }
+
+
+def get_persistent_customchecks_stats():
+    """Function to get the state of the persistent custom check coprocesses
     
-    if len(qemu_stats_data) > 0:
-        cached_check_data['qemustats'] = qemu_stats_data
-    print_verbose('Qemu status check finished', False)
-    agent_log.info('Qemu status check finished')
-    del qemu_stats_data['running']
+    Returns
+    -------
+    dict
+        Custom check name -> pid (None if not running), starts and failures (in a row)
 
+    """
+    stats = {}
+    with persistent_customchecks_lock:
+        for name, entry in persistent_customchecks.items():
+            stats[name] = {
+                'pid': entry['process'].pid if entry['process'] is not None else None,
+                'starts': entry['starts'],
+                'failures': entry['failures']
+            }
+    return stats
 
-def check_docker_stats(timeout):
-    """Function that starts as a thread to run the docker status check
+
+def customchecks_asyncio_supported():
+    """Function to check if the asyncio custom check executor can be used
     
-    Linux only!
+    Subprocesses in an event loop of a non-main thread need python >= 3.8 (threaded child watcher).
     
-    Function that runs a docker command (as python subprocess) to get a status result for each running docker container.
+    Returns
+    -------
+    bool
+        True if supported
+
+    """
+    return isPython3 and sys.version_info >= (3, 8)
+
 
+def start_customchecks_loop(max_concurrent_checks):
+    """Function to start the event loop thread of the asyncio custom check executor
+    
     Parameters
     ----------
-    timeout
-        Command timeout in seconds
+    max_concurrent_checks
+        Max. number of custom check commands running at the same time
 
     """
-    global docker_stats_data
-    global cached_check_data
-    
-    print('Start docker status check with timeout of %ss at %s' % (str(timeout), str(round(time.time()))))
-    if verbose:
-        agent_log.info('Start docker status check with timeout of %ss at %s' % (str(timeout), str(round(time.time()))))
-    
-    tmp_docker_stats_result = ''
-    docker_stats_data['running'] = "true"
+    global customchecks_loop
+    global customchecks_loop_thread
+    global customchecks_child_watcher
+    
+    customchecks_async_state['limit'] = max_concurrent_checks
+    customchecks_loop = asyncio.new_event_loop()
+    if sys.version_info < (3, 12) and hasattr(asyncio, 'PidfdChildWatcher') and hasattr(os, 'pidfd_open'):
+        # the default child watcher of python < 3.12 waits for each command in an own thread
+        # (closed and replaced by the default one again in stop_customchecks_loop())
+        customchecks_child_watcher = asyncio.PidfdChildWatcher()
+        customchecks_child_watcher.attach_loop(customchecks_loop)
+        asyncio.set_child_watcher(customchecks_child_watcher)
+    customchecks_loop_thread = Thread(target=run_customchecks_loop, args=(customchecks_loop,), name='oitc_agent_customchecks_loop')
+    customchecks_loop_thread.daemon = True
+    customchecks_loop_thread.start()
+
+
+def run_customchecks_loop(loop):
+    """Function that starts as a thread to run the event loop of the asyncio custom check executor
     
-    docker_stats_command = 'docker stats --no-stream --format "stats;{{.ID}};{{.Name}};{{.CPUPerc}};{{.MemUsage}};{{.MemPerc}};{{.NetIO}};{{.BlockIO}};{{.PIDs}}"'
-    if system == 'windows':
-        docker_stats_command = 'docker stats --no-stream --format "stats;{{.ID}};{{.Name}};{{.CPUPerc}};{{.MemUsage}};;{{.NetIO}};{{.BlockIO}};"'   #fill not existing 'MemPerc' and 'PIDs' with empty ; separated value
-    docker_container_list_command = 'docker container list -a -s --format "cl;{{.ID}};{{.Status}};{{.Size}};{{.Image}};{{.RunningFor}};{{.Names}}"'
+    Parameters
+    ----------
+    loop
+        asyncio event loop
 
+    """
+    asyncio.set_event_loop(loop)
     try:
-        p = subprocess.Popen(docker_stats_command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
-        p2 = subprocess.Popen(docker_container_list_command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
-        
+        loop.run_forever()
+    finally:
         try:
-            stdout, stderr = p.communicate(timeout=int(timeout))
-            stdout2, stderr2 = p2.communicate(timeout=int(timeout))
-            p.poll()
-            p2.poll()
-            if stdout:
-                tmp_docker_stats_result = tmp_docker_stats_result + stdout.decode()
-            if stdout2:
-                tmp_docker_stats_result = tmp_docker_stats_result + stdout2.decode()
-            if stderr:
-                stderr = stderr.decode()
-            if stderr2:
-                stderr2 = stderr2.decode()
+            # let the killed commands exit, so their transports are closed before the loop
+            tasks = [task for task in asyncio.all_tasks(loop) if not task.done()]
+            tasks.extend([loop.create_task(process.wait()) for process in customchecks_async_state['killed']])
+            if len(tasks) > 0:
+                loop.run_until_complete(asyncio.wait(tasks, timeout=2))
+                loop.run_until_complete(asyncio.sleep(0.1))
+            loop.close()
+        except:
+            pass
 
-            docker_stats_data['error'] = None if str(stderr) == 'None' else str(stderr)
-            docker_stats_data['error'] = None if str(stderr) == 'None' and str(stderr2) == 'None' else str(stderr2)
-            docker_stats_data['returncode'] = p.returncode
-        except subprocess.TimeoutExpired:
-            print_verbose('Docker status check timed out', False)
-            agent_log.error('Docker status check timed out')
-            p.kill()    #not needed; just to be sure
-            p2.kill()
-            docker_stats_data['result'] = None
-            docker_stats_data['error'] = 'Docker status check timeout after ' + str(timeout) + ' seconds'
-            docker_stats_data['returncode'] = 124
+
+def stop_customchecks_loop():
+    """Function to stop the event loop of the asyncio custom check executor
     
-    except:
-        print_verbose('An error occured while running the docker status check!', True)
-        agent_log.error('An error occured while running the docker status check!')
-        
-        if stacktrace:
-            traceback.print_exc()
+    Running custom check commands are killed and the child watcher of the event loop is closed,
+    so a reload does not leave it attached to the old loop.
+
+    """
+    global customchecks_child_watcher
+    
+    if customchecks_loop is None:
+        return
+    customchecks_async_state['stopping'] = True
+    
+    try:
+        customchecks_loop.call_soon_threadsafe(kill_customchecks_async, customchecks_loop)
+    except RuntimeError:
+        pass    # loop already closed
+    customchecks_loop_thread.join(5)
+    
+    if customchecks_child_watcher is not None:
+        try:
+            customchecks_child_watcher.close()
+            asyncio.set_child_watcher(None)    # the policy creates its default watcher again on demand
+        except:
+            print_verbose_without_lock("Could not close the child watcher of the custom check event loop!", True)
+            agent_log.error("Could not close the child watcher of the custom check event loop!")
             
+            if stacktrace:
+                traceback.print_exc()
+        customchecks_child_watcher = None
+
+
+def kill_customchecks_async(loop):
+    """Function (event loop callback) to kill all running custom check commands and stop the event loop
     
-    if tmp_docker_stats_result != '' and docker_stats_data['returncode'] == 0:
-        results = tmp_docker_stats_result.split('\n')
-        sorted_data = []
-        sorted_stats_data = []
-        sorted_cl_data = []
-        for result in results:
-            if result.strip() != "":
-                try:
-                    result_array = result.strip().split(';')
-                    tmp_dict = {}
-                    if result_array[0] == 'stats':
-                        tmp_dict['id'] = result_array[1]
-                        tmp_dict['name'] = result_array[2]
-                        tmp_dict['cpu_percent'] = result_array[3]
-                        tmp_dict['memory_usage'] = result_array[4]
-                        tmp_dict['memory_percent'] = result_array[5]
-                        tmp_dict['net_io'] = result_array[6]
-                        tmp_dict['block_io'] = result_array[7]
-                        tmp_dict['pids'] = result_array[8]
-                        sorted_stats_data.append(tmp_dict)
-                    if result_array[0] == 'cl':
-                        tmp_dict['id'] = result_array[1]
-                        tmp_dict['status'] = result_array[2]
-                        tmp_dict['size'] = result_array[3]
-                        tmp_dict['image'] = result_array[4]
-                        tmp_dict['created'] = result_array[5]
-                        tmp_dict['name'] = result_array[6]
-                        sorted_cl_data.append(tmp_dict)
-                except:
-                    print_verbose("An error occured while processing the docker check output! Seems like there are no docker containers.", True)
-                    agent_log.error("An error occured while processing the docker check output! Seems like there are no docker containers.")
-                    
-                    if stacktrace:
-                        traceback.print_exc()
+    Parameters
+    ----------
+    loop
+        asyncio event loop
 
-        for cl_data in sorted_cl_data:
-            tmp_dict = cl_data
+    """
+    for run in list(customchecks_async_state['running'].values()):
+        if run['process'] is not None:
+            kill_customcheck_process(run['process'])
+            customchecks_async_state['killed'].append(run['process'])
+    customchecks_async_state['pending'].clear()
+    loop.stop()
 
-            for stats_data in sorted_stats_data:
-                if stats_data['id'] == cl_data['id']:
-                    tmp_dict['name'] = stats_data['name']
-                    tmp_dict['cpu_percent'] = stats_data['cpu_percent']
-                    tmp_dict['memory_usage'] = stats_data['memory_usage']
-                    tmp_dict['memory_percent'] = stats_data['memory_percent']
-                    tmp_dict['net_io'] = stats_data['net_io']
-                    tmp_dict['block_io'] = stats_data['block_io']
-                    tmp_dict['pids'] = stats_data['pids']
-            sorted_data.append(tmp_dict)
+
+def kill_customcheck_process(process):
+    """Function to kill a custom check command started by the asyncio custom check executor (or a persistent custom check coprocess)
+    
+    On posix systems the whole process group is killed, so no child process of the shell keeps running (and keeps the output pipe open).
+    
+    Parameters
+    ----------
+    process
+        asyncio.subprocess.Process or subprocess.Popen object (started in a new session)
+
+    """
+    if process.returncode is not None:
+        return
+    try:
+        if os.name == 'posix':
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except OSError:
+        pass
+
+
+def run_customchecks_async(checks, due=None):
+    """Function to start custom checks in the asyncio custom check executor
     
-        docker_stats_data['result'] = sorted_data
-        docker_stats_data['last_updated_timestamp'] = round(time.time())
-        docker_stats_data['last_updated'] = time.ctime()
-    elif docker_stats_data['error'] is None and tmp_docker_stats_result != "":
-        docker_stats_data['error'] = tmp_docker_stats_result
+    Custom checks that are still running (or waiting for a free slot) are skipped.
     
-    if len(docker_stats_data) > 0:
-        cached_check_data['dockerstats'] = docker_stats_data
-    print_verbose('Docker status check finished', False)
-    agent_log.info('Docker status check finished')
-    del docker_stats_data['running']
+    Parameters
+    ----------
+    checks
+        List of custom checks (name, command, timeout)
+    due
+        Time of the monotonic clock when the checks were due (default: now)
+
+    """
+    if due is None:
+        due = monotonic_time()
+    need_to_be_checked = []
+    for check in checks:
+        if check['name'] not in cached_customchecks_check_data:
+            cached_customchecks_check_data[check['name']] = {
+                'last_updated': time.ctime(0),
+                'last_updated_timestamp': 0
+            }
+        if 'running' in cached_customchecks_check_data[check['name']]:
+            record_customcheck_skipped(check['name'])
+            continue
+        cached_customchecks_check_data[check['name']]['running'] = "true"
+        cached_customchecks_check_data[check['name']]['command'] = check['command']
+        need_to_be_checked.append(check)
+    
+    if len(need_to_be_checked) > 0:
+        customchecks_loop.call_soon_threadsafe(queue_customchecks_async, need_to_be_checked, due)
 
 
-def collect_data_for_cache(check_interval):
-    """Function that starts as a thread to process the default checks
+def queue_customchecks_async(checks, due):
+    """Function (event loop callback) to queue custom checks and start as many as allowed
     
-    Function to process the default checks with a given check interval.
-    Starts the docker and qemu stats check threads (with timeout = check_interval) if configured.
-    It also runs the daily certificate expiration check.
+    Parameters
+    ----------
+    checks
+        List of custom checks (name, command, timeout)
+    due
+        Time of the monotonic clock when the checks were due
+
+    """
+    customchecks_async_state['pending'].extend([(check, due) for check in checks])
+    start_pending_customchecks_async()
+
+
+def start_pending_customchecks_async():
+    """Function (event loop callback) to start waiting custom checks until max_concurrent_checks commands are running"""
+    state = customchecks_async_state
+    while len(state['pending']) > 0 and len(state['running']) < state['limit']:
+        check, due = state['pending'].popleft()
+        print_verbose_without_lock('Start custom check "%s" with timeout %s at %s' % (str(check['name']), str(check['timeout']), str(round(time.time()))), False)
+        agent_log.info('Start custom check "%s" with timeout %s at %s' % (str(check['name']), str(check['timeout']), str(round(time.time()))))
+        
+        run = {
+            'check': check,
+            'started': record_customcheck_start(check['name'], due),
+            'process': None,
+            'task': None,
+            'timer': None,
+            'timed_out': False,
+            'finished': False
+        }
+        state['running'][check['name']] = run
+        run['timer'] = customchecks_loop.call_later(int(check['timeout']), customcheck_async_timeout, run)
+        try:
+            if check['shell']:
+                coroutine = asyncio.create_subprocess_shell(check['command'], stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT, start_new_session=(os.name == 'posix'))
+            else:
+                coroutine = asyncio.create_subprocess_exec(*check['args'], executable=check['executable'], stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT, start_new_session=(os.name == 'posix'))
+            run['task'] = customchecks_loop.create_task(coroutine)
+        except:
+            print_verbose_without_lock('An error occured while running the custom check "%s"!' % (check['name']), True)
+            agent_log.error('An error occured while running the custom check "%s"!' % (check['name']))
+            
+            if stacktrace:
+                traceback.print_exc()
+            
+            finish_customcheck_async(run, None)
+            continue
+        run['task'].add_done_callback(lambda task, run=run: customcheck_async_started(run, task))
+
 
+def customcheck_async_started(run, task):
+    """Function (task callback) to read the output of a started custom check command
+    
     Parameters
     ----------
-    check_interval
-        Time in seconds to wait before running the next default check
+    run
+        Object of the custom check run (check, process, task, timer)
+    task
+        Finished task that created the subprocess
 
     """
-    global permanent_check_thread_running
-    global cached_check_data
+    if task.cancelled():
+        return
+    if task.exception() is not None:
+        print_verbose_without_lock('An error occured while running the custom check "%s"!' % (run['check']['name']), True)
+        agent_log.error('An error occured while running the custom check "%s": %s' % (run['check']['name'], str(task.exception())))
+        finish_customcheck_async(run, None)
+        return
+    
+    run['process'] = task.result()
+    if run['timed_out'] or customchecks_async_state['stopping']:
+        kill_customcheck_process(run['process'])
+        return
+    run['task'] = customchecks_loop.create_task(run['process'].communicate())
+    run['task'].add_done_callback(lambda task, run=run: customcheck_async_communicated(run, task))
 
-    permanent_check_thread_running = True
+
+def customcheck_async_communicated(run, task):
+    """Function (task callback) to save the result of a finished custom check command
     
-    time.sleep(1)
-    if check_interval <= 0:
-        check_interval = 5
-    check_interval_counter = check_interval
-    cert_expiration_interval_counter = 0
+    Parameters
+    ----------
+    run
+        Object of the custom check run (check, process, task, timer)
+    task
+        Finished task that read the output of the subprocess
+
+    """
+    if task.cancelled():
+        return
+    if task.exception() is not None:
+        print_verbose_without_lock('An error occured while running the custom check "%s"!' % (run['check']['name']), True)
+        agent_log.error('An error occured while running the custom check "%s": %s' % (run['check']['name'], str(task.exception())))
+        finish_customcheck_async(run, None)
+        return
     
-    while not thread_stop_requested:
-        if check_interval_counter >= check_interval:
-            try:
-                if autossl and cert_expiration_interval_counter >= 86400:   # approx. every day - time of run_default_checks()
-                    executor = futures.ThreadPoolExecutor(max_workers=1)
-                    executor.submit(check_auto_certificate)
-                    cert_expiration_interval_counter = 0
-            except:
-                print_verbose_without_lock("Error while starting the regularly certificate expiration check!", True)
-                agent_log.error("Error while starting the regularly certificate expiration check!")
-                
-                if stacktrace:
-                    traceback.print_exc()
-                    
-            
-            try:
-                if config['default']['dockerstats'] in (1, "1", "true", "True") and 'running' not in docker_stats_data:
-                    print('run dockerstats')
-                    thread = Thread(target = check_docker_stats, args = (check_interval, ))
-                    thread.start()
-                    #thread.join()
-                if jmx_import_successfull and 'alfrescostats' in config['default'] and config['default']['alfrescostats'] in (1, "1", "true", "True", True):
-                    print('run alfrescostats')
-                    thread = Thread(target = check_alfresco_stats)
-                    thread.start()
-                if system == 'linux':
-                    if config['default']['qemustats'] in (1, "1", "true", "True") and 'running' not in qemu_stats_data:
-                        print('run qemustats')
-                        thread = Thread(target = check_qemu_stats, args = (check_interval, ))
-                        thread.start()
-                    if config['default']['systemdservices'] in (1, "1", "true", "True") and 'running' not in systemd_services_data:
-                        print('run systemdservices')
-                        thread = Thread(target = check_systemd_services, args = (check_interval, ))
-                        thread.start()
-                
-                cached_check_data = run_default_checks()
-            except:
-                print_verbose_without_lock("Could not run default checks!", True)
-                agent_log.error("Could not run default checks!")
-                
-                if stacktrace:
-                    traceback.print_exc()
-                    
-            check_interval_counter = 0
-        time.sleep(1)
-        check_interval_counter += 1
-        cert_expiration_interval_counter += 1
+    stdout, stderr = task.result()
+    if stdout:
+        stdout = stdout.decode()
+    if stderr:
+        stderr = stderr.decode()
+    finish_customcheck_async(run, {
+        'result': str(stdout),
+        'error': None if str(stderr) == 'None' else str(stderr),
+        'returncode': run['process'].returncode
+    })
+
+
+def customcheck_async_timeout(run):
+    """Function (event loop timer) to kill a custom check command that exceeds its timeout
+    
+    Parameters
+    ----------
+    run
+        Object of the custom check run (check, process, task, timer)
+
+    """
+    run['timed_out'] = True
+    print_verbose_without_lock('Custom check "%s" timed out' % (run['check']['name']), False)
+    agent_log.error('Custom check "%s" timed out' % (run['check']['name']))
     
-    permanent_check_thread_running = False
-    print_verbose('Stopped permanent_check_thread', False)
-    agent_log.info('Stopped permanent_check_thread')
+    if run['process'] is not None:
+        kill_customcheck_process(run['process'])
+    if run['task'] is not None:
+        run['task'].cancel()
+    finish_customcheck_async(run, {
+        'result': None,
+        'error': 'Command timeout after ' + str(run['check']['timeout']) + ' seconds',
+        'returncode': 124
+    })
 
 
-def run_customcheck_command(check):
-    """Function that starts as a thread (future) to process a custom check command
+def finish_customcheck_async(run, result):
+    """Function (event loop callback) to save the result of a custom check run, free its slot and publish the results
     
-    Process a custom check command until a given timeout.
-    The result will be added to the cached_customchecks_check_data object.
+    Results of checks that finish in the same event loop iteration are published together.
     
-    process_customcheck_results() takes care of a may dying run_customcheck_command thread.
+    Parameters
+    ----------
+    run
+        Object of the custom check run (check, process, task, timer)
+    result
+        Dictionary with result, error and returncode or None (error, keep the last result)
+
+    """
+    if run['finished']:
+        return
+    run['finished'] = True
+    run['timer'].cancel()
+    record_customcheck_end(run['started'])
+    
+    name = run['check']['name']
+    if name in cached_customchecks_check_data:
+        if result is not None:
+            cached_customchecks_check_data[name].update(result)
+        cached_customchecks_check_data[name]['last_updated_timestamp'] = round(time.time())
+        cached_customchecks_check_data[name]['last_updated'] = time.ctime()
+        cached_customchecks_check_data[name].pop('running', None)
+    print_verbose_without_lock('Custom check "%s" stopped' % (name), False)
+    agent_log.info('Custom check "%s" stopped' % (name))
+    
+    del customchecks_async_state['running'][name]
+    start_pending_customchecks_async()
+    
+    if not customchecks_async_state['publish_pending']:
+        customchecks_async_state['publish_pending'] = True
+        customchecks_loop.call_soon(publish_customchecks_async)
+
+
+def publish_customchecks_async():
+    """Function (event loop callback) to publish the custom check results"""
+    customchecks_async_state['publish_pending'] = False
+    if len(cached_customchecks_check_data) > 0:
+        cached_check_data['customchecks'] = cached_customchecks_check_data
+        publish_check_data()
+
 
+def split_customcheck_command(command):
+    """Function to split a custom check command (shell = false) into its arguments
+    
+    The program is looked up in PATH once, so it does not need to be searched on each run
+    and subprocess can start it with posix_spawn.
+    
     Parameters
     ----------
-    check
-        Object containing the specific check data (name, command, timeout)
+    command
+        Custom check command
+    
+    Returns
+    -------
+    tuple
+        List of arguments (shell syntax like quotes and escapes resolved) and the path of the program (None if not found in PATH)
+    
+    Raises
+    ------
+    ValueError
+        If the command is empty or can not be split (e.g. no closing quotation)
 
     """
-    print_verbose('Start custom check "%s" with timeout %s at %s' % (str(check['name']), str(check['timeout']), str(round(time.time()))), False)
-    agent_log.info('Start custom check "%s" with timeout %s at %s' % (str(check['name']), str(check['timeout']), str(round(time.time()))))
-    cached_customchecks_check_data[check['name']]['running'] = "true"
-    cached_customchecks_check_data[check['name']]['command'] = check['command']
+    args = shlex.split(command)
+    if len(args) == 0:
+        raise ValueError('Empty command')
     
-    try:
-        p = subprocess.Popen(check['command'], shell=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
-        
-        try:
-            stdout, stderr = p.communicate(timeout=int(check['timeout']))
-            p.poll()
-            if stdout:
-                stdout = stdout.decode()
-            if stderr:
-                stderr = stderr.decode()
-            cached_customchecks_check_data[check['name']]['result'] = str(stdout)
-            cached_customchecks_check_data[check['name']]['error'] = None if str(stderr) == 'None' else str(stderr)
-            cached_customchecks_check_data[check['name']]['returncode'] = p.returncode
-        except subprocess.TimeoutExpired:
-            print_verbose('Custom check "%s" timed out' % (check['name']), False)
-            agent_log.error('Custom check "%s" timed out' % (check['name']))
-            p.kill()    #not needed; just to be sure
-            cached_customchecks_check_data[check['name']]['result'] = None
-            cached_customchecks_check_data[check['name']]['error'] = 'Command timeout after ' + str(check['timeout']) + ' seconds'
-            cached_customchecks_check_data[check['name']]['returncode'] = 124
+    executable = args[0]
+    if isPython3 and os.path.dirname(executable) == '':
+        executable = shutil.which(executable)
+    return args, executable
+
+
+def get_customcheck_phase(name, interval):
+    """Function to get the fixed offset of a custom check within its interval
     
-    except:
-        print_verbose('An error occured while running the custom check "%s"!' % (check['name']), True)
-        agent_log.error('An error occured while running the custom check "%s"!' % (check['name']))
-        
-        if stacktrace:
-            traceback.print_exc()
+    The offset is derived from a hash of the check name, so it is the same after each restart
+    and the checks of one interval are spread evenly across it.
     
-    cached_customchecks_check_data[check['name']]['last_updated_timestamp'] = round(time.time())
-    cached_customchecks_check_data[check['name']]['last_updated'] = time.ctime()
-    del cached_customchecks_check_data[check['name']]['running']
-    return True
+    Parameters
+    ----------
+    name
+        Name of the custom check
+    interval
+        Interval of the custom check in seconds
+    
+    Returns
+    -------
+    float
+        Offset in seconds (0 <= offset < interval)
+
+    """
+    return (zlib.crc32(name.encode('utf-8')) & 0xffffffff) % (interval * 1000) / 1000.0
 
 
-def process_customcheck_results(future_checks):
-    """Function that starts as a thread (future) to collect the custom check results
+def start_customchecks(checks, due):
+    """Function to start custom checks in the configured custom check executor
     
-    Wait until all custom check threads finished and remove the running flag (that prevents an concurrent execution) if a thread had errors and does not return True.
-    Overwrite the cached custom check check data with the new one(if there is was any result).
+    Parameters
+    ----------
+    checks
+        List of custom checks (name, command, timeout)
+    due
+        Time of the monotonic clock when the checks were due
+
+    """
+    if customchecks_loop is not None:
+        # persistent custom checks do not start a process, they always run in the thread pool
+        persistent_checks = [check for check in checks if check['type'] == 'persistent']
+        checks = [check for check in checks if check['type'] != 'persistent']
+        if len(persistent_checks) > 0:
+            run_customchecks(customchecks_executor, persistent_checks, due)
+        if len(checks) > 0:
+            run_customchecks_async(checks, due)
+    else:
+        run_customchecks(customchecks_executor, checks, due)
+
 
+def run_splayed_customcheck(check):
+    """Function (scheduled job) to start a custom check on its (splayed) deadline
+    
+    The start is delayed by a random time of 0 - jitter seconds and, if max_starts_per_second is set,
+    until the next free start slot (one start every 1 / max_starts_per_second seconds, not for persistent custom checks).
+    A delayed check is started by a one time job (start_deferred_customcheck()),
+    runs of a check that is still running or waiting for its start are skipped.
+    
     Parameters
     ----------
-    future_checks
-        Object containing the running custom check threads (futures)
+    check
+        Custom check (name, command, timeout)
 
     """
-    for future in futures.as_completed(future_checks):   #, timeout=10
-        check = future_checks[future]
-        try:
-            if not future.result(): # if run_customcheck_command do not return True (exception/error)
-                del cached_customchecks_check_data[check['name']]['running']
-            print_verbose('Custom check "%s" stopped' % (check['name']), False)
-            agent_log.info('Custom check "%s" stopped' % (check['name']))
-        except:
-            print_verbose('An error occured while checking custom check "%s" alive!' % (check['name']), True)
-            agent_log.error('An error occured while checking custom check "%s" alive!' % (check['name']))
-            
-            if stacktrace:
-                traceback.print_exc()
-                
+    name = check['name']
+    if name in customchecks_splay['deferred'] or 'running' in cached_customchecks_check_data.get(name, {}):
+        record_customcheck_skipped(name)
+        return
     
-    if len(cached_customchecks_check_data) > 0:
-        cached_check_data['customchecks'] = cached_customchecks_check_data
+    now = monotonic_time()
+    due = now
+    if customchecks_splay['jitter'] > 0:
+        due = now + random.uniform(0, customchecks_splay['jitter'])
+    start = due
+    if customchecks_splay['max_starts_per_second'] > 0 and check['type'] != 'persistent':
+        if customchecks_splay['next_start'] > start:
+            start = customchecks_splay['next_start']
+            customchecks_splay['rate_limited'] += 1
+        customchecks_splay['next_start'] = start + 1.0 / customchecks_splay['max_starts_per_second']
+    
+    if start > now:
+        customchecks_splay['deferred'].add(name)
+        schedule_job('custom check %s (deferred)' % (name), start_deferred_customcheck, (check, due), delay=start - now, inline=True)
+    else:
+        start_customchecks([check], due)
 
 
-def collect_customchecks_data_for_cache(customchecks):
-    """Function that starts as a thread to manage the custom checks 
+def start_deferred_customcheck(check, due):
+    """Function (scheduled job) to start a custom check that was delayed by jitter or max_starts_per_second
     
-    For each custom check an own thread (future) will (in a configured interval) be spawned to run the custom check command with a given timeout.
+    Parameters
+    ----------
+    check
+        Custom check (name, command, timeout)
+    due
+        Time of the monotonic clock when the check was due (including the jitter)
+
+    """
+    customchecks_splay['deferred'].discard(check['name'])
+    start_customchecks([check], due)
 
+
+def collect_customchecks_data_for_cache(customchecks):
+    """Function to schedule the custom checks
+    
+    Each custom check is scheduled as an own job (run_splayed_customcheck()).
+    With splay = true (default), the first run is delayed by a fixed offset within the interval (see get_customcheck_phase()),
+    so checks with the same interval do not start at once.
+    Custom checks with type = persistent keep their command running as coprocess (see request_persistent_customcheck()).
+    
     Parameters
     ----------
     customchecks
         Configuration object that will be used to read the configured custom checks
 
     """
-    global permanent_customchecks_check_thread_running
-    permanent_customchecks_check_thread_running = True
+    global customchecks_executor
+    
     max_workers = 4
-    if 'DEFAULT' in customchecks:
-        if 'max_worker_threads' in customchecks['DEFAULT']:
-            max_workers = int(customchecks['DEFAULT']['max_worker_threads'])
-    if 'default' in customchecks:
-        if 'max_worker_threads' in customchecks['default']:
-            max_workers = int(customchecks['default']['max_worker_threads'])
-            
-    print_verbose('Start thread pool with max. %s workers' % (str(max_workers)), False)
-    agent_log.info('Start thread pool with max. %s workers' % (str(max_workers)))
-    
-    executor = futures.ThreadPoolExecutor(max_workers=max_workers)
-    
-    while not thread_stop_requested:
-        need_to_be_checked = []
-        for check_name in customchecks:
-            if check_name != 'DEFAULT' and check_name != 'default':
-                if 'command' in customchecks[check_name] and customchecks[check_name]['command'] != '' and ('enabled' not in customchecks[check_name] or customchecks[check_name]['enabled'] in (1, "1", "true", "True", True)):
-                    command = customchecks[check_name]['command']
-                    interval = int(config['default']['interval'])
-                    timeout = 60
-                    
-                    if customchecks[check_name]['interval']:
-                        interval = int(customchecks[check_name]['interval'])
-                    if customchecks[check_name]['timeout']:
-                        timeout = int(customchecks[check_name]['timeout'])
-                    
-                    # if not yet executed, create set timestamp = 0
-                    if check_name not in cached_customchecks_check_data:
-                        cached_customchecks_check_data[check_name] = {
-                            'last_updated': time.ctime(0),
-                            'last_updated_timestamp': 0
-                        }
-                    
-                    # execute if difference from timestamp of the last run and now greater or equal than interval
-                    if (round(time.time()) - cached_customchecks_check_data[check_name]['last_updated_timestamp']) >= interval and 'running' not in cached_customchecks_check_data[check_name]:
-                        check = {
-                            'name': check_name,
-                            'command': command,
-                            'timeout': timeout
-                        }
-                        need_to_be_checked.append(check)
-        
-        # Start the load operations and mark each future with its URL
-        if len(need_to_be_checked) > 0:
-            future_checks = {
-                executor.submit(run_customcheck_command, check): check for check in need_to_be_checked
-            }
-            executor.submit(process_customcheck_results, future_checks) #, timeout=biggestTimeout
-        
-        time.sleep(1)
-    permanent_customchecks_check_thread_running = False
-    print_verbose('Stopped permanent_customchecks_check_thread', False)
-    agent_log.info('Stopped permanent_customchecks_check_thread')
+    executor = 'threads'
+    max_concurrent_checks = 128
+    splay = True
+    for section in ('DEFAULT', 'default'):
+        if section in customchecks:
+            if 'max_worker_threads' in customchecks[section]:
+                max_workers = int(customchecks[section]['max_worker_threads'])
+            if 'executor' in customchecks[section] and customchecks[section]['executor']:
+                executor = customchecks[section]['executor'].strip().lower()
+            if 'max_concurrent_checks' in customchecks[section] and customchecks[section]['max_concurrent_checks']:
+                max_concurrent_checks = max(1, int(customchecks[section]['max_concurrent_checks']))
+            if 'splay' in customchecks[section] and customchecks[section]['splay']:
+                splay = customchecks[section]['splay'] in (1, "1", "true", "True", True)
+            if 'jitter' in customchecks[section] and customchecks[section]['jitter']:
+                customchecks_splay['jitter'] = max(0.0, float(customchecks[section]['jitter']))
+            if 'max_starts_per_second' in customchecks[section] and customchecks[section]['max_starts_per_second']:
+                customchecks_splay['max_starts_per_second'] = max(0.0, float(customchecks[section]['max_starts_per_second']))
+    
+    if executor == 'asyncio' and not customchecks_asyncio_supported():
+        print_verbose('The asyncio custom check executor needs python >= 3.8, fall back to the thread pool', False)
+        agent_log.warning('The asyncio custom check executor needs python >= 3.8, fall back to the thread pool')
+        executor = 'threads'
+    
+    if executor == 'asyncio':
+        print_verbose('Start asyncio custom check executor with max. %s concurrent checks' % (str(max_concurrent_checks)), False)
+        agent_log.info('Start asyncio custom check executor with max. %s concurrent checks' % (str(max_concurrent_checks)))
+        init_customchecks_metrics(executor, max_concurrent_checks)
+        start_customchecks_loop(max_concurrent_checks)
+    else:
+        print_verbose('Start thread pool with max. %s workers' % (str(max_workers)), False)
+        agent_log.info('Start thread pool with max. %s workers' % (str(max_workers)))
+        init_customchecks_metrics(executor, max_workers)
+        customchecks_executor = futures.ThreadPoolExecutor(max_workers=max_workers)
+        start_customcheck_results_consumer()
+    
+    persistent_count = 0
+    for check_name in customchecks:
+        if check_name != 'DEFAULT' and check_name != 'default':
+            if 'command' in customchecks[check_name] and customchecks[check_name]['command'] != '' and ('enabled' not in customchecks[check_name] or customchecks[check_name]['enabled'] in (1, "1", "true", "True", True)):
+                command = customchecks[check_name]['command']
+                interval = int(config['default']['interval'])
+                timeout = 60
+                
+                if customchecks[check_name]['interval']:
+                    interval = int(customchecks[check_name]['interval'])
+                if customchecks[check_name]['timeout']:
+                    timeout = int(customchecks[check_name]['timeout'])
+                if interval <= 0:
+                    interval = 1
+                
+                check = {
+                    'name': check_name,
+                    'command': command,
+                    'timeout': timeout,
+                    'shell': 'shell' not in customchecks[check_name] or customchecks[check_name]['shell'] not in (0, "0", "false", "False", False),
+                    'type': 'command'
+                }
+                if 'type' in customchecks[check_name] and customchecks[check_name]['type']:
+                    check['type'] = customchecks[check_name]['type'].strip().lower()
+                if check['type'] not in ('command', 'persistent'):
+                    print_verbose('Custom check "%s" has an unknown type "%s"' % (check_name, check['type']), False)
+                    agent_log.error('Custom check "%s" has an unknown type "%s"' % (check_name, check['type']))
+                    continue
+                if not check['shell']:
+                    try:
+                        check['args'], check['executable'] = split_customcheck_command(command)
+                    except ValueError as e:
+                        print_verbose('Custom check "%s" has an invalid command (shell = false): %s' % (check_name, str(e)), False)
+                        agent_log.error('Custom check "%s" has an invalid command (shell = false): %s' % (check_name, str(e)))
+                        continue
+                delay = 0
+                if splay:
+                    delay = get_customcheck_phase(check_name, interval)
+                schedule_job('custom check %s' % (check_name), run_splayed_customcheck, (check,), interval=interval, delay=delay, inline=True)
+                if check['type'] == 'persistent':
+                    persistent_count += 1
+    
+    if executor == 'asyncio' and persistent_count > 0:
+        # persistent custom checks run in the thread pool (see start_customchecks())
+        customchecks_executor = futures.ThreadPoolExecutor(max_workers=min(max_workers, persistent_count))
+        start_customcheck_results_consumer()
 
 
 def notify_oitc(oitc):
-    """Function that starts as a thread to push check results to an openITCOCKPIT server
+    """Function (scheduled job) to push check results to an openITCOCKPIT server
     
-    Send a post request with a given interval to the configured openITCOCKPIT server containing the latest check results.
+    Send a post request to the configured openITCOCKPIT server containing the latest check results.
+    Scheduled every oitc interval seconds.
     If autossl is activated, add the sha512 checksum to the request, to validate the sender of the request.
 
     Parameters
@@ -2273,88 +5936,67 @@ def notify_oitc(oitc):
         Configuration object that will be used to create the push connection
 
     """
-    agent_log.info('Starting Push mode')
-
-    global oitc_notification_thread_running
     global cached_check_data
     global cert_checksum
-    
-    time.sleep(1)
-    if oitc['url'].strip() and oitc['apikey'].strip() and int(oitc['interval']):
-        oitc_notification_thread_running = True
-        noty_interval = int(oitc['interval'])
-        if noty_interval <= 0:
-            noty_interval = 5
-        sleptSeconds = noty_interval - 4
-        while not thread_stop_requested:
-            if sleptSeconds < noty_interval:
-                time.sleep(1)
-                sleptSeconds = sleptSeconds + 1
-                continue
 
-            sleptSeconds = 0
-            if len(cached_check_data) > 0:
-                try:
-                    data = {
-                        'checkdata': json.dumps(cached_check_data),
-                        'hostuuid': oitc['hostuuid']
-                    }
-                    if autossl and file_readable(config['default']['autossl-crt-file']):
-                        if cert_checksum != '':
-                            data['checksum'] = cert_checksum
-                        else:
-                            with open(config['default']['autossl-crt-file'], 'r') as f:
-                                cert = f.read()
-                                cert = cert.replace("\r\n", "\n")
-                                sha512.update(cert.encode())
-                                cert_checksum = sha512.hexdigest().upper()
-                                data['checksum'] = cert_checksum
-                    
-                    headers = {
-                        'Content-Type': 'application/x-www-form-urlencoded',
-                        'Authorization': 'X-OITC-API '+oitc['apikey'].strip(),
-                    }
+    if len(cached_check_data) > 0:
+        try:
+            data = {
+                'checkdata': get_check_data_snapshot()['body'].decode('utf-8'),
+                'hostuuid': oitc['hostuuid']
+            }
+            if autossl and file_readable(config['default']['autossl-crt-file']):
+                if cert_checksum != '':
+                    data['checksum'] = cert_checksum
+                else:
+                    with open(config['default']['autossl-crt-file'], 'r') as f:
+                        cert = f.read()
+                        cert = cert.replace("\r\n", "\n")
+                        sha512.update(cert.encode())
+                        cert_checksum = sha512.hexdigest().upper()
+                        data['checksum'] = cert_checksum
+            
+            headers = {
+                'Content-Type': 'application/x-www-form-urlencoded',
+                'Authorization': 'X-OITC-API '+oitc['apikey'].strip(),
+            }
 
-                    try:
-                        requests.packages.urllib3.disable_warnings(requests.packages.urllib3.exceptions.InsecureRequestWarning)
-                    except:
-                        
-                        if stacktrace:
-                            traceback.print_exc()
-                            
-                    agent_log.info('Handing over check results')
-                    agent_log.info(oitc['url'].strip())
-                    response = requests.post(oitc['url'].strip() + '/agentconnector/updateCheckdata.json', data=data, headers=headers, verify=False)
-                    agent_log.info(response)
-
-                    if response.content.decode('utf-8').strip() != '':
-                        responseData = json.loads(response.content.decode('utf-8'))
-                        if autossl and 'new_ca' in responseData and 'ca_checksum' in responseData and responseData['new_ca'] in (1, "1", "true", "True", True) and file_readable(config['default']['autossl-ca-file']):
-
-                            with open(config['default']['autossl-ca-file'], 'r') as f:
-                                ca = f.read()
-                                ca = ca.replace("\r\n", "\n")
-                                sha512.update(ca.encode())
-                                ca_checksum = sha512.hexdigest().upper()
-
-                                if responseData['new_ca'] == ca_checksum:   # validates, that new ca request comes from old ca server
-                                    doNotWaitForReturnExecutor = futures.ThreadPoolExecutor(max_workers=1)
-                                    doNotWaitForReturnExecutor.submit(pull_crt_from_server, True)
+            try:
+                requests.packages.urllib3.disable_warnings(requests.packages.urllib3.exceptions.InsecureRequestWarning)
+            except:
+                
+                if stacktrace:
+                    traceback.print_exc()
                     
-                    #if verbose:
-                    #    print(response.status_code)
-                    #    print(response.content.decode('utf-8'))
+            agent_log.info('Handing over check results')
+            agent_log.info(oitc['url'].strip())
+            response = requests.post(oitc['url'].strip() + '/agentconnector/updateCheckdata.json', data=data, headers=headers, verify=False)
+            agent_log.info(response)
+
+            if response.content.decode('utf-8').strip() != '':
+                responseData = json.loads(response.content.decode('utf-8'))
+                if autossl and 'new_ca' in responseData and 'ca_checksum' in responseData and responseData['new_ca'] in (1, "1", "true", "True", True) and file_readable(config['default']['autossl-ca-file']):
+
+                    with open(config['default']['autossl-ca-file'], 'r') as f:
+                        ca = f.read()
+                        ca = ca.replace("\r\n", "\n")
+                        sha512.update(ca.encode())
+                        ca_checksum = sha512.hexdigest().upper()
+
+                        if responseData['new_ca'] == ca_checksum:   # validates, that new ca request comes from old ca server
+                            doNotWaitForReturnExecutor = futures.ThreadPoolExecutor(max_workers=1)
+                            doNotWaitForReturnExecutor.submit(pull_crt_from_server, True)
+            
+            #if verbose:
+            #    print(response.status_code)
+            #    print(response.content.decode('utf-8'))
 
-                except:
-                    print_verbose('An error occured while trying to notify your configured openITCOCKPIT instance!', True)
-                    agent_log.error('An error occured while trying to notify your configured openITCOCKPIT instance!')
-                    
-                    if stacktrace:
-                        traceback.print_exc()
-                        
-    oitc_notification_thread_running = False
-    print_verbose('Stopped oitc_notification_thread', False)
-    agent_log.info('Stopped oitc_notification_thread')
+        except:
+            print_verbose('An error occured while trying to notify your configured openITCOCKPIT instance!', True)
+            agent_log.error('An error occured while trying to notify your configured openITCOCKPIT instance!')
+            
+            if stacktrace:
+                traceback.print_exc()
 
 
 def process_webserver(enableSSL=False):
@@ -2404,11 +6046,17 @@ def process_webserver(enableSSL=False):
   
     while not thread_stop_requested and not webserver_stop_requested:
         try:
+            # returns after httpd.timeout seconds if there is no incoming connection
             httpd.handle_request()
         except:
             print_verbose('Webserver died, try to restart ...', False)
             agent_log.error('Webserver died, try to restart ...')
-        sleep(1)
+            
+            if stacktrace:
+                traceback.print_exc()
+            
+            sleep(1)
+    httpd.server_close()
     del httpd
     permanent_webserver_thread_running = False
     print_verbose('Stopped permanent_webserver_thread', False)
@@ -2419,34 +6067,25 @@ def restart_webserver():
     """Function to restart the webserver
     
     Tries to stop the and start the webserver thred again.
-    Therefore a fake GET request is made, calling the function fake_webserver_request().
+    The webserver thread notices the stop request within ThreadedHTTPServer.timeout seconds.
     
     If the web server has not been run before, it will not start!
 
     """
     agent_log.info('Restarting webserver')
     global webserver_stop_requested
-    global wait_and_check_auto_certificate_thread_stop_requested
     
     tmp_permanent_webserver_thread_running = permanent_webserver_thread_running
     time.sleep(2)
     
     if initialized:
         webserver_stop_requested = True
-        wait_and_check_auto_certificate_thread_stop_requested = True
-        
-        try:
-            agent_log.info('Check webserver is alive')
-            fake_webserver_request()
-        except:
-            agent_log.info('Webserver is not alive')
-            if stacktrace:
-                traceback.print_exc()
-                
+        if auto_certificate_job is not None:
+            cancel_job(auto_certificate_job)
         
         while webserver_stop_requested:
             if permanent_webserver_thread_running:
-                sleep(1)
+                sleep(0.1)
             else:
                 webserver_stop_requested = False
     
@@ -2557,7 +6196,7 @@ def pull_crt_from_server(renew=False):
     The request with the csr should return the new client (and the CA) certificate.
 
     If the agent is not known and not yet trusted by the openITCOCKPIT Server the function will be executed again in 10 minutes.
-    Therefore the function wait_and_check_auto_certificate(600) will be called as new thread (future).
+    Therefore the function wait_and_check_auto_certificate(60) schedules the next try.
     
     If the agent is not yet trusted by the openITCOCKPIT Server a manual confirmation in the openITCOCKPIT frontend is needed!
 
@@ -2620,8 +6259,7 @@ def pull_crt_from_server(renew=False):
                     if 'unknown' in jdata:
                         print_verbose('Untrusted agent! Try again in 1 minute to get a certificate from the server.', False)
                         agent_log.warning('Untrusted agent! Try again in 1 minute to get a certificate from the server.')
-                        executor = futures.ThreadPoolExecutor(max_workers=1)
-                        executor.submit(wait_and_check_auto_certificate, 60)
+                        wait_and_check_auto_certificate(60)
 
                     if 'signed' in jdata and 'ca' in jdata:
                         with open(config['default']['autossl-crt-file'], 'w+') as f:
@@ -2648,31 +6286,24 @@ def pull_crt_from_server(renew=False):
 
 
 def wait_and_check_auto_certificate(seconds):
-    """Function to wait until the next automatic certificate check
-
+    """Function to schedule the next automatic certificate check
+    
+    A previously scheduled (and not yet started) automatic certificate check is cancelled.
+    
     Parameters
     ----------
     seconds
         Time in seconds to wait before running the next automatic certificate check
 
     """
-    global wait_and_check_auto_certificate_thread_stop_requested
+    global auto_certificate_job
     
-    print_verbose('Started wait_and_check_auto_certificate', False)
-    agent_log.info('Started wait_and_check_auto_certificate')
-
     if autossl:
-        i = 0
-        while i < seconds and not wait_and_check_auto_certificate_thread_stop_requested and not thread_stop_requested:
-            time.sleep(1)
-            i = i + 1
-        
-        if not wait_and_check_auto_certificate_thread_stop_requested:
-            doNotWaitForReturnExecutor = futures.ThreadPoolExecutor(max_workers=1)
-            doNotWaitForReturnExecutor.submit(check_auto_certificate)
-    wait_and_check_auto_certificate_thread_stop_requested = False
-    print_verbose('Finished wait_and_check_auto_certificate', False)
-    agent_log.info('Finished wait_and_check_auto_certificate')
+        if auto_certificate_job is not None:
+            cancel_job(auto_certificate_job)
+        auto_certificate_job = schedule_job('automatic certificate check', check_auto_certificate, delay=seconds)
+        print_verbose('Scheduled automatic certificate check in %s seconds' % (str(seconds)), False)
+        agent_log.info('Scheduled automatic certificate check in %s seconds' % (str(seconds)))
 
 
 def check_auto_certificate():
@@ -2747,7 +6378,7 @@ def print_help():
     print('--no-cpustats                            : disable default cpu status check')
     print('--no-sensorstats                         : disable default sensor status check')
     print('--no-processstats                        : disable default process status check')
-    print('--processstats-including-child-ids       : add process child ids to the default process status check (computationally intensive)')
+    print('--processstats-including-child-ids       : add process child ids to the default process status check')
     print('--no-netstats                            : disable default network status check')
     print('--no-diskstats                           : disable default disk status check')
     print('--no-netio                               : disable default network I/O calculation')
@@ -2956,24 +6587,6 @@ def load_configuration():
             agent_log.warning("Could not read certfile or keyfile\nFall back to default http server")
     
 
-def fake_webserver_request():
-    """Runs a fake webserver request
-
-    GET Request (using python requests lib) to let webserver thread continue.
-    
-    Usually called from reload_all() to notice the updated thread_stop_requested value.
-        
-    """
-    protocol = 'http'
-    if enableSSL:
-        protocol = 'https'
-    complete_address = protocol + '://' + config['default']['address'] + ':' + str(config['default']['port'])
-    try:
-        requests.get(complete_address, verify=False)
-    except:
-        pass
-    
-
 def reload_all():
     """Function to stop all thread and trigger the configuration reload
 
@@ -2990,20 +6603,23 @@ def reload_all():
     
     if initialized:
         thread_stop_requested = True
-        
-        try:
-            fake_webserver_request()
-        except:
-            
-            if stacktrace:
-                traceback.print_exc()
-                
+        stop_scheduler()
+        if customchecks_executor is not None:
+            customchecks_executor.shutdown(wait=False)
+        stop_customchecks_loop()
+        stop_customcheck_results_consumer()
+        stop_persistent_customchecks()
+        if collector_executor is not None:
+            collector_executor.shutdown(wait=False)
         
         while thread_stop_requested:
-            if update_crt_files_thread_running or permanent_check_thread_running or permanent_webserver_thread_running or oitc_notification_thread_running or permanent_customchecks_check_thread_running:
-                sleep(1)
+            if update_crt_files_thread_running or permanent_webserver_thread_running:
+                sleep(0.1)
             else:
                 thread_stop_requested = False
+        stop_process_workers()
+        stop_fork_server()
+        close_procfs_files()
         reset_global_options()
     
     load_configuration()
@@ -3014,18 +6630,22 @@ def load_main_processing():
     """(Entry point) Function that initializes or reinitializes the agent on each call
 
 
-    Starts ...
-
-        - openITCOCKPIT Notification Thread (if enabled)
-        - customchecks collector thread (if needed)
-        - default check thread (including daily certificate expiration check)
-        - webserver thread
+    Schedules ...
         
-    ... after (running check thread are stopped,) configuration is loaded and automatic certificate check is done.
+        - openITCOCKPIT Notification (if enabled)
+        - custom checks (if needed)
+        - disk and network io sampler (if enabled)
+        - default checks
+        - daily certificate expiration check (if autossl is enabled)
+    
+    ... and starts the scheduler and the webserver thread
+    after (running jobs and threads are stopped,) configuration is loaded and automatic certificate check is done.
 
     """
     global initialized
-    
+    global cached_cpu_times
+    global collector_executor
+
     while not reload_all():
         sleep(1)
     
@@ -3034,10 +6654,21 @@ def load_main_processing():
     
     initialized = True
     
+    if config['default']['processstats'] in (1, "1", "true", "True") and get_process_workers_count() > 0:
+        start_process_workers(get_process_workers_count())    # before any check and the webserver thread is started
+    
+    if config['default'].get('fork-server', 'false') in (1, "1", "true", "True") and os.name == 'posix':
+        start_fork_server()
+    
     agent_log.info('Push mode enabled: %s',config['oitc']['enabled'])
 
     if 'oitc' in config and (config['oitc']['enabled'] in (1, "1", "true", "True", True) or added_oitc_parameter == 4):
-        oitc_notification_thread(notify_oitc, (config['oitc'],))
+        if config['oitc']['url'].strip() and config['oitc']['apikey'].strip() and int(config['oitc']['interval']):
+            agent_log.info('Starting Push mode')
+            noty_interval = int(config['oitc']['interval'])
+            if noty_interval <= 0:
+                noty_interval = 5
+            schedule_job('openITCOCKPIT notification', notify_oitc, (config['oitc'],), interval=noty_interval, delay=5)
     
     if config['default']['customchecks'] != "":
         if file_readable(config['default']['customchecks']):
@@ -3046,9 +6677,30 @@ def load_main_processing():
                 agent_log.info('Load custom check configuration file "%s"' % (config['default']['customchecks']))
                 customchecks.read_file(customchecks_configfile)
             if customchecks:
-                permanent_customchecks_check_thread(collect_customchecks_data_for_cache, (customchecks,))
-                
-    permanent_check_thread(collect_data_for_cache, (int(config['default']['interval']),))
+                collect_customchecks_data_for_cache(customchecks)
+    
+    collector_executor = futures.ThreadPoolExecutor(max_workers=max_collector_workers)
+    
+    if get_io_sample_interval() > 0 and (config['default']['diskio'] in (1, "1", "true", "True") or config['default']['netio'] in (1, "1", "true", "True")):
+        sample_interval = max(get_default_check_section_interval('diskio'), get_default_check_section_interval('netio'))
+        size = int(sample_interval / get_io_sample_interval()) + 2    # some spare samples for a delayed check
+        schedule_job('disk and network io sampler', collect_io_samples, (size, {}), interval=get_io_sample_interval(), inline=True)
+    
+    try:
+        if config['default']['cpustats'] in (1, "1", "true", "True"):
+            cached_cpu_times = get_cpu_times()[1]   # the first check measures the cpu usage since now
+    except:
+        print_verbose_without_lock("Could not get cpu times!", True)
+        agent_log.error("Could not get cpu times!")
+        
+        if stacktrace:
+            traceback.print_exc()
+    
+    schedule_job('default checks', collect_data_for_cache, interval=get_default_checks_interval(), delay=1)
+    if autossl:
+        schedule_job('certificate expiration check', check_auto_certificate, interval=86400, delay=86400)
+    
+    start_scheduler()
     permanent_webserver_thread(process_webserver, (enableSSL,))
 
 if __name__ == '__main__':
@@ -0,0 +1,38 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# the agent parses its command line on import
+_argv = sys.argv
+sys.argv = ['oitc_agent.py']
+import oitc_agent
+sys.argv = _argv
+
+
+class FakeClock(object):
+    """Monotonic clock that only moves when a test advances it"""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+        return self.now
+
+
+@pytest.fixture
+def agent():
+    return oitc_agent
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake_clock = FakeClock()
+    monkeypatch.setattr(oitc_agent, 'monotonic_time', fake_clock)
+    return fake_clock
@@ -0,0 +1,68 @@
+import json
+from email.utils import formatdate
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def check_data(agent, monkeypatch):
+    monkeypatch.setattr(agent, 'cached_check_data', {
+        'processes': [{'pid': 1, 'name': 'init'}, {'pid': 2, 'name': 'kthreadd'}],
+        'customchecks': {'check_users': {'result': 'USERS OK', 'last_updated_timestamp': 1}}
+    })
+    monkeypatch.setattr(agent, 'check_data_snapshot', None)
+
+
+def test_variant_contains_the_published_data(agent):
+    snapshot = agent.publish_check_data()
+
+    # results change after publishing (e.g. a custom check finished)
+    agent.cached_check_data['customchecks']['check_users']['result'] = 'USERS WARNING'
+    agent.cached_check_data['processes'].append({'pid': 3, 'name': 'newer'})
+
+    variant = agent.get_check_data_variant(snapshot, agent.parse_process_filter('processes.top=1&processes.sort=pid'))
+    data = json.loads(variant['body'].decode('utf-8'))
+
+    assert data['customchecks']['check_users']['result'] == 'USERS OK'
+    assert [process['pid'] for process in data['processes']] == [2]
+    assert json.loads(snapshot['body'].decode('utf-8'))['customchecks']['check_users']['result'] == 'USERS OK'
+
+
+
+def is_not_modified(agent, variant, if_modified_since):
+    request = agent.AgentWebserver.__new__(agent.AgentWebserver)
+    request.headers = {'If-Modified-Since': formatdate(if_modified_since, usegmt=True)}
+    return request._is_not_modified(variant, variant['etag'])
+
+
+def test_if_modified_since_within_the_same_second(agent, monkeypatch):
+    monkeypatch.setattr(agent.time, 'time', lambda: 1700000000.25)
+    first = agent.publish_check_data()
+    monkeypatch.setattr(agent.time, 'time', lambda: 1700000000.75)
+    second = agent.publish_check_data()
+
+    # a client with the first snapshot sends the same If-Modified-Since as a client with the second one
+    assert is_not_modified(agent, first, 1700000000)
+    assert not is_not_modified(agent, second, 1700000000)
+    assert is_not_modified(agent, second, 1700000001)
+
+
+def test_if_modified_since_of_an_earlier_second(agent, monkeypatch):
+    monkeypatch.setattr(agent.time, 'time', lambda: 1700000000.5)
+    agent.publish_check_data()
+    monkeypatch.setattr(agent.time, 'time', lambda: 1700000001.5)
+    snapshot = agent.publish_check_data()
+    variant = agent.get_check_data_variant(snapshot, agent.parse_process_filter('processes.top=1'))
+
+    assert not is_not_modified(agent, variant, 1700000000)
+    assert is_not_modified(agent, variant, 1700000001)
+
+
+def test_filtered_variants_get_their_own_etag(agent):
+    snapshot = agent.publish_check_data()
+    top = agent.get_check_data_variant(snapshot, agent.parse_process_filter('processes.top=1'))
+    sorted_top = agent.get_check_data_variant(snapshot, agent.parse_process_filter('processes.top=1&processes.sort=pid'))
+
+    assert top['etag'].startswith(snapshot['etag'][:-1] + '-')
+    assert top['etag'].endswith('"')
+    assert len(set([snapshot['etag'], top['etag'], sorted_top['etag']])) == 3
@@ -0,0 +1,40 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+
+pytestmark = pytest.mark.skipif(sys.version_info >= (3, 12) or not hasattr(asyncio, 'PidfdChildWatcher') or not hasattr(os, 'pidfd_open'),
+                                reason='the event loop uses its own child watcher only on python < 3.12 with pidfd support')
+
+
+@pytest.fixture(autouse=True)
+def loop_state(agent, monkeypatch):
+    monkeypatch.setattr(agent, 'customchecks_async_state', {'limit': 0, 'pending': agent.deque(), 'running': {}, 'publish_pending': False, 'stopping': False, 'killed': []})
+    yield
+    agent.stop_customchecks_loop()
+    agent.customchecks_loop = None
+    agent.customchecks_loop_thread = None
+
+
+def run_command(loop):
+    async def run():
+        process = await asyncio.create_subprocess_exec(sys.executable, '-c', 'pass')
+        return await process.wait()
+    return asyncio.run_coroutine_threadsafe(run(), loop).result(10)
+
+
+def test_reload_closes_the_child_watcher(agent):
+    agent.start_customchecks_loop(2)
+    first_watcher = agent.customchecks_child_watcher
+    assert run_command(agent.customchecks_loop) == 0
+
+    agent.stop_customchecks_loop()
+    assert agent.customchecks_child_watcher is None
+    assert not first_watcher.is_active()
+
+    agent.customchecks_async_state['stopping'] = False
+    agent.start_customchecks_loop(2)
+    assert agent.customchecks_child_watcher is not first_watcher
+    assert run_command(agent.customchecks_loop) == 0
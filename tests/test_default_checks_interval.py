@@ -0,0 +1,33 @@
+import configparser
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def default_config(agent, monkeypatch):
+    config = configparser.ConfigParser(allow_no_value=True)
+    config['default'] = {'interval': '30', 'cpustats-interval': '20'}
+    monkeypatch.setattr(agent, 'config', config)
+    monkeypatch.setattr(agent, 'default_check_sections', {})
+
+
+def collections(agent, section, until):
+    collected = []
+    interval = agent.get_default_checks_interval()
+    for now in range(0, until + 1, interval):
+        if agent.default_check_section_is_due(section, now):
+            agent.update_default_check_section(section, {}, now)
+            collected.append(now)
+    return collected
+
+
+def test_job_interval_is_the_gcd_of_the_section_intervals(agent):
+    assert agent.get_default_checks_interval() == 10
+
+    agent.config['default']['memory-interval'] = '45'
+    assert agent.get_default_checks_interval() == 5
+
+
+def test_each_section_is_collected_in_its_own_interval(agent):
+    assert collections(agent, 'cpustats', 120) == [0, 20, 40, 60, 80, 100, 120]
+    assert collections(agent, 'memory', 120) == [0, 30, 60, 90, 120]
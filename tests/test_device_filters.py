@@ -0,0 +1,35 @@
+import configparser
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def filter_options(agent, monkeypatch):
+    config = configparser.ConfigParser(allow_no_value=True)
+    config['default'] = {'diskio-include': '', 'diskio-exclude': ''}
+    monkeypatch.setattr(agent, 'config', config)
+    monkeypatch.setattr(agent, 'device_filters', {})
+
+
+def test_expressions_are_separated_by_whitespace(agent):
+    agent.config['default']['diskio-include'] = r'sd[a-z]{1,2}\d*   nvme\d+n1'
+
+    assert agent.device_is_included('diskio', ('sda1',))
+    assert agent.device_is_included('diskio', ('sdab',))
+    assert agent.device_is_included('diskio', ('nvme0n1',))
+    assert not agent.device_is_included('diskio', ('loop0',))
+
+
+def test_exclude_without_include(agent):
+    agent.config['default']['diskio-exclude'] = r'loop ram\d'
+
+    assert agent.device_is_included('diskio', ('sda',))
+    assert not agent.device_is_included('diskio', ('loop3',))
+    assert not agent.device_is_included('diskio', ('ram0',))
+
+
+def test_invalid_expression_is_skipped(agent):
+    agent.config['default']['diskio-exclude'] = r'loop sd[a'
+
+    assert not agent.device_is_included('diskio', ('loop0',))
+    assert agent.device_is_included('diskio', ('sda',))
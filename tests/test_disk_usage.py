@@ -0,0 +1,102 @@
+import threading
+import time
+from collections import namedtuple
+
+import psutil
+import pytest
+
+sdiskusage = namedtuple('sdiskusage', ['total', 'used', 'free', 'percent'])
+
+
+class HangingDiskUsage(object):
+    """psutil.disk_usage that blocks (like a stale NFS mount) for /hang once hang is set
+
+    A hanging call advances the fake clock past the timeout, so the tests do not depend on the speed of the machine.
+    """
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.hang = False
+        self.calls = []
+        self.blocked = []
+
+    def __call__(self, mountpoint):
+        self.calls.append(mountpoint)
+        if mountpoint == '/hang' and self.hang:
+            blocked = threading.Event()
+            self.blocked.append(blocked)
+            self.clock.advance(1)
+            blocked.wait()
+        return sdiskusage(100, 40, 60, 40.0)
+
+    def release(self):
+        for blocked in self.blocked:
+            blocked.set()
+
+
+@pytest.fixture(autouse=True)
+def empty_disk_usage_cache(agent, monkeypatch):
+    monkeypatch.setattr(agent, 'max_disk_usage_workers', 1)    # start the workers in the order of the mountpoints
+    agent.disk_usage_cache.clear()
+    yield
+    agent.disk_usage_cache.clear()
+
+
+@pytest.fixture
+def disk_usage(monkeypatch, clock):
+    disk_usage = HangingDiskUsage(clock)
+    monkeypatch.setattr(psutil, 'disk_usage', disk_usage)
+    yield disk_usage
+    disk_usage.release()
+
+
+def wait_until_done(agent, request):
+    with agent.disk_usage_condition:
+        return agent.disk_usage_condition.wait_for(lambda: request['done'], 5)
+
+
+def test_hanging_mountpoint_returns_within_timeout(agent, clock, disk_usage):
+    assert agent.update_disk_usages(['/ok', '/hang'], 0.2) == set(['/ok', '/hang'])
+    last_usage = agent.disk_usage_cache['/hang']['usage']
+
+    disk_usage.hang = True
+    started = time.time()
+    updated = agent.update_disk_usages(['/ok', '/hang'], 0.2)
+
+    assert time.time() - started < 5    # does not wait for the hanging call
+    assert updated == set(['/ok'])    # /hang is reported stale with its last known usage
+    entry = agent.disk_usage_cache['/hang']
+    assert entry['usage'] == last_usage
+    assert entry['failures'] == 1
+    assert entry['retry_after'] == clock.now + 0.4    # backoff
+
+
+def test_hanging_mountpoint_gets_no_second_worker(agent, clock, disk_usage):
+    disk_usage.hang = True
+    assert agent.update_disk_usages(['/hang'], 0.2) == set()
+    assert disk_usage.calls == ['/hang']
+
+    assert agent.update_disk_usages(['/hang'], 0.2) == set()    # in backoff
+    clock.advance(10)
+    assert agent.update_disk_usages(['/hang'], 0.2) == set()    # backoff over, but the first call still hangs
+
+    assert disk_usage.calls == ['/hang']
+
+
+def test_backoff_grows_exponentially(agent, clock, disk_usage):
+    disk_usage.hang = True
+    agent.update_disk_usages(['/hang'], 0.2)
+    entry = agent.disk_usage_cache['/hang']
+    assert entry['retry_after'] == clock.now + 0.4
+
+    # the hanging call returns, the mountpoint is retried after the backoff and hangs again
+    disk_usage.release()
+    assert wait_until_done(agent, entry['request'])
+    assert agent.update_disk_usages(['/hang'], 0.2) == set()
+    assert disk_usage.calls == ['/hang']
+    clock.advance(0.4)
+    agent.update_disk_usages(['/hang'], 0.2)
+
+    assert disk_usage.calls == ['/hang', '/hang']
+    assert entry['failures'] == 2
+    assert entry['retry_after'] == clock.now + 0.8
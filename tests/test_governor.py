@@ -0,0 +1,34 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def governor(agent, monkeypatch):
+    monkeypatch.setattr(agent, 'governor_samples', agent.deque())
+    monkeypatch.setattr(agent, 'governor_state', {'level': 0, 'good_windows': 0, 'cpu_percent': None, 'children_cpu_percent': None, 'rss': None})
+    monkeypatch.setattr(agent, 'get_governor_budget', lambda: (10, 0))
+    monkeypatch.setattr(agent, 'get_default_check_section_interval', lambda section: 30)
+
+
+def measure(agent, monkeypatch, cpu_seconds, children_cpu_seconds):
+    monkeypatch.setattr(agent, 'measure_agent_usage', lambda: (cpu_seconds, children_cpu_seconds, 1024))
+
+
+def test_child_cpu_time_is_not_part_of_the_budget(agent, monkeypatch):
+    measure(agent, monkeypatch, 0.0, 0.0)
+    agent.update_governor(1000)
+    measure(agent, monkeypatch, 0.3, 27.0)
+    agent.update_governor(1030)
+
+    assert agent.governor_state['cpu_percent'] == 1.0
+    assert agent.governor_state['children_cpu_percent'] == 90.0
+    assert agent.governor_state['level'] == 0
+
+
+def test_agent_cpu_time_exceeding_the_budget_throttles(agent, monkeypatch):
+    measure(agent, monkeypatch, 0.0, 0.0)
+    agent.update_governor(1000)
+    measure(agent, monkeypatch, 6.0, 0.0)
+    agent.update_governor(1030)
+
+    assert agent.governor_state['cpu_percent'] == 20.0
+    assert agent.governor_state['level'] == 1
@@ -0,0 +1,55 @@
+import sys
+
+import pytest
+
+
+COPROCESS = r'''
+import json
+import sys
+
+for n, line in enumerate(iter(sys.stdin.readline, '')):
+    request = json.loads(line)
+    answer_id = request['id'] + 1 if sys.argv[1] == 'out-of-step' and n == 1 else request['id']
+    sys.stdout.write(json.dumps({'id': answer_id, 'returncode': 0, 'output': 'OK - request %d' % request['id']}) + '\n')
+    sys.stdout.flush()
+'''
+
+
+@pytest.fixture(autouse=True)
+def persistent_state(agent, monkeypatch):
+    monkeypatch.setattr(agent, 'persistent_customchecks', {})
+    yield
+    agent.stop_persistent_customchecks()
+
+
+def persistent_check(tmpdir, mode):
+    script = tmpdir.join('coprocess.py')
+    script.write(COPROCESS)
+    return {'name': 'check_persistent', 'command': '', 'timeout': 5, 'shell': False, 'args': [sys.executable, str(script), mode], 'executable': sys.executable}
+
+
+def test_answers_echo_the_request_id(agent, tmpdir):
+    check = persistent_check(tmpdir, 'echo')
+
+    first = agent.request_persistent_customcheck(check)
+    second = agent.request_persistent_customcheck(check)
+
+    assert first == {'result': 'OK - request 1', 'error': None, 'returncode': 0}
+    assert second == {'result': 'OK - request 2', 'error': None, 'returncode': 0}
+    assert agent.persistent_customchecks['check_persistent']['starts'] == 1
+
+
+def test_mismatching_answer_is_a_framing_error(agent, clock, tmpdir):
+    check = persistent_check(tmpdir, 'out-of-step')
+
+    assert agent.request_persistent_customcheck(check)['returncode'] == 0
+    result = agent.request_persistent_customcheck(check)
+    entry = agent.persistent_customchecks['check_persistent']
+
+    assert result['returncode'] == 3
+    assert entry['process'] is None
+    assert entry['failures'] == 1
+
+    clock.advance(1)
+    assert agent.request_persistent_customcheck(check) == {'result': 'OK - request 3', 'error': None, 'returncode': 0}
+    assert entry['starts'] == 2
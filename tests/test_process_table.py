@@ -0,0 +1,86 @@
+import os
+
+import psutil
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def empty_process_table(agent):
+    agent.process_table = {}
+    agent.process_attribute_cache = {}
+    yield
+    agent.process_table = {}
+    agent.process_attribute_cache = {}
+
+
+def test_known_processes_keep_their_object(agent):
+    first = agent.update_process_table([os.getpid()])
+    second = agent.update_process_table([os.getpid(), os.getppid()])
+
+    assert second[0] is first[0]
+    assert second[1].pid == os.getppid()
+
+
+def test_exited_processes_are_dropped(agent):
+    agent.update_process_table([os.getpid(), os.getppid()])
+    processes = agent.update_process_table([os.getpid()])
+
+    assert [p.pid for p in processes] == [os.getpid()]
+
+
+def test_reused_pid_gets_a_new_object(agent):
+    class ExitedProcess(object):
+        pid = os.getpid()
+        def is_running(self):
+            return False    # the pid belongs to another process now
+
+    agent.update_process_table([os.getpid()])
+    (key, p), = agent.process_table.items()
+    agent.process_table = {key: ExitedProcess()}
+
+    processes = agent.update_process_table([os.getpid()])
+
+    assert isinstance(processes[0], psutil.Process)
+    assert list(agent.process_table.keys()) == [key]
+
+
+def test_process_without_create_time_is_kept(agent, monkeypatch):
+    def denied(self):
+        raise psutil.AccessDenied(self.pid)
+    monkeypatch.setattr(psutil.Process, 'create_time', denied)
+
+    first = agent.update_process_table([os.getpid()])
+    second = agent.update_process_table([os.getpid()])
+
+    assert list(agent.process_table.keys()) == [(os.getpid(), None)]
+    assert second[0] is first[0]
+
+
+def test_failed_attribute_reads_are_not_cached(agent, monkeypatch):
+    cmdline = psutil.Process.cmdline
+    def denied(self):
+        raise psutil.AccessDenied(self.pid)
+    monkeypatch.setattr(psutil.Process, 'cmdline', denied)
+    p = psutil.Process(os.getpid())
+
+    first = agent.get_process_data(p, psutil.virtual_memory().total, 100, 300)
+    monkeypatch.setattr(psutil.Process, 'cmdline', cmdline)
+    second = agent.get_process_data(p, psutil.virtual_memory().total, 101, 300)
+
+    assert first['cmdline'] == ""
+    assert second['cmdline'] == p.cmdline()
+    cached = agent.process_attribute_cache[(p.pid, p.create_time())]
+    assert cached['cmdline']['timestamp'] == 101
+
+
+def test_process_without_create_time_is_collected_without_cache(agent, monkeypatch):
+    def denied(self):
+        raise psutil.AccessDenied(self.pid)
+    monkeypatch.setattr(psutil.Process, 'create_time', denied)
+    p, = agent.update_process_table([os.getpid()])
+
+    data = agent.get_process_data(p, psutil.virtual_memory().total, 100, 300)
+
+    assert data['pid'] == os.getpid()
+    assert data['cmdline'] == p.cmdline()
+    assert agent.process_attribute_cache == {}
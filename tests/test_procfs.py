@@ -0,0 +1,27 @@
+MEMINFO = b'''MemTotal:        8000000 kB
+MemFree:         1000000 kB
+MemAvailable:    5000000 kB
+Buffers:          200000 kB
+Cached:          2500000 kB
+SwapCached:            0 kB
+Active:          3000000 kB
+Inactive:        2000000 kB
+Shmem:            100000 kB
+Slab:             400000 kB
+SReclaimable:     300000 kB
+'''
+
+
+def test_virtual_memory_uses_the_psutil_5_6_calculation(agent, tmpdir):
+    tmpdir.join('meminfo').write_binary(MEMINFO)
+    agent.close_procfs_files()
+    try:
+        mem = agent.procfs_virtual_memory(str(tmpdir))
+    finally:
+        agent.close_procfs_files()
+
+    assert mem.total == 8000000 * 1024
+    assert mem.cached == (2500000 + 300000) * 1024
+    assert mem.used == (8000000 - 1000000 - 2800000 - 200000) * 1024    # total - free - cached - buffers
+    assert mem.available == 5000000 * 1024
+    assert mem.percent == 37.5    # (total - available) / total
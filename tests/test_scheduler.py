@@ -0,0 +1,143 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def empty_scheduler(agent):
+    del agent.scheduler_jobs[:]
+    yield
+    del agent.scheduler_jobs[:]
+
+
+def test_jobs_run_in_deadline_order(agent, clock):
+    calls = []
+    agent.schedule_job('late', calls.append, ('late',), delay=3, inline=True)
+    agent.schedule_job('early', calls.append, ('early',), delay=1, inline=True)
+    agent.schedule_job('same deadline, added first', calls.append, ('second',), delay=2, inline=True)
+    agent.schedule_job('same deadline, added last', calls.append, ('third',), delay=2, inline=True)
+
+    assert agent.run_due_jobs(clock.advance(0.5)) == []
+    agent.run_due_jobs(clock.advance(5))
+
+    assert calls == ['early', 'second', 'third', 'late']
+    assert agent.scheduler_jobs == []    # one time jobs are not scheduled again
+
+
+def test_periodic_job_is_rearmed_drift_free(agent, clock):
+    calls = []
+    start = clock.now
+    job = agent.schedule_job('periodic', lambda: calls.append(agent.monotonic_time()), interval=10, delay=1, inline=True)
+
+    agent.run_due_jobs(clock.advance(1.4))    # late by 0.4s
+    assert job['deadline'] == start + 11      # not now + interval
+
+    agent.run_due_jobs(clock.advance(9.6))
+    assert len(calls) == 2
+    assert job['deadline'] == start + 21
+
+
+def test_periodic_job_skips_missed_runs(agent, clock):
+    calls = []
+    start = clock.now
+    job = agent.schedule_job('periodic', calls.append, (None,), interval=10, inline=True)
+
+    agent.run_due_jobs(clock.advance(35))    # deadlines +0, +10, +20 and +30 passed
+
+    assert len(calls) == 1
+    assert job['deadline'] == start + 40
+    assert len(agent.scheduler_jobs) == 1
+
+
+def test_cancelled_job_is_not_run(agent, clock):
+    calls = []
+    job = agent.schedule_job('cancelled', calls.append, ('cancelled',), interval=5, delay=1, inline=True)
+    agent.schedule_job('other', calls.append, ('other',), delay=1, inline=True)
+
+    agent.cancel_job(job)
+    agent.run_due_jobs(clock.advance(2))
+
+    assert calls == ['other']
+    assert agent.scheduler_jobs == []    # removed, not scheduled again
+
+
+def test_cancel_after_first_run_stops_periodic_job(agent, clock):
+    calls = []
+    job = agent.schedule_job('periodic', calls.append, (None,), interval=5, inline=True)
+
+    agent.run_due_jobs(clock.advance(0))
+    agent.cancel_job(job)
+    agent.run_due_jobs(clock.advance(5))
+
+    assert len(calls) == 1
+    assert agent.scheduler_jobs == []
+
+
+def test_running_job_is_not_started_twice(agent, clock):
+    import threading
+    release = threading.Event()
+    calls = []
+
+    def blocking():
+        calls.append(None)
+        release.wait(5)
+
+    job = agent.schedule_job('blocking', blocking, interval=1)
+    try:
+        assert agent.run_due_jobs(clock.advance(0)) == [job]
+        assert agent.run_due_jobs(clock.advance(1)) == []    # previous run still running
+    finally:
+        release.set()
+        job['thread'].join(5)
+    assert len(calls) == 1
+
+
+def test_stop_does_not_wait_forever_for_a_hanging_job(agent, monkeypatch):
+    import threading
+    import time
+    release = threading.Event()
+    monkeypatch.setattr(agent, 'max_scheduler_stop_wait', 0.2)
+
+    job = agent.schedule_job('hanging', release.wait, (30,), interval=60)
+    agent.run_due_jobs(agent.monotonic_time())
+    try:
+        started = time.time()
+        agent.stop_scheduler()
+        assert time.time() - started < 2
+        assert job['thread'].is_alive()
+        assert job['cancelled'].is_set()
+    finally:
+        release.set()
+        job['thread'].join(5)
+
+
+def test_restart_while_the_old_scheduler_thread_hangs(agent, monkeypatch):
+    import threading
+    hanging = threading.Event()
+    release = threading.Event()
+    new_scheduler_ran = threading.Event()
+    calls = []
+    monkeypatch.setattr(agent, 'max_scheduler_stop_wait', 0.2)
+
+    def hang():
+        hanging.set()
+        release.wait(30)
+
+    agent.schedule_job('hanging', hang, inline=True)
+    agent.schedule_job('after hanging', calls.append, ('old',), inline=True)
+    agent.start_scheduler()
+    old_thread = agent.scheduler_thread
+    try:
+        assert hanging.wait(5)
+        agent.stop_scheduler()
+        assert old_thread.is_alive()
+
+        agent.start_scheduler()
+        agent.schedule_job('new', new_scheduler_ran.set, interval=0.05, inline=True)
+        release.set()
+        old_thread.join(5)
+
+        assert not old_thread.is_alive()    # stopped by its own event, not revived by the new scheduler
+        assert calls == []    # the old thread does not start its remaining due jobs
+        assert new_scheduler_ran.wait(5)
+    finally:
+        release.set()
+        agent.stop_scheduler()